@@ -0,0 +1,85 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from api.resume import search_service, usage_service
+from core.config import settings
+from core.profiling import Profiler
+from models.resume import CandidateSearchResponse
+from services.usage_service import UsageService
+
+router = APIRouter()
+# Request profiles of this worker (see core/profiling.py); main.py installs the middleware
+profiler = Profiler.from_settings(settings)
+
+
+def _require_admin(request: Request):
+    if not profiler.admin_token:
+        raise HTTPException(status_code=404, detail="Admin endpoints are not enabled (PROFILE_ADMIN_TOKEN).")
+    if not profiler.is_admin(request.headers.get(settings.PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+
+@router.get("/profiles")
+def list_profiles(request: Request):
+    """Summaries of the profiles kept by this worker, newest first."""
+    _require_admin(request)
+    return {"profiles": profiler.list()}
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    request: Request,
+    format: str = Query("json", regex="^(json|text|raw)$",
+                        description="json summary, text report, or raw data (pstats file / collapsed stacks)"),
+):
+    _require_admin(request)
+    session = profiler.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been rotated out).")
+    if format == "json":
+        return session.summary()
+    if format == "text":
+        return Response(content=session.text(), media_type="text/plain; charset=utf-8")
+    extension = "prof" if session.mode == "cprofile" else "folded"
+    return Response(
+        content=session.raw(), media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{session.id}.{extension}"'}
+    )
+
+
+@router.get("/usage")
+def get_usage(
+    request: Request,
+    day: Optional[str] = Query(None, regex=r"^\d{8}$", description="UTC day, YYYYMMDD (default: today)"),
+    tenant: Optional[str] = Query(None, description="One tenant instead of all"),
+):
+    """Model token usage per tenant for a day, with budgets and what is left."""
+    _require_admin(request)
+    if tenant is not None:
+        name = UsageService.tenant_name(tenant)
+        return {"day": day or UsageService.day(), "tenants": {name: usage_service.usage(name, day)}}
+    return usage_service.report(day)
+
+
+@router.get("/search", response_model=CandidateSearchResponse)
+def search_candidates(
+    request: Request,
+    q: str = Query("", description='Free-text query, e.g. "Python, 5 years, Beijing"'),
+    min_years: float = Query(0, ge=0, description="Minimum years of experience"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    """
+    Search every analyzed resume without calling the model again. Results carry
+    candidates' names and addresses across all tenants: admin token only.
+    """
+    _require_admin(request)
+    result = search_service.search(q=q, min_years=min_years, page=page, page_size=page_size)
+    return CandidateSearchResponse(
+        total=result["total"],
+        page=page,
+        page_size=page_size,
+        results=result["results"]
+    )
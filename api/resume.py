@@ -1,60 +1,204 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-from models.resume import ResumeAnalyzeResponse, ResumeMatchResponse, JobDescriptionRequest, ResumeData, MatchResult, BasicInfo
+from fastapi import APIRouter, BackgroundTasks, File, UploadFile, HTTPException, Depends, Query, Request, Response
+from models.resume import ResumeAnalyzeResponse, ResumeMatchResponse, JobDescriptionRequest, ResumeData, MatchResult, BasicInfo, JobMatchesRequest, JobMatch, JobMatchesResponse, LeaderboardResponse
 
+import asyncio
 import hashlib
+import time
+from typing import Dict, List, Optional, Tuple, Union
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from core.config import settings
+from core.admission import AdmissionController, Lane, Overloaded, TenantLimiter, keep_slots_until_done
+from core.cancellation import CancelToken, Cancelled
+from core.parse_pool import ParsePool, ParseFailed
+from core.profiling import profiled, trace_allocations
 
 # Since we haven't initialized Redis dependency properly yet, we'll instantiate it here for demo
 from services.redis_service import RedisService
+from services.cache_codec import CacheCodec, dumps_compact, loads
+from services.cache_refresh import RefreshPolicy
 from services.pdf_service import PDFService
 from services.ai_service import AIService
+from services.model_router import ModelRouter
+from services.local_extractor import LocalExtractor
+from services.usage_service import UsageService
+from services.fingerprint_service import FingerprintService
+from services.search_service import SearchService
+from services.leaderboard_service import LeaderboardService
+from services.jd_service import JobDescriptionService
+from services.image_preprocessor import PageImagePreprocessor
 
 router = APIRouter()
-redis_service = RedisService(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+# How often a request waiting on threadpool work checks for a client disconnect
+_DISCONNECT_POLL_SECONDS = 0.5
+
+redis_service = RedisService(
+    host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB,
+    password=settings.REDIS_PASSWORD,
+    connect_in_background=settings.REDIS_CONNECT_IN_BACKGROUND,
+    local_cache_path=settings.LOCAL_CACHE_PATH or None,
+    codec=CacheCodec.from_settings(settings),
+    nodes=settings.REDIS_NODES.split(","),
+    cluster=settings.REDIS_CLUSTER,
+    node_retry_seconds=settings.REDIS_NODE_RETRY_SECONDS,
+    refresh_policy=RefreshPolicy(
+        grace_seconds=settings.CACHE_STALE_GRACE_SECONDS,
+        beta=settings.CACHE_REFRESH_BETA,
+        min_hits=settings.CACHE_REFRESH_MIN_HITS,
+        window_seconds=settings.CACHE_ACCESS_WINDOW_SECONDS
+    ) if settings.CACHE_STALE_GRACE_SECONDS > 0 else None
+)
+search_service = SearchService(redis_service, max_memory_documents=settings.SEARCH_MEMORY_MAX_DOCUMENTS)
+# Candidates ranked per JD, updated as matches are scored
+leaderboard_service = LeaderboardService(redis_service, AIService.MATCH_PROMPT_VERSION,
+                                         retention_days=settings.LEADERBOARD_RETENTION_DAYS)
+page_preprocessor = PageImagePreprocessor(
+    target_dpi=settings.VISION_TARGET_DPI,
+    max_pixels=settings.VISION_MAX_PIXELS,
+    tile_dense=settings.VISION_TILE_DENSE_PAGES
+) if settings.VISION_PREPROCESS else None
+# PDFs are parsed and rasterized in isolated worker processes (see core/parse_pool.py)
+parse_pool = ParsePool(
+    workers=settings.PDF_PARSE_WORKERS,
+    timeout_seconds=settings.PDF_PARSE_TIMEOUT_SECONDS,
+    max_rss_bytes=settings.PDF_PARSE_MAX_RSS_MB * 1024 * 1024,
+    max_jobs=settings.PDF_PARSE_MAX_JOBS,
+    initializer=PDFService.warmup
+)
+# Cheapest adequate model first (MODEL_* settings)
+model_router = ModelRouter.from_settings(settings)
+# Token usage and budgets per tenant (TENANT_* settings)
+usage_service = UsageService.from_settings(redis_service, settings)
+tenant_limiter = TenantLimiter(settings.TENANT_MAX_ACTIVE_REQUESTS)
+# Initial service-time estimates; each lane then tracks a moving average
+admission = AdmissionController({
+    "cache": Lane("cache", settings.ADMISSION_CACHE_CONCURRENCY, settings.ADMISSION_CACHE_QUEUE, service_time=0.01),
+    "text": Lane("text", settings.ADMISSION_TEXT_CONCURRENCY, settings.ADMISSION_TEXT_QUEUE, service_time=5.0),
+    "vision": Lane("vision", settings.ADMISSION_VISION_CONCURRENCY, settings.ADMISSION_VISION_QUEUE, service_time=30.0),
+})
 # Optional: print warning if Redis not available, but logic will fallback or fail
 
-@router.post("/analyze", response_model=ResumeAnalyzeResponse)
-async def analyze_resume(file: UploadFile = File(...)):
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
-    
-    file_bytes = await file.read()
-    
-    # Calculate md5 hash for unique identifier
-    file_hash = hashlib.md5(file_bytes).hexdigest()
-    resume_id = file_hash
-    
-    # Try fetching from cache
+def _cache_hit_body(resume_id: str, field: str, json_bytes: bytes, job_hash: Optional[str] = None) -> bytes:
+    """
+    Response body for a cache hit, spliced around the cached JSON: the entry is
+    never parsed into a model and re-encoded. Same bytes FastAPI would render.
+    """
+    return b"".join((
+        b'{"resume_id":', dumps_compact(resume_id),
+        b',"job_hash":' + dumps_compact(job_hash) if job_hash is not None else b"",
+        b',"', field.encode(), b'":', json_bytes,
+        b',"message":"Success (Cache Hit)"}',
+    ))
+
+def _raw_json_response(body: bytes, request: Request, background: Optional[BackgroundTask] = None) -> Response:
+    """
+    Return a pre-serialized body as-is, skipping pydantic validation and re-encoding.
+    The ETag is derived from the body, so a client holding the same bytes gets a 304.
+    `background` runs after the response has been sent.
+    """
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers={"ETag": etag}, background=background)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag}, background=background)
+
+def _tenant(request: Request) -> str:
+    return UsageService.tenant_name(request.headers.get(settings.TENANT_HEADER))
+
+def _budget_error(tenant: str) -> HTTPException:
+    return HTTPException(
+        status_code=429, detail=f"The daily token budget of client '{tenant}' is used up.",
+        headers={"Retry-After": str(UsageService.seconds_until_reset())}
+    )
+
+def _budget_exhausted(tenant: str) -> bool:
+    """
+    Whether the tenant is over today's token budget and gets the model-free path
+    (TENANT_BUDGET_ACTION=downgrade); with "reject" it gets a 429 instead.
+    """
     try:
-        cached_data = redis_service.get_resume_data(resume_id)
-        if cached_data:
-            return ResumeAnalyzeResponse(
-                resume_id=resume_id,
-                data=ResumeData(**cached_data),
-                message="Success (Cache Hit)"
-            )
+        exhausted = usage_service.over_budget(tenant)
     except Exception as e:
-        print(f"Cache check failed: {e}")
-        pass # Ignore cache failure and proceed
-        
-    # PDF Parsing - try text extraction first
-    raw_text = ""
-    is_image_pdf = False
+        print(f"Budget check failed: {e}")
+        return False
+    if exhausted and settings.TENANT_BUDGET_ACTION == "reject":
+        raise _budget_error(tenant)
+    return exhausted
+
+def _parse_pdf(file_bytes: bytes, token: CancelToken) -> Tuple[str, List[int]]:
+    """
+    Readable text of the PDF and the pages that need vision extraction (see
+    PDFService.route_pages), parsed in worker processes; long documents are
+    split across several. A document that times out or exceeds the memory
+    ceiling there is rejected with 422.
+    """
     try:
-        raw_text = PDFService.extract_text(file_bytes)
-        if not raw_text or not raw_text.strip():
-            # Check if it's an image-based/vector-drawn PDF
-            is_image_pdf = PDFService.is_image_based_pdf(file_bytes)
-            if not is_image_pdf:
-                raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
-    except HTTPException:
-        raise
+        raw_text, vision_pages = PDFService.route_pages_parallel(
+            file_bytes, settings.TEXT_QUALITY_MIN_SCORE, parse_pool, settings.PDF_PARALLEL_MIN_PAGES,
+            should_stop=token.is_cancelled
+        )
+    except ParseFailed as e:
+        token.check()
+        raise HTTPException(status_code=422, detail=f"Could not parse PDF: {e.reason}.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-        
+    if not raw_text and not vision_pages:
+        raise HTTPException(status_code=400, detail="Could not extract text from PDF.")
+    return raw_text, vision_pages
+
+def _extract_resume(file_bytes: bytes, raw_text: str, vision_pages: List[int], token: CancelToken,
+                    local_only: bool = False) -> Tuple[ResumeData, str, Optional[dict]]:
+    """
+    Structured resume data, the response message and the text fingerprint (if
+    any). `local_only` (tenant over budget) extracts without calling a model.
+    """
+    # Near-duplicate detection: the same resume re-exported or lightly edited has a
+    # new file hash but (almost) the same text, so reuse or diff the cached result.
+    fingerprint = None
+    duplicate = None
+    # Only for fully readable PDFs: the text of a partly scanned one isn't the whole resume
+    if raw_text.strip() and not vision_pages and settings.NEAR_DUPLICATE_THRESHOLD > 0:
+        try:
+            fingerprint = FingerprintService.fingerprint(raw_text)
+            duplicate = FingerprintService.find_duplicate(
+                fingerprint, redis_service, settings.NEAR_DUPLICATE_THRESHOLD
+            )
+        except Exception as e:
+            print(f"Fingerprint lookup failed: {e}")
+
     # AI Info Extraction
-    api_key = settings.DASHSCOPE_API_KEY
-    if not api_key:
+    api_key = "" if local_only else settings.DASHSCOPE_API_KEY
+    extracted_data = None
+    message = "Success"
+    if duplicate:
+        previous_id, similarity = duplicate
+        previous_data = redis_service.get_resume_data(previous_id) or {}
+        previous_fp = redis_service.get_fingerprint(previous_id) or {}
+        changed = []
+        if previous_fp.get("text_hash") != fingerprint["text_hash"]:
+            changed = FingerprintService.changed_sections(raw_text, previous_fp)
+        changed_text = "\n\n".join(changed)
+        if not previous_data:
+            pass  # Expired between lookup and use
+        elif not changed:
+            extracted_data = ResumeData(**previous_data)
+            message = "Success (Duplicate Content)"
+        elif api_key and len(changed_text) <= len(raw_text) * settings.NEAR_DUPLICATE_MAX_CHANGED_RATIO:
+            try:
+                token.commit()
+                extracted_data = AIService.update_resume_info(previous_data, changed_text, api_key)
+                message = "Success (Incremental)"
+            except Cancelled:
+                raise
+            except Exception as e:
+                print(f"Incremental extraction failed, running full extraction: {e}")
+        if extracted_data is not None:
+            print(f"Near-duplicate of {previous_id} (similarity {similarity:.2f}), {len(changed)} changed section(s)")
+
+    if extracted_data is None and local_only:
+        extracted_data = LocalExtractor.extract(raw_text)
+        message = "Success (Local, token budget exceeded)"
+    elif extracted_data is None and not api_key:
         # Fallback dummy data if no key configured
         dummy_data = {
             "basic_info": BasicInfo(name="Test User", phone="123456789", email="test@test.com", address="Beijing"),
@@ -65,92 +209,452 @@ async def analyze_resume(file: UploadFile = File(...)):
         }
         extracted_data = ResumeData(**dummy_data)
         message = "Success (Mock API)"
-    else:
+    elif extracted_data is None:
         try:
-            if is_image_pdf or not raw_text.strip():
-                # Image-based PDF: use vision AI
+            if vision_pages:
+                # Image-based or garbled pages: use vision AI, with the readable pages as text
                 print(f"Detected image-based PDF, using vision AI extraction...")
-                page_images = PDFService.pdf_pages_to_base64_images(file_bytes, dpi=200)
+                # Rasterization stops (or its worker is killed) once the request is abandoned
+                render = dict(dpi=200, preprocessor=page_preprocessor,
+                              max_images=AIService.MAX_VISION_IMAGES, pages=vision_pages)
+                try:
+                    # Under tracemalloc, in the worker, when the request is being profiled
+                    if parse_pool.size:
+                        page_images = trace_allocations(PDFService.pdf_pages_to_base64_images, file_bytes,
+                                                        run=parse_pool.run, should_stop=token.is_cancelled, **render)
+                    else:
+                        page_images = trace_allocations(
+                            PDFService.pdf_pages_to_base64_images, file_bytes, should_stop=token.is_cancelled, **render
+                        )
+                except ParseFailed as e:
+                    token.check()
+                    raise HTTPException(status_code=422, detail=f"Could not render PDF pages: {e.reason}.")
+                token.check()
                 if not page_images:
                     raise HTTPException(status_code=400, detail="Failed to convert PDF pages to images.")
-                extracted_data = AIService.extract_resume_info_from_images(page_images, api_key)
+                extracted_data = model_router.extract_images(page_images, api_key, page_text=raw_text,
+                                                             before_call=token.commit)
                 message = "Success (Vision AI)"
             else:
                 # Text-based PDF: use text AI
-                extracted_data = AIService.extract_resume_info(raw_text, api_key)
+                extracted_data = model_router.extract_text(raw_text, api_key, before_call=token.commit)
                 message = "Success"
-        except HTTPException:
+        except (HTTPException, Cancelled):
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"AI extraction failed: {str(e)}")
+    return extracted_data, message, fingerprint
+
+def _analyze_job(resume_id: str, file_bytes: bytes, raw_text: str, vision_pages: List[int],
+                 token: CancelToken, local_only: bool = False, tenant: str = "") -> Tuple[ResumeData, str]:
+    """
+    Extraction plus caching, in one threadpool job: if the request is abandoned
+    after the model call was sent, the job still stores its (paid-for) result.
+    """
+    extracted_data, message, fingerprint = _extract_resume(file_bytes, raw_text, vision_pages, token, local_only)
+    if local_only:
+        # Rule-based results are kept briefly for the tenant's own /match calls only:
+        # they are never a cache hit for anyone else, nor indexed for search or reuse
+        try:
+            redis_service.cache_downgraded_resume_data(resume_id, tenant, extracted_data.dict(),
+                                                       settings.TENANT_DOWNGRADED_TTL_SECONDS)
+        except Exception as e:
+            print(f"Caching downgraded resume data failed: {e}")
+    else:
+        _store_resume(resume_id, extracted_data, fingerprint)
+    return extracted_data, message
 
+def _store_resume(resume_id: str, extracted_data: ResumeData, fingerprint: Optional[dict]):
     # Cache the result
     try:
-        redis_service.cache_resume_data(resume_id, extracted_data.model_dump())
+        redis_service.cache_resume_data(resume_id, extracted_data.dict())
     except:
         pass
-        
+    if fingerprint:
+        try:
+            FingerprintService.index(resume_id, fingerprint, redis_service)
+        except Exception as e:
+            print(f"Fingerprint indexing failed: {e}")
+    try:
+        search_service.index_resume(resume_id, extracted_data.dict())
+    except Exception as e:
+        print(f"Search indexing failed: {e}")
+
+async def _run_cancellable(request: Request, token: CancelToken, func, *args):
+    """
+    Run blocking `func` in the threadpool, watching for a client disconnect and the
+    deadline. Abandoned work is cancelled through `token`; committed work may be
+    left to finish in the background (see core/cancellation.py).
+    """
+    task = asyncio.ensure_future(run_in_threadpool(profiled(func), *args))
+    finishing_in_background = False
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=min(_DISCONNECT_POLL_SECONDS, max(token.remaining(), 0.01)))
+        if done:
+            try:
+                return task.result()
+            except Cancelled as e:
+                raise HTTPException(status_code=_cancel_status(e.reason), detail=f"Request cancelled: {e.reason}")
+        if token.expired:
+            if token.cancel("deadline exceeded"):
+                # The model call still holds a thread and quota: so do its lane and tenant slots
+                keep_slots_until_done(task)
+            raise HTTPException(status_code=504, detail="Request deadline exceeded.")
+        if not finishing_in_background and await request.is_disconnected():
+            if not token.cancel("client disconnected"):
+                raise HTTPException(status_code=499, detail="Client closed request.")
+            # Keep the lane slot until the job is done: it is still using capacity
+            finishing_in_background = True
+
+def _cancel_status(reason: str) -> int:
+    return 499 if reason == "client disconnected" else 504
+
+@router.post("/analyze", response_model=ResumeAnalyzeResponse)
+async def analyze_resume(request: Request, file: UploadFile = File(...)):
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
+    token = CancelToken(settings.REQUEST_DEADLINE_SECONDS, finish_committed=settings.FINISH_ABANDONED_MODEL_CALLS)
+    deadline = token.expires_at
+    
+    file_bytes = await file.read()
+    
+    # Calculate md5 hash for unique identifier
+    file_hash = hashlib.md5(file_bytes).hexdigest()
+    resume_id = file_hash
+    
+    # Try fetching from cache. Blocking work runs in the threadpool, inside a lane
+    # (see core/admission.py) so that slow extractions can't starve cache hits.
+    try:
+        async with admission.lane("cache").slot(deadline):
+            cached_json = await run_in_threadpool(profiled(redis_service.get_resume_data_json), resume_id)
+        if cached_json:
+            return _raw_json_response(_cache_hit_body(resume_id, "data", cached_json), request)
+    except Overloaded:
+        raise
+    except Exception as e:
+        print(f"Cache check failed: {e}")
+        pass # Ignore cache failure and proceed
+
+    # Model calls from here on are billed to the client's tenant; over its
+    # budget it gets rule-based extraction only (see services/usage_service.py)
+    tenant = _tenant(request)
+    local_only = await run_in_threadpool(_budget_exhausted, tenant)
+
+    # PDF parsing and text extraction share the text lane; PDFs with image-based
+    # or garbled pages are moved to the (much smaller) vision lane once recognised.
+    needs_vision = False
+    async with tenant_limiter.slot(tenant):
+        with usage_service.metering(tenant):
+            async with admission.lane("text").slot(deadline):
+                raw_text, vision_pages = await _run_cancellable(request, token, _parse_pdf, file_bytes, token)
+                if vision_pages and local_only:
+                    raise _budget_error(tenant)  # scans can't be read without a model
+                needs_vision = bool(vision_pages) and bool(settings.DASHSCOPE_API_KEY)
+                if not needs_vision:
+                    extracted_data, message = await _run_cancellable(
+                        request, token, _analyze_job, resume_id, file_bytes, raw_text, vision_pages, token, local_only,
+                        tenant
+                    )
+            if needs_vision:
+                async with admission.lane("vision").slot(deadline):
+                    extracted_data, message = await _run_cancellable(
+                        request, token, _analyze_job, resume_id, file_bytes, raw_text, vision_pages, token
+                    )
+
     return ResumeAnalyzeResponse(
         resume_id=resume_id,
         data=extracted_data,
         message=message
     )
 
-@router.post("/match", response_model=ResumeMatchResponse)
-async def match_job(request: JobDescriptionRequest):
-    job_desc = request.job_description.strip()
-    resume_id = request.resume_id
-    
-    if not job_desc:
-        raise HTTPException(status_code=400, detail="Job description cannot be empty")
-        
-    job_hash = hashlib.md5(job_desc.encode('utf-8')).hexdigest()
+def _resume_to_score(resume_id: str, tenant: str) -> Tuple[dict, bool]:
+    """
+    The resume data to score against, and whether it is the tenant's own
+    rule-based extraction (then scoring stays rule-based and uncached too).
+    404 if neither is cached.
+    """
+    resume_data = redis_service.get_resume_data(resume_id)
+    if resume_data:
+        return resume_data, False
+    resume_data = redis_service.get_downgraded_resume_data(resume_id, tenant)
+    if not resume_data:
+        raise HTTPException(status_code=404, detail="Resume data not found in cache. Please re-upload.")
+    return resume_data, True
 
-    # Try cache
+def _lookup_match(resume_id: str, job_hash: str, tenant: str) -> Tuple[Optional[bytes], Optional[dict], bool, bool]:
+    """
+    Cached match JSON (and whether this request should refresh it), or the
+    resume data to score (see _resume_to_score).
+    """
     try:
-        cached_result = redis_service.get_match_result(resume_id, job_hash)
-        if cached_result:
-            return ResumeMatchResponse(
-                resume_id=resume_id,
-                match_result=MatchResult(**cached_result),
-                message="Success (Cache Hit)"
-            )
+        cached_json, refresh = redis_service.get_match_entry(resume_id, job_hash)
+        if cached_json:
+            return cached_json, None, refresh, False
         
         # Retrieve resume data to match
-        resume_data = redis_service.get_resume_data(resume_id)
-        if not resume_data:
-            raise HTTPException(status_code=404, detail="Resume data not found in cache. Please re-upload.")
+        resume_data, downgraded = _resume_to_score(resume_id, tenant)
+        return None, resume_data, False, downgraded
     except HTTPException:
         raise
     except Exception as e:
         print(f"Failed cache operations: {e}")
         raise HTTPException(status_code=404, detail="Unable to retrieve resume info (cache unavailable).")
-    
-    api_key = settings.DASHSCOPE_API_KEY
+
+def _local_match(prescore: dict) -> MatchResult:
+    """Rule-based match result from JobDescriptionService.prescore (no API key)."""
+    return MatchResult(
+        score=prescore["score"],
+        skills_match_rate=f"{round(prescore['skill_match_rate'] * 100)}%",
+        experience_relevance="Meets the experience requirement" if prescore["years_ok"] else "Below the required experience",
+        comment=f"Missing skills: {', '.join(prescore['missing_skills'])}" if prescore["missing_skills"] else "This candidate fits well."
+    )
+
+def _score_match(resume_id: str, resume_data: dict, job_desc: str, job_hash: str,
+                 token: CancelToken, local_only: bool = False) -> Tuple[MatchResult, str]:
+    """Score and cache a match; `local_only` (tenant over budget) scores by rules, uncached."""
+    api_key = "" if local_only else settings.DASHSCOPE_API_KEY
+    # Parsed once per JD and cached; scoring sees the compact profile, not the JD text
+    token.check()
+    job_profile = JobDescriptionService.get_profile(job_desc, job_hash, redis_service, api_key,
+                                                    cache_rule_based=not local_only)
+    prescore = JobDescriptionService.prescore(job_profile, resume_data)
+    if local_only:
+        return _local_match(prescore), "Success (Local Match, token budget exceeded)"
     if not api_key:
-        # Dummy Match
-        match_res = MatchResult(
-            score=85,
-            skills_match_rate="85%",
-            experience_relevance="Highly relevant",
-            comment="This candidate fits well."
-        )
+        match_res = _local_match(prescore)
         message = "Success (Mock Match)"
+        compute_seconds = None
     else:
+        token.commit()
+        started = time.monotonic()
         try:
-            match_res = AIService.score_resume(resume_data, job_desc, api_key)
+            match_res = AIService.score_resume(resume_data, job_profile, api_key, prescore=prescore)
             message = "Success"
         except Exception as e:
              raise HTTPException(status_code=500, detail=f"AI matching failed: {str(e)}")
-             
+        compute_seconds = time.monotonic() - started
+
     # Cache result
     try:
-        redis_service.cache_match_result(resume_id, job_hash, match_res.model_dump())
+        redis_service.cache_match_result(resume_id, job_hash, match_res.dict(),
+                                         compute_seconds=compute_seconds)
     except:
         pass
+    try:
+        leaderboard_service.record(job_hash, resume_id, match_res.score)
+    except Exception as e:
+        print(f"Leaderboard update failed: {e}")
+    return match_res, message
+
+def _record_cached_scores(resume_id: str, scores: Dict[str, Union[bytes, float]]):
+    """
+    Put cache hits on their JDs' leaderboards (job hash -> score, or the cached
+    match JSON): a board started under a new prompt version would otherwise
+    only list the candidates scored since. Runs after the response is sent.
+    """
+    try:
+        leaderboard_service.record_many(resume_id, {
+            job_hash: loads(score)["score"] if isinstance(score, bytes) else score
+            for job_hash, score in scores.items()
+        })
+    except Exception as e:
+        print(f"Leaderboard update failed: {e}")
+
+def _refresh_match(resume_id: str, job_desc: str, job_hash: str, tenant: str):
+    """
+    Re-score a stale cached match; readers get the old entry until it lands.
+    Billed to the tenant whose read triggered it, and skipped if it is over budget.
+    """
+    try:
+        resume_data = redis_service.get_resume_data(resume_id)
+        if resume_data and not usage_service.over_budget(tenant):
+            with usage_service.metering(tenant):
+                _score_match(resume_id, resume_data, job_desc, job_hash, CancelToken(settings.REQUEST_DEADLINE_SECONDS))
+    except Exception as e:
+        print(f"Background refresh of match {resume_id}/{job_hash} failed: {e}")
+
+@router.post("/match", response_model=ResumeMatchResponse)
+async def match_job(request: JobDescriptionRequest, http_request: Request):
+    job_desc = request.job_description.strip()
+    resume_id = request.resume_id
+    
+    if not job_desc:
+        raise HTTPException(status_code=400, detail="Job description cannot be empty")
+    token = CancelToken(settings.REQUEST_DEADLINE_SECONDS, finish_committed=settings.FINISH_ABANDONED_MODEL_CALLS)
+    deadline = token.expires_at
         
+    # Whitespace, case and full-width variants of the same JD share one hash
+    job_hash = JobDescriptionService.job_hash(job_desc)
+
+    tenant = _tenant(http_request)
+
+    # Try cache
+    async with admission.lane("cache").slot(deadline):
+        cached_json, resume_data, refresh, downgraded = await run_in_threadpool(
+            profiled(_lookup_match), resume_id, job_hash, tenant
+        )
+    if cached_json:
+        # A stale entry is served as is; this request also re-scores it once the response is out
+        background = BackgroundTasks()
+        background.add_task(_record_cached_scores, resume_id, {job_hash: cached_json})
+        if refresh:
+            background.add_task(_refresh_match, resume_id, job_desc, job_hash, tenant)
+        return _raw_json_response(_cache_hit_body(resume_id, "match_result", cached_json, job_hash), http_request, background)
+
+    local_only = downgraded or await run_in_threadpool(_budget_exhausted, tenant)
+    async with tenant_limiter.slot(tenant):
+        with usage_service.metering(tenant):
+            async with admission.lane("text").slot(deadline):
+                match_res, message = await _run_cancellable(
+                    http_request, token, _score_match, resume_id, resume_data, job_desc, job_hash, token, local_only
+                )
+
     return ResumeMatchResponse(
         resume_id=resume_id,
+        job_hash=job_hash,
         match_result=match_res,
         message=message
     )
+
+def _lookup_matches(resume_id: str, job_hashes: List[str],
+                    tenant: str) -> Tuple[Dict[str, bytes], Optional[dict], bool]:
+    """
+    Cached matches by job hash (one pipeline), plus the resume data if any are
+    missing (see _resume_to_score).
+    """
+    try:
+        cached = redis_service.get_match_results_json_many(resume_id, job_hashes)
+        resume_data, downgraded = None, False
+        if len(cached) < len(job_hashes):
+            resume_data, downgraded = _resume_to_score(resume_id, tenant)
+        return cached, resume_data, downgraded
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Failed cache operations: {e}")
+        raise HTTPException(status_code=404, detail="Unable to retrieve resume info (cache unavailable).")
+
+def _score_matches(resume_id: str, resume_data: dict, jobs: Dict[str, str], token: CancelToken,
+                   local_only: bool = False) -> Tuple[Dict[str, MatchResult], str]:
+    """
+    Score one resume against several JDs (job hash -> JD text), up to
+    MATCH_JOBS_BATCH_SIZE per model call. Each batch is cached as soon as it is
+    scored; a JD the model left out of a batch answer is scored on its own.
+    `local_only` (tenant over budget) scores by rules and caches nothing.
+    """
+    api_key = "" if local_only else settings.DASHSCOPE_API_KEY
+    profiles: Dict[str, dict] = {}
+    prescores: Dict[str, dict] = {}
+    for job_hash, job_desc in jobs.items():
+        token.check()
+        profiles[job_hash] = JobDescriptionService.get_profile(job_desc, job_hash, redis_service, api_key,
+                                                               cache_rule_based=not local_only)
+        prescores[job_hash] = JobDescriptionService.prescore(profiles[job_hash], resume_data)
+    if local_only:
+        return ({job_hash: _local_match(prescore) for job_hash, prescore in prescores.items()},
+                "Success (Local Match, token budget exceeded)")
+
+    results: Dict[str, MatchResult] = {}
+    hashes = list(jobs)
+    batch_size = max(1, settings.MATCH_JOBS_BATCH_SIZE) if api_key else len(hashes)
+    for start in range(0, len(hashes), batch_size):
+        batch = hashes[start:start + batch_size]
+        if not api_key:
+            results.update({job_hash: _local_match(prescores[job_hash]) for job_hash in batch})
+        else:
+            token.commit()
+            try:
+                if len(batch) == 1:
+                    scored = [AIService.score_resume(resume_data, profiles[batch[0]], api_key, prescore=prescores[batch[0]])]
+                else:
+                    scored = AIService.score_resume_many(
+                        resume_data, [profiles[h] for h in batch], api_key, prescores=[prescores[h] for h in batch]
+                    )
+                for job_hash, match_res in zip(batch, scored):
+                    if match_res is None:
+                        match_res = AIService.score_resume(resume_data, profiles[job_hash], api_key,
+                                                           prescore=prescores[job_hash])
+                    results[job_hash] = match_res
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"AI matching failed: {str(e)}")
+        try:
+            redis_service.cache_match_results_many(resume_id, {h: results[h].dict() for h in batch})
+        except Exception:
+            pass
+        try:
+            leaderboard_service.record_many(resume_id, {h: results[h].score for h in batch})
+        except Exception as e:
+            print(f"Leaderboard update failed: {e}")
+    return results, "Success" if api_key else "Success (Mock Match)"
+
+@router.post("/{resume_id}/match-jobs", response_model=JobMatchesResponse)
+async def match_jobs(resume_id: str, request: JobMatchesRequest, http_request: Request,
+                     background_tasks: BackgroundTasks):
+    """
+    Score one resume against many job descriptions, best match first. The
+    resume is loaded once, all JDs are looked up in one cache round trip, and
+    only the misses are scored, several JDs per model call.
+    """
+    job_descs = [job_desc.strip() for job_desc in request.job_descriptions]
+    if not job_descs or not all(job_descs):
+        raise HTTPException(status_code=400, detail="Job descriptions cannot be empty")
+    if len(job_descs) > settings.MATCH_JOBS_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MATCH_JOBS_MAX} job descriptions per request")
+    token = CancelToken(settings.REQUEST_DEADLINE_SECONDS, finish_committed=settings.FINISH_ABANDONED_MODEL_CALLS)
+    deadline = token.expires_at
+
+    job_hashes = [JobDescriptionService.job_hash(job_desc) for job_desc in job_descs]
+    # Copies of the same JD (after normalization) are scored once
+    jobs = dict(zip(job_hashes, job_descs))
+    tenant = _tenant(http_request)
+    async with admission.lane("cache").slot(deadline):
+        cached, resume_data, downgraded = await run_in_threadpool(
+            profiled(_lookup_matches), resume_id, list(jobs), tenant
+        )
+
+    results = {job_hash: MatchResult(**loads(json_bytes)) for job_hash, json_bytes in cached.items()}
+    if results:
+        background_tasks.add_task(_record_cached_scores, resume_id,
+                                  {job_hash: result.score for job_hash, result in results.items()})
+    message = "Success (Cache Hit)"
+    misses = {job_hash: job_desc for job_hash, job_desc in jobs.items() if job_hash not in cached}
+    if misses:
+        local_only = downgraded or await run_in_threadpool(_budget_exhausted, tenant)
+        async with tenant_limiter.slot(tenant):
+            with usage_service.metering(tenant):
+                async with admission.lane("text").slot(deadline):
+                    scored, message = await _run_cancellable(
+                        http_request, token, _score_matches, resume_id, resume_data, misses, token, local_only
+                    )
+        results.update(scored)
+
+    matches = [
+        JobMatch(index=index, job_hash=job_hash, match_result=results[job_hash], cached=job_hash in cached)
+        for index, job_hash in enumerate(job_hashes)
+    ]
+    matches.sort(key=lambda match: (-match.match_result.score, match.index))
+    return JobMatchesResponse(resume_id=resume_id, matches=matches, message=message)
+
+@router.get("/cache/stats")
+def cache_stats():
+    """Average stored bytes per entry and compression ratio, per keyspace."""
+    return redis_service.get_cache_stats()
+
+@router.get("/leaderboard/{job_hash}", response_model=LeaderboardResponse)
+def job_leaderboard(
+    job_hash: str,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+):
+    """
+    Candidates scored against a JD (by the job_hash of /match-jobs), best first.
+    Read from the JD's leaderboard in one round trip; no match is re-read or re-scored.
+    """
+    result = leaderboard_service.top(job_hash, page=page, page_size=page_size)
+    return LeaderboardResponse(
+        job_hash=job_hash,
+        total=result["total"],
+        page=page,
+        page_size=page_size,
+        results=result["results"]
+    )
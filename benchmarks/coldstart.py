@@ -0,0 +1,126 @@
+"""
+Cold-start measurement for the API process.
+
+Reports
+  * `python -X importtime -c "import main"`: total import time and the slowest
+    top-level packages, and
+  * time-to-first-response: wall time from spawning uvicorn until `/healthz`
+    (or `/` on older trees) first answers 200.
+
+Usage:
+    python -m benchmarks.coldstart --runs 5 --output coldstart.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """Map module name -> cumulative import time in microseconds."""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative[parts[2].strip()] = int(parts[1].strip())
+        except (ValueError, IndexError):
+            continue
+    return cumulative
+
+
+def measure_import(runs: int) -> dict:
+    totals: List[float] = []
+    top_level: Dict[str, List[int]] = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        cumulative = _parse_importtime(result.stderr)
+        totals.append(cumulative.get("main", 0) / 1000)
+        for module, us in cumulative.items():
+            if "." not in module:
+                top_level.setdefault(module, []).append(us)
+    slowest = sorted(
+        ((module, statistics.median(samples) / 1000) for module, samples in top_level.items()),
+        key=lambda item: item[1], reverse=True
+    )[:10]
+    return {
+        "import_main_ms_median": round(statistics.median(totals), 1),
+        "import_main_ms_all": [round(t, 1) for t in totals],
+        "slowest_top_level_ms": {module: round(ms, 1) for module, ms in slowest},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _first_ok(port: int, paths: List[str], deadline: float) -> str:
+    while time.perf_counter() < deadline:
+        for path in paths:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                    if response.status == 200:
+                        return path
+            except Exception:
+                pass
+        time.sleep(0.01)
+    return ""
+
+
+def measure_first_response(runs: int, timeout: float) -> dict:
+    samples = []
+    probe = ""
+    for _ in range(runs):
+        port = _free_port()
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            probe = _first_ok(port, ["/healthz", "/"], start + timeout)
+            if probe:
+                samples.append((time.perf_counter() - start) * 1000)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return {
+        "probe_path": probe,
+        "first_response_ms_median": round(statistics.median(samples), 1) if samples else None,
+        "first_response_ms_all": [round(s, 1) for s in samples],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure API cold-start cost.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the first response")
+    parser.add_argument("--output", default="", help="Optional JSON output path")
+    args = parser.parse_args(argv)
+
+    report = {
+        "import": measure_import(args.runs),
+        "first_response": measure_first_response(args.runs, args.timeout),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Local stand-in for the DashScope SDK used by the benchmark suite.
+
+`install(latency)` patches `Generation.call` and `MultiModalConversation.call`
+so that every model call sleeps for `latency` seconds and returns a canned,
+well-formed JSON answer. Nothing leaves the machine and no API key is spent.
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import dashscope
+
+_RESUME_JSON = json.dumps({
+    "basic_info": {
+        "name": "Zhang Wei",
+        "phone": "13812345678",
+        "email": "zhangwei@example.com",
+        "address": "Beijing"
+    },
+    "job_intention": "Senior Python Backend Engineer",
+    "work_years": "5年",
+    "education_background": "Bachelor of Computer Science",
+    "raw_text_summary": "Python, FastAPI, Django, PostgreSQL, Redis, Docker"
+}, ensure_ascii=False)
+
+_MATCH_JSON = json.dumps({
+    "score": 82,
+    "skills_match_rate": "80%",
+    "experience_relevance": "Relevant backend experience",
+    "comment": "Good fit."
+}, ensure_ascii=False)
+
+_JOB_PROFILE_JSON = json.dumps({
+    "title": "Senior Python Engineer",
+    "skills": ["python", "fastapi", "redis"],
+    "min_years": 3,
+    "degree": "本科",
+    "summary": "Build and operate backend services."
+}, ensure_ascii=False)
+
+
+class StubStats:
+    """Counts the calls made against the stub so benchmarks can report them."""
+    text_calls = 0
+    vision_calls = 0
+
+    @classmethod
+    def reset(cls):
+        cls.text_calls = 0
+        cls.vision_calls = 0
+
+
+def _response(content, input_tokens: int, output_tokens: int, image_tokens: int = 0):
+    usage = {"input_tokens": input_tokens, "output_tokens": output_tokens}
+    if image_tokens:
+        usage["image_tokens"] = image_tokens
+    return SimpleNamespace(
+        status_code=200,
+        code="",
+        message="",
+        output=SimpleNamespace(choices=[{"message": {"content": content}}]),
+        usage=usage,
+    )
+
+
+def install(latency: float = 0.0):
+    """Patch the DashScope SDK in-place. Returns a callable that restores it."""
+    original_generation = dashscope.Generation.call
+    original_multimodal = dashscope.MultiModalConversation.call
+
+    def generation_call(*args, **kwargs):
+        StubStats.text_calls += 1
+        if latency:
+            time.sleep(latency)
+        messages = kwargs.get("messages") or []
+        prompt = json.dumps(messages, ensure_ascii=False)
+        if '"score"' in prompt:
+            content = _MATCH_JSON
+        elif '"min_years"' in prompt:
+            content = _JOB_PROFILE_JSON
+        else:
+            content = _RESUME_JSON
+        return _response(content, input_tokens=len(prompt) // 2, output_tokens=len(content) // 2)
+
+    def multimodal_call(*args, **kwargs):
+        StubStats.vision_calls += 1
+        if latency:
+            time.sleep(latency)
+        messages = kwargs.get("messages") or []
+        images = sum(
+            1 for m in messages for part in (m.get("content") or [])
+            if isinstance(part, dict) and "image" in part
+        )
+        return _response(
+            [{"text": _RESUME_JSON}],
+            input_tokens=200, output_tokens=len(_RESUME_JSON) // 2, image_tokens=images * 1000
+        )
+
+    dashscope.Generation.call = generation_call
+    dashscope.MultiModalConversation.call = multimodal_call
+
+    def restore():
+        dashscope.Generation.call = original_generation
+        dashscope.MultiModalConversation.call = original_multimodal
+
+    return restore
@@ -0,0 +1,530 @@
+"""
+Reproducible performance baseline for the analyze/match pipeline.
+
+Everything runs locally: PDFs are generated with tests/generate_test_pdf.py,
+DashScope is replaced by benchmarks/dashscope_stub.py (fixed, configurable
+latency) and Redis by fakeredis when it is installed (`pip install fakeredis`),
+otherwise by RedisService's in-memory fallback.
+
+Usage:
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --quick --model-latency 0.05
+    python -m benchmarks.run_benchmarks --compare old.json new.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.generate_test_pdf import (
+    generate_multipage_resume_pdf,
+    generate_scanned_resume_pdf,
+    generate_mixed_resume_pdf,
+)
+
+FULL_PAGE_COUNTS = [1, 5, 20, 50]
+QUICK_PAGE_COUNTS = [1, 5]
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _latency_summary(samples_s: List[float]) -> Dict[str, float]:
+    """Summarize a list of latencies (seconds) in milliseconds."""
+    ms = [s * 1000 for s in samples_s]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.mean(ms), 3) if ms else 0.0,
+        "p50_ms": round(_percentile(ms, 50), 3),
+        "p99_ms": round(_percentile(ms, 99), 3),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def build_corpus(workdir: str, page_counts: List[int]) -> Dict[str, bytes]:
+    """Generate text, scanned and mixed PDFs for each page count."""
+    corpus = {}
+    builders = {
+        "text": generate_multipage_resume_pdf,
+        "scanned": generate_scanned_resume_pdf,
+        "mixed": generate_mixed_resume_pdf,
+    }
+    for kind, build in builders.items():
+        for pages in page_counts:
+            if kind == "mixed" and pages < 2:
+                continue
+            path = os.path.join(workdir, f"{kind}_{pages}.pdf")
+            build(path, pages)
+            with open(path, "rb") as f:
+                corpus[f"{kind}_{pages}"] = f.read()
+    return corpus
+
+
+def bench_pdf_throughput(corpus: Dict[str, bytes], repeat: int) -> Dict[str, dict]:
+    """Time PDFService.extract_text per document."""
+    from services.pdf_service import PDFService
+
+    results = {}
+    for name, pdf_bytes in corpus.items():
+        pages = int(name.rsplit("_", 1)[1])
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            PDFService.extract_text(pdf_bytes)
+            samples.append(time.perf_counter() - start)
+        summary = _latency_summary(samples)
+        mean_s = statistics.mean(samples)
+        summary["docs_per_s"] = round(1 / mean_s, 2) if mean_s else 0.0
+        summary["pages_per_s"] = round(pages / mean_s, 2) if mean_s else 0.0
+        results[name] = summary
+    return results
+
+
+def bench_rasterization(corpus: Dict[str, bytes], dpi: int) -> Dict[str, dict]:
+    """Measure time, peak Python-heap allocation and payload size of page rasterization."""
+    from services.pdf_service import PDFService
+
+    results = {}
+    for name, pdf_bytes in corpus.items():
+        if not name.startswith(("scanned", "mixed")):
+            continue
+        tracemalloc.start()
+        start = time.perf_counter()
+        images = PDFService.pdf_pages_to_base64_images(pdf_bytes, dpi=dpi)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = {
+            "pages": len(images),
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "peak_alloc_mb": round(peak / (1024 * 1024), 3),
+            "payload_bytes": sum(len(img) for img in images),
+        }
+    return results
+
+
+def bench_vision_payload(corpus: Dict[str, bytes], dpi: int) -> Dict[str, dict]:
+    """
+    What the vision model would receive per document, raw page renders versus
+    PageImagePreprocessor output: images, payload bytes, estimated image tokens.
+    Only the images actually sent (AIService.MAX_VISION_IMAGES) are counted.
+    """
+    import base64
+    import fitz  # PyMuPDF
+    from services.ai_service import AIService
+    from services.image_preprocessor import PageImagePreprocessor, estimate_vision_tokens
+    from services.pdf_service import PDFService
+
+    variants = {"raw": None, "preprocessed": PageImagePreprocessor()}
+    results = {}
+    for name, pdf_bytes in corpus.items():
+        if not name.startswith(("scanned", "mixed")):
+            continue
+        results[name] = {}
+        for variant, preprocessor in variants.items():
+            start = time.perf_counter()
+            images = PDFService.pdf_pages_to_base64_images(
+                pdf_bytes, dpi=dpi, preprocessor=preprocessor, max_images=AIService.MAX_VISION_IMAGES
+            )
+            elapsed = time.perf_counter() - start
+            payload = tokens = 0
+            for img_b64 in images:
+                pix = fitz.Pixmap(base64.b64decode(img_b64))
+                payload += len(img_b64)
+                tokens += estimate_vision_tokens(pix.width, pix.height)
+            results[name][variant] = {
+                "images": len(images),
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "payload_bytes": payload,
+                "payload_bytes_per_image": round(payload / len(images)) if images else 0,
+                "vision_tokens": tokens,
+            }
+    return results
+
+
+def bench_parallel_parsing(corpus: Dict[str, bytes], repeat: int) -> dict:
+    """
+    Page routing (text extraction + quality scoring) of each text/mixed document
+    in one parse worker versus split into page ranges across all workers
+    (PDFService.route_pages_parallel). Speedup is bounded by the CPUs available.
+    """
+    from core.parse_pool import ParsePool
+    from core.process import available_cpu_count
+    from services.pdf_service import PDFService
+
+    workers = max(2, available_cpu_count())
+    pool = ParsePool(workers=workers, timeout_seconds=120, initializer=PDFService.warmup)
+    pool.start()
+    results = {"workers": workers, "cpus": available_cpu_count(), "documents": {}}
+    try:
+        for name, pdf_bytes in corpus.items():
+            if not name.startswith(("text", "mixed")):
+                continue
+            pool.run(PDFService.page_count, pdf_bytes)  # let every worker finish starting up
+            single, sharded = [], []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                PDFService.route_pages_parallel(pdf_bytes, 0.5, pool, min_pages=1, shards=1)
+                single.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                PDFService.route_pages_parallel(pdf_bytes, 0.5, pool, min_pages=1, shards=workers)
+                sharded.append(time.perf_counter() - start)
+            single_s, sharded_s = statistics.mean(single), statistics.mean(sharded)
+            results["documents"][name] = {
+                "pages": int(name.rsplit("_", 1)[1]),
+                "single_ms": round(single_s * 1000, 3),
+                "sharded_ms": round(sharded_s * 1000, 3),
+                "speedup": round(single_s / sharded_s, 2) if sharded_s else 0.0,
+            }
+    finally:
+        pool.close()
+    return results
+
+
+def _make_redis_service():
+    """RedisService backed by fakeredis if available, otherwise the in-memory fallback."""
+    from services.redis_service import RedisService
+
+    service = RedisService.__new__(RedisService)
+    service.memory_cache = {}
+    service.client = None
+    backend = "memory"
+    try:
+        import fakeredis
+        service.client = fakeredis.FakeRedis(decode_responses=False)
+        backend = "fakeredis"
+    except ImportError:
+        pass
+    return service, backend
+
+
+def bench_cache(iterations: int) -> dict:
+    """Latency of RedisService cache hits and misses, and stored bytes per entry."""
+    from services.cache_codec import CacheCodec
+
+    service, backend = _make_redis_service()
+    service.codec = CacheCodec()
+    resume = {
+        "basic_info": {"name": "Zhang Wei", "phone": "13812345678", "email": "a@b.c", "address": "Beijing"},
+        "job_intention": "Backend Engineer", "work_years": "5年",
+        "education_background": "Bachelor", "raw_text_summary": "Python, Redis " * 10
+    }
+    service.cache_resume_data("bench", resume)
+    service.cache_match_result("bench", "jd", {"score": 80, "skills_match_rate": "80%",
+                                               "experience_relevance": "High", "comment": "ok"})
+    hits, match_hits, misses = [], [], []
+    for i in range(iterations):
+        start = time.perf_counter()
+        service.get_resume_data("bench")
+        hits.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        service.get_match_result("bench", "jd")
+        match_hits.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        service.get_resume_data(f"missing-{i}")
+        misses.append(time.perf_counter() - start)
+    return {
+        "backend": backend,
+        "resume_hit": _latency_summary(hits),
+        "match_hit": _latency_summary(match_hits),
+        "miss": _latency_summary(misses),
+        "stored_bytes": service.get_cache_stats()["keyspaces"],
+    }
+
+
+def bench_search(documents: int, queries: int, redis_url: Optional[str] = None) -> dict:
+    """
+    Query latency of the candidate index over `documents` synthetic resumes, for
+    the in-memory index and the Redis one (ZINTERSTORE + range read + MGET):
+    against `redis_url` if given, else fakeredis. fakeredis runs the commands in
+    Python and has no network hop, so its numbers say little about a real server.
+    """
+    import random
+    from services.search_service import SearchService
+
+    rng = random.Random(7)
+    skills = ["Python", "Java", "Go", "React", "Vue", "MySQL", "Redis", "Kafka", "Spark",
+              "Docker", "Kubernetes", "AWS", "TensorFlow", "PyTorch", "Django", "Spring"]
+    cities = ["Beijing", "Shanghai", "Shenzhen", "Hangzhou", "Chengdu", "Guangzhou", "Wuhan", "Nanjing"]
+    roles = ["Backend Engineer", "Frontend Engineer", "Data Engineer", "Product Manager", "QA Engineer"]
+    resumes = [{
+        "basic_info": {"name": f"Candidate {i}", "address": rng.choice(cities)},
+        "job_intention": rng.choice(roles),
+        "work_years": f"{rng.randint(0, 15)} years",
+        "education_background": rng.choice(["Bachelor", "Master", "PhD"]),
+        "raw_text_summary": ", ".join(rng.sample(skills, 4)),
+    } for i in range(documents)]
+    cases = {
+        "three_terms": "Python, 5 years, Beijing",
+        "single_common_term": "Engineer",
+        "two_terms": "Kafka Hangzhou",
+    }
+
+    service, backend = _make_redis_service()
+    if redis_url:
+        import redis
+        service.client, backend = redis.Redis.from_url(redis_url, decode_responses=False), "redis"
+    backends = {"memory": None}
+    if service.client is not None:
+        backends[backend] = service.client
+    results = {"documents": documents}
+    for name, client in backends.items():
+        service.client = client
+        search = SearchService(service, max_memory_documents=documents)
+        start = time.perf_counter()
+        for i, data in enumerate(resumes):
+            search.index_resume(f"bench-r{i}", data)
+        backend_results = {"index_build_s": round(time.perf_counter() - start, 2)}
+        for case, query in cases.items():
+            samples = []
+            for _ in range(queries):
+                start = time.perf_counter()
+                search.search(query, page=1, page_size=20)
+                samples.append(time.perf_counter() - start)
+            backend_results[case] = _latency_summary(samples)
+        results[name] = backend_results
+    return results
+
+
+async def _drive(client, concurrency: int, requests: List[dict]) -> dict:
+    """Fire `requests` through `client` with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses: Dict[str, int] = {}
+
+    async def one(spec):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(**spec)
+            latencies.append(time.perf_counter() - start)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(spec) for spec in requests))
+    wall = time.perf_counter() - start
+    summary = _latency_summary(latencies)
+    summary["rps"] = round(len(requests) / wall, 2) if wall else 0.0
+    summary["status"] = statuses
+    return summary
+
+
+def _unique_pdf(pdf_bytes: bytes, n: int) -> bytes:
+    # Trailing bytes after %%EOF are ignored by readers but change the MD5 resume_id.
+    return pdf_bytes + f"\n%bench-{n}\n".encode()
+
+
+async def _bench_endpoints(corpus: Dict[str, bytes], concurrency: int, requests_per_case: int) -> dict:
+    import httpx
+    import api.resume as resume_api
+    from core.config import settings
+    from main import app
+
+    service, backend = _make_redis_service()
+    resume_api.redis_service = service
+    transport = httpx.ASGITransport(app=app)
+    results = {"cache_backend": backend}
+    text_pdf = corpus.get("text_1")
+    scanned_pdf = corpus.get("scanned_1")
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        def upload(pdf_bytes):
+            return {"method": "POST", "url": "/api/resume/analyze",
+                    "files": {"file": ("resume.pdf", io.BytesIO(pdf_bytes), "application/pdf")}}
+
+        # The miss uploads differ only after %%EOF, so their text is the same: with
+        # near-duplicate detection on, all but the first would reuse its result.
+        threshold = settings.NEAR_DUPLICATE_THRESHOLD
+        settings.NEAR_DUPLICATE_THRESHOLD = 0
+        try:
+            results["analyze_text_miss"] = await _drive(client, concurrency, [
+                upload(_unique_pdf(text_pdf, i)) for i in range(requests_per_case)
+            ])
+        finally:
+            settings.NEAR_DUPLICATE_THRESHOLD = threshold
+        if threshold > 0:
+            # New file hash, same text: served from the fingerprint index of the first upload
+            await client.post("/api/resume/analyze", files=upload(_unique_pdf(text_pdf, 20_000))["files"])
+            results["analyze_text_near_duplicate"] = await _drive(client, concurrency, [
+                upload(_unique_pdf(text_pdf, 20_001 + i)) for i in range(requests_per_case)
+            ])
+        results["analyze_scanned_miss"] = await _drive(client, concurrency, [
+            upload(_unique_pdf(scanned_pdf, 10_000 + i)) for i in range(requests_per_case)
+        ])
+
+        # Seed the cache directly so the hit path is measured even if writing back failed.
+        warm = await client.post("/api/resume/analyze", files=upload(text_pdf)["files"])
+        resume_id = warm.json()["resume_id"]
+        if not service.get_resume_data(resume_id):
+            service.cache_resume_data(resume_id, warm.json()["data"])
+        results["analyze_hit"] = await _drive(client, concurrency, [
+            upload(text_pdf) for _ in range(requests_per_case)
+        ])
+
+        def match(jd):
+            return {"method": "POST", "url": "/api/resume/match",
+                    "json": {"resume_id": resume_id, "job_description": jd}}
+
+        results["match_miss"] = await _drive(client, concurrency, [
+            match(f"Senior Python engineer, FastAPI and Redis, req #{i}") for i in range(requests_per_case)
+        ])
+        hot_jd = "Senior Python engineer, FastAPI and Redis"
+        warm = await client.request(**match(hot_jd))
+        if warm.status_code == 200 and not service.get_match_result(resume_id, _job_hash(hot_jd)):
+            service.cache_match_result(resume_id, _job_hash(hot_jd), warm.json()["match_result"])
+        results["match_hit"] = await _drive(client, concurrency, [
+            match(hot_jd) for _ in range(requests_per_case)
+        ])
+    return results
+
+
+def _job_hash(job_description: str) -> str:
+    from services.jd_service import JobDescriptionService
+    return JobDescriptionService.job_hash(job_description)
+
+
+def bench_endpoints(corpus: Dict[str, bytes], concurrency: int, requests_per_case: int, model_latency: float) -> dict:
+    """End-to-end /analyze and /match RPS and latency with a stubbed model."""
+    from benchmarks import dashscope_stub
+    from core.config import settings
+
+    restore = dashscope_stub.install(latency=model_latency)
+    original_key = settings.DASHSCOPE_API_KEY
+    settings.DASHSCOPE_API_KEY = "benchmark-stub-key"
+    dashscope_stub.StubStats.reset()
+    try:
+        results = asyncio.run(_bench_endpoints(corpus, concurrency, requests_per_case))
+    finally:
+        settings.DASHSCOPE_API_KEY = original_key
+        restore()
+    results["model_calls"] = {
+        "text": dashscope_stub.StubStats.text_calls,
+        "vision": dashscope_stub.StubStats.vision_calls,
+    }
+    return results
+
+
+def run(args) -> dict:
+    page_counts = QUICK_PAGE_COUNTS if args.quick else FULL_PAGE_COUNTS
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"Generating corpus for page counts {page_counts}...")
+        corpus = build_corpus(workdir, page_counts)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "quick": args.quick,
+                "page_counts": page_counts,
+                "repeat": args.repeat,
+                "concurrency": args.concurrency,
+                "requests": args.requests,
+                "model_latency_s": args.model_latency,
+                "dpi": args.dpi,
+            },
+        },
+    }
+    print("Benchmarking PDFService throughput...")
+    report["pdf_throughput"] = bench_pdf_throughput(corpus, args.repeat)
+    print("Benchmarking rasterization...")
+    report["rasterization"] = bench_rasterization(corpus, args.dpi)
+    print("Benchmarking vision payload preprocessing...")
+    report["vision_payload"] = bench_vision_payload(corpus, args.dpi)
+    print("Benchmarking parallel page parsing...")
+    report["parallel_parsing"] = bench_parallel_parsing(corpus, args.repeat)
+    print("Benchmarking cache latency...")
+    report["cache"] = bench_cache(args.cache_iterations)
+    print("Benchmarking candidate search...")
+    report["search"] = bench_search(args.search_documents, 50, args.search_redis_url)
+    print("Benchmarking /analyze and /match end to end...")
+    report["endpoints"] = bench_endpoints(corpus, args.concurrency, args.requests, args.model_latency)
+    return report
+
+
+def _flatten(data, prefix="") -> Dict[str, float]:
+    flat = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            flat.update(_flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix] = data
+    return flat
+
+
+def compare(old_path: str, new_path: str):
+    """Print every numeric metric that exists in both reports with its relative change."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    old_flat = _flatten({k: v for k, v in old.items() if k != "meta"})
+    new_flat = _flatten({k: v for k, v in new.items() if k != "meta"})
+    print(f"{'metric':<60} {old.get('meta', {}).get('commit', 'old'):>12} "
+          f"{new.get('meta', {}).get('commit', 'new'):>12} {'change':>9}")
+    for key in sorted(old_flat.keys() & new_flat.keys()):
+        before, after = old_flat[key], new_flat[key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"{key:<60} {before:>12} {after:>12} {change:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the resume analyze/match pipeline.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON report")
+    parser.add_argument("--quick", action="store_true", help="Small corpus (1 and 5 pages) for fast runs")
+    parser.add_argument("--repeat", type=int, default=3, help="Extraction repetitions per document")
+    parser.add_argument("--concurrency", type=int, default=8, help="In-flight HTTP requests")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per endpoint scenario")
+    parser.add_argument("--cache-iterations", type=int, default=2000, help="Cache lookups to time")
+    parser.add_argument("--search-documents", type=int, default=100_000, help="Resumes in the search benchmark index")
+    parser.add_argument("--search-redis-url", help="Redis to benchmark the search index on (default: fakeredis); "
+                                                   "its search:* keys are overwritten")
+    parser.add_argument("--model-latency", type=float, default=0.2, help="Stub DashScope latency in seconds")
+    parser.add_argument("--dpi", type=int, default=200, help="Rasterization DPI")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two reports and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Benchmark report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+#!/bin/bash
+# Build the prebuilt dependency layer for Aliyun FC.
+#
+# FC extracts a layer zip under /opt, so packages are installed into python/
+# at the root of the archive and end up on /opt/python (picked up by bootstrap
+# and the PYTHONPATH in s.yaml). Build on Linux x86_64 with the same Python
+# minor version as the runtime so compiled wheels (PyMuPDF, pydantic) match.
+#
+# Usage: ./build_layer.sh            -> layer.zip
+#        s cli fc3 layer publish --layer-name resume-analyzer-deps --code layer.zip \
+#            --compatible-runtime custom.debian10 --region cn-hangzhou
+set -e
+
+BUILD_DIR=$(mktemp -d)
+pip install -r requirements.txt -t "$BUILD_DIR/python" \
+    --platform manylinux2014_x86_64 --only-binary=:all: --implementation cp
+# Byte-compile up front so the first import does not write .pyc files
+python -m compileall -q "$BUILD_DIR/python" || true
+
+rm -f layer.zip
+(cd "$BUILD_DIR" && zip -qr9 "$OLDPWD/layer.zip" python)
+rm -rf "$BUILD_DIR"
+echo "Layer written to layer.zip"
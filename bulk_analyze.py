@@ -0,0 +1,303 @@
+"""
+Offline bulk analysis: every PDF in a directory or archive -> ResumeData JSONL.
+
+    python bulk_analyze.py /data/resumes -o results.jsonl
+    python bulk_analyze.py archive.zip -o results.jsonl --model-concurrency 16 --redis
+
+For backfills (re-analyzing an archive after a prompt change) without going
+through the HTTP API one file at a time. Files stream through a pipeline:
+  * parsing and rasterization run in a ParsePool (isolated worker processes,
+    with the same time/memory limits as the API)
+  * at most --model-concurrency DashScope calls are in flight; failed calls are
+    retried with backoff (throttling included), so the model quota is the limit
+  * one JSON line per file is appended to the output as soon as it is done:
+    {"source", "resume_id", "route", "data"} or {"source", "resume_id", "error"}
+  * the output is the checkpoint: a rerun skips every source already in it
+    (and a partly written last line), so a crashed run is resumed by starting
+    it again. --retry-errors also reprocesses failed files; readers should take
+    the last line per source.
+  * files with the same content (md5, i.e. the same resume_id as the API) are
+    analyzed once
+  * with --redis results are also written to the cache, in pipelined batches,
+    and indexed for candidate search
+
+Settings (DASHSCOPE_API_KEY, REDIS_*, VISION_*, PDF_PARSE_*) come from the
+environment / .env as for the API.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.config import settings
+from core.parse_pool import ParsePool, ParseFailed
+from core.process import available_cpu_count
+from services.ai_service import AIService
+from services.model_router import ModelRouter
+from services.pdf_service import PDFService
+
+
+def iter_sources(path: str) -> Iterator[Tuple[str, bytes]]:
+    """(name, PDF bytes) for each PDF under a directory or in a .zip / .tar(.gz) archive."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.lower().endswith(".pdf"):
+                    full_path = os.path.join(root, filename)
+                    with open(full_path, "rb") as f:
+                        yield os.path.relpath(full_path, path), f.read()
+    elif zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(".pdf"):
+                    yield info.filename, archive.read(info)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, "r:*") as archive:
+            for member in archive:
+                if member.isfile() and member.name.lower().endswith(".pdf"):
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        raise ValueError(f"{path} is not a directory, zip or tar archive")
+
+
+def load_checkpoint(output_path: str, retry_errors: bool) -> Tuple[Set[str], Dict[str, dict]]:
+    """
+    Sources already done according to the output file, and the results by
+    resume_id (for content duplicates). A partly written last line (crash) is
+    truncated away.
+    """
+    done: Set[str] = set()
+    results: Dict[str, dict] = {}
+    if not os.path.exists(output_path):
+        return done, results
+    with open(output_path, "rb+") as f:
+        content = f.read()
+        complete = content.rfind(b"\n") + 1
+        if complete < len(content):
+            print(f"Dropping a partly written record at the end of {output_path}")
+            f.truncate(complete)
+    for line in content[:complete].splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "error" in record:
+            if not retry_errors:
+                done.add(record["source"])
+            continue
+        done.add(record["source"])
+        results[record["resume_id"]] = record
+    return done, results
+
+
+class BulkAnalyzer:
+    def __init__(self, pool: ParsePool, model_concurrency: int, retries: int = 3,
+                 redis_service=None, search_service=None, redis_batch: int = 200):
+        self.pool = pool
+        self.api_key = settings.DASHSCOPE_API_KEY
+        self.retries = retries
+        self.router = ModelRouter.from_settings(settings)
+        self.model_concurrency = max(1, model_concurrency)
+        self._model_slots = threading.BoundedSemaphore(self.model_concurrency)
+        self.redis_service = redis_service
+        self.search_service = search_service
+        self.redis_batch = redis_batch
+        self._pending_cache: Dict[str, dict] = {}
+        self.preprocessor = None
+        if settings.VISION_PREPROCESS:
+            from services.image_preprocessor import PageImagePreprocessor
+            self.preprocessor = PageImagePreprocessor(
+                target_dpi=settings.VISION_TARGET_DPI,
+                max_pixels=settings.VISION_MAX_PIXELS,
+                tile_dense=settings.VISION_TILE_DENSE_PAGES
+            )
+        self.counts = {"done": 0, "errors": 0, "duplicates": 0, "skipped": 0, "text": 0, "vision": 0}
+
+    def _call_model(self, func, *args, **kwargs):
+        """A model call within the concurrency bound, retried with exponential backoff."""
+        for attempt in range(self.retries + 1):
+            with self._model_slots:
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    if attempt == self.retries:
+                        raise
+                    error = e
+            delay = 2 ** attempt
+            print(f"Model call failed ({error}), retrying in {delay}s")
+            time.sleep(delay)
+
+    def analyze(self, source: str, resume_id: str, file_bytes: bytes) -> dict:
+        """One file -> its output record. Runs in a pipeline thread."""
+        try:
+            raw_text, vision_pages = PDFService.route_pages_parallel(
+                file_bytes, settings.TEXT_QUALITY_MIN_SCORE, self.pool, settings.PDF_PARALLEL_MIN_PAGES
+            )
+            if not raw_text and not vision_pages:
+                raise ValueError("Could not extract text from PDF.")
+            if vision_pages:
+                page_images = self.pool.run(
+                    PDFService.pdf_pages_to_base64_images, file_bytes, dpi=200, preprocessor=self.preprocessor,
+                    max_images=AIService.MAX_VISION_IMAGES, pages=vision_pages
+                )
+                if not page_images:
+                    raise ValueError("Failed to convert PDF pages to images.")
+                data = self._call_model(self.router.extract_images, page_images, self.api_key, page_text=raw_text)
+                route = "vision"
+            else:
+                data = self._call_model(self.router.extract_text, raw_text, self.api_key)
+                route = "text"
+            return {"source": source, "resume_id": resume_id, "route": route, "data": data.dict()}
+        except ParseFailed as e:
+            return {"source": source, "resume_id": resume_id, "error": f"Could not parse PDF: {e.reason}."}
+        except Exception as e:
+            return {"source": source, "resume_id": resume_id, "error": str(e)}
+
+    def _cache(self, record: dict, flush: bool = False):
+        if self.redis_service is None:
+            return
+        if record is not None:
+            self._pending_cache[record["resume_id"]] = record["data"]
+            if self.search_service is not None:
+                try:
+                    self.search_service.index_resume(record["resume_id"], record["data"])
+                except Exception as e:
+                    print(f"Search indexing failed: {e}")
+        if self._pending_cache and (flush or len(self._pending_cache) >= self.redis_batch):
+            try:
+                self.redis_service.cache_resume_data_many(self._pending_cache)
+            except Exception as e:
+                print(f"Bulk cache write failed: {e}")
+            self._pending_cache = {}
+
+    def run(self, input_path: str, output_path: str, retry_errors: bool = False,
+            limit: Optional[int] = None) -> dict:
+        done, results = load_checkpoint(output_path, retry_errors)
+        if done:
+            print(f"Resuming: {len(done)} files already in {output_path}")
+        threads = self.pool.size + self.model_concurrency
+        window = 2 * threads  # files read ahead of the workers (bounds memory)
+        started = last_report = time.monotonic()
+
+        with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=threads) as executor:
+            # resume_id -> sources with the same content waiting on its analysis
+            copies: Dict[str, list] = {}
+
+            def write(record: dict, duplicate: bool = False):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if duplicate:
+                    self.counts["duplicates"] += 1
+                elif "error" in record:
+                    self.counts["errors"] += 1
+                    print(f"{record['source']}: {record['error']}")
+                else:
+                    self.counts["done"] += 1
+                    self.counts[record["route"]] += 1
+                    results[record["resume_id"]] = record
+                    self._cache(record)
+                for source in copies.pop(record["resume_id"], []):
+                    write(dict(record, source=source), duplicate=True)
+
+            def drain(futures, return_when):
+                finished, remaining = wait(futures, return_when=return_when)
+                for future in finished:
+                    write(future.result())
+                return remaining
+
+            pending = set()
+            submitted = 0
+            for source, file_bytes in iter_sources(input_path):
+                if source in done:
+                    self.counts["skipped"] += 1
+                    continue
+                if limit is not None and submitted >= limit:
+                    break
+                submitted += 1
+                resume_id = hashlib.md5(file_bytes).hexdigest()
+                # Same content as a file already analyzed (or being analyzed)
+                if resume_id in results:
+                    write(dict(results[resume_id], source=source), duplicate=True)
+                    continue
+                if resume_id in copies:
+                    copies[resume_id].append(source)
+                    continue
+                copies[resume_id] = []
+                while len(pending) >= window:
+                    pending = drain(pending, FIRST_COMPLETED)
+                pending.add(executor.submit(self.analyze, source, resume_id, file_bytes))
+
+                now = time.monotonic()
+                if now - last_report >= 10:
+                    last_report = now
+                    finished = self.counts["done"] + self.counts["errors"]
+                    print(f"{finished} files done ({finished / (now - started):.1f}/s), "
+                          f"{self.counts['errors']} errors, {len(pending)} in flight")
+            drain(pending, "ALL_COMPLETED")
+            out.flush()
+            os.fsync(out.fileno())
+        self._cache(None, flush=True)
+        return dict(self.counts, elapsed_s=round(time.monotonic() - started, 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or archive of resume PDFs into JSONL.")
+    parser.add_argument("input", help="Directory, .zip or .tar(.gz) of PDFs")
+    parser.add_argument("-o", "--output", required=True, help="JSONL output (appended; also the checkpoint)")
+    parser.add_argument("--parse-workers", type=int, default=available_cpu_count(),
+                        help="PDF parsing worker processes (default: CPUs available)")
+    parser.add_argument("--model-concurrency", type=int, default=8, help="Concurrent DashScope calls")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per failed model call")
+    parser.add_argument("--retry-errors", action="store_true", help="Reprocess files that failed in earlier runs")
+    parser.add_argument("--limit", type=int, help="Process at most this many new files")
+    parser.add_argument("--redis", action="store_true", help="Also write results to the Redis cache and search index")
+    parser.add_argument("--redis-batch", type=int, default=200, help="Cache writes per pipelined round trip")
+    args = parser.parse_args(argv)
+
+    if not settings.DASHSCOPE_API_KEY:
+        parser.error("DASHSCOPE_API_KEY is not configured")
+
+    redis_service = search_service = None
+    if args.redis:
+        from services.cache_codec import CacheCodec
+        from services.redis_service import RedisService
+        from services.search_service import SearchService
+        redis_service = RedisService(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD, codec=CacheCodec.from_settings(settings),
+            nodes=settings.REDIS_NODES.split(","), cluster=settings.REDIS_CLUSTER,
+            node_retry_seconds=settings.REDIS_NODE_RETRY_SECONDS
+        )
+        if redis_service.client is None:
+            parser.error("--redis given but Redis is not reachable")
+        search_service = SearchService(redis_service)
+
+    pool = ParsePool(
+        workers=max(1, args.parse_workers),
+        timeout_seconds=settings.PDF_PARSE_TIMEOUT_SECONDS,
+        max_rss_bytes=settings.PDF_PARSE_MAX_RSS_MB * 1024 * 1024,
+        max_jobs=settings.PDF_PARSE_MAX_JOBS,
+        initializer=PDFService.warmup
+    )
+    pool.start()
+    try:
+        analyzer = BulkAnalyzer(pool, args.model_concurrency, args.retries,
+                                redis_service, search_service, args.redis_batch)
+        summary = analyzer.run(args.input, args.output, args.retry_errors, args.limit)
+    finally:
+        pool.close()
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
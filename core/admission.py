@@ -0,0 +1,210 @@
+"""
+Admission control: bounded, per-lane queues in front of expensive work.
+
+Each kind of work gets a Lane with its own concurrency limit and queue, so a burst
+of vision extractions cannot take the slots (or the threadpool) that cache hits
+need. A request is shed up front, with a Retry-After hint, when its expected queue
+wait would not leave enough of its deadline to do the work:
+  * 429 when the lane's queue is full
+  * 503 when the expected wait, or the wait actually spent queued, exceeds what
+    the deadline allows
+Expected wait is estimated from the queue position and a moving average of the
+lane's recent service times.
+
+Limits are per process: with several gunicorn workers each has its own lanes.
+TenantLimiter additionally caps the model work one tenant (API client) can have
+in flight, so a single client's burst can't fill a lane and its queue.
+
+A slot is normally released when the request leaves it. Work that outlives its
+request (a committed model call finishing after a 504) still occupies a thread
+and quota, so `keep_slots_until_done` hands the release of every slot the
+request holds to that work instead.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; carries the HTTP status and a Retry-After hint."""
+
+    def __init__(self, lane: str, status_code: int, retry_after: float, reason: str):
+        super().__init__(f"{lane} lane overloaded: {reason}")
+        self.lane = lane
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class _Hold:
+    """A held slot; released on leaving it, or when the work it was handed to is done."""
+
+    def __init__(self, release: Callable[[], None]):
+        self.release = release
+        self.task: Optional[asyncio.Future] = None
+
+    def leave(self):
+        if self.task is not None and not self.task.done():
+            self.task.add_done_callback(lambda _: self.release())
+        else:
+            self.release()
+
+
+# Slots held by the current request (a context variable, so nested slots see each other)
+_holds: ContextVar[Tuple[_Hold, ...]] = ContextVar("admission_holds", default=())
+
+
+@asynccontextmanager
+async def _holding(release: Callable[[], None]):
+    hold = _Hold(release)
+    reset = _holds.set(_holds.get() + (hold,))
+    try:
+        yield
+    finally:
+        _holds.reset(reset)
+        hold.leave()
+
+
+def keep_slots_until_done(task: asyncio.Future):
+    """Release the slots the current request holds only once `task` is done."""
+    for hold in _holds.get():
+        hold.task = task
+
+
+class Lane:
+    """A concurrency limit with a bounded FIFO queue and wait-time based shedding."""
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, service_time: float):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+        # Exponentially weighted moving average of recent service times (seconds)
+        self.service_time = service_time
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.shed = {429: 0, 503: 0}
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def expected_wait(self, position: int) -> float:
+        """Seconds until a request at `position` in the queue (1 = next) gets a slot."""
+        return math.ceil(position / self.concurrency) * self.service_time
+
+    def _shed(self, status_code: int, retry_after: float, reason: str):
+        self.shed[status_code] += 1
+        raise Overloaded(self.name, status_code, retry_after, reason)
+
+    async def acquire(self, deadline: float):
+        """Wait for a slot, or raise Overloaded. `deadline` is a time.monotonic() value."""
+        if self.active < self.concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+        position = self.queued + 1
+        expected = self.expected_wait(position)
+        if position > self.queue_size:
+            self._shed(429, expected, "queue is full")
+        # The request must still be able to finish after waiting its turn
+        budget = deadline - time.monotonic() - self.service_time
+        if expected > budget:
+            self._shed(503, expected, "expected queue wait exceeds the deadline")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=max(budget, 0))
+        except asyncio.TimeoutError:
+            self._shed(503, self.expected_wait(self.queued + 1), "queued past the deadline")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._handoff()  # a slot was handed to us just as we were cancelled
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self.admitted += 1
+
+    def release(self, service_time: float):
+        self.service_time = 0.8 * self.service_time + 0.2 * service_time
+        self._handoff()
+
+    def _handoff(self):
+        # The slot passes straight to the next waiter, so `active` is unchanged
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, deadline: float):
+        await self.acquire(deadline)
+        start = time.monotonic()
+        async with _holding(lambda: self.release(time.monotonic() - start)):
+            yield
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "queued": self.queued,
+            "queue_size": self.queue_size,
+            "avg_service_seconds": round(self.service_time, 3),
+            "admitted": self.admitted,
+            "shed_429": self.shed[429],
+            "shed_503": self.shed[503],
+        }
+
+
+class AdmissionController:
+    """The set of lanes of one process, addressed by name."""
+
+    def __init__(self, lanes: Dict[str, Lane]):
+        self.lanes = lanes
+
+    def lane(self, name: str) -> Lane:
+        return self.lanes[name]
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+
+class TenantLimiter:
+    """At most `max_active` concurrent requests per tenant in this process (0: no limit)."""
+
+    def __init__(self, max_active: int, retry_after: float = 1.0):
+        self.max_active = max_active
+        self.retry_after = retry_after
+        self.active: Dict[str, int] = {}
+        self.shed = 0
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str]):
+        if not self.max_active or tenant is None:
+            yield
+            return
+        if self.active.get(tenant, 0) >= self.max_active:
+            self.shed += 1
+            raise Overloaded(f"tenant {tenant}", 429, self.retry_after,
+                             f"{self.max_active} requests of this client already in progress")
+        self.active[tenant] = self.active.get(tenant, 0) + 1
+        async with _holding(lambda: self._release(tenant)):
+            yield
+
+    def _release(self, tenant: str):
+        self.active[tenant] -= 1
+        if not self.active[tenant]:
+            del self.active[tenant]
+
+    def stats(self) -> dict:
+        return {"max_active": self.max_active, "active": dict(self.active), "shed_429": self.shed}
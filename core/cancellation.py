@@ -0,0 +1,91 @@
+"""
+Deadline and cancellation propagation into blocking (threadpool) work.
+
+A request handler creates one CancelToken and passes it down to the work it runs
+in the threadpool. The handler cancels the token when the client disconnects or
+the deadline passes; the worker thread calls `check()` at safe points (between
+rasterized pages, before each model call) and stops with `Cancelled`.
+
+A model call cannot be aborted once sent (the DashScope SDK is synchronous), and
+its tokens are paid for either way. Work marks that point with `commit()`. If the
+client goes away after it, the result can be kept: with `finish_committed` the
+call in flight runs to completion purely to warm the cache instead of being
+thrown away. Nothing new starts after that: the next `commit()` (another batch,
+an escalation to a bigger model) raises like any other check.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+
+class Cancelled(Exception):
+    """Raised inside work whose request was abandoned (client gone or deadline passed)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancelToken:
+    # Process-wide counters, reported by /healthz
+    stats: Dict[str, int] = {"cancelled": 0, "finished_in_background": 0}
+
+    def __init__(self, timeout_seconds: float, finish_committed: bool = True):
+        self.expires_at = time.monotonic() + timeout_seconds
+        self.finish_committed = finish_committed
+        self.committed = False
+        self.abandoned = False
+        self.reason: Optional[str] = None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def is_cancelled(self) -> bool:
+        """
+        True once no new work should start (usable as a `should_stop` callback):
+        the request was cancelled or abandoned, or its deadline has passed.
+        """
+        return self._cancelled.is_set() or self.abandoned or self.expired
+
+    def check(self):
+        """
+        Raise Cancelled if the work should stop. Work finishing a committed call
+        (reading and caching its result) is let through.
+        """
+        if self._cancelled.is_set() or (self.expired and not self.committed):
+            raise Cancelled(self.reason or "deadline exceeded")
+
+    def commit(self):
+        """
+        Mark the start of work that can't be undone (a model call). Raises if the
+        request is already cancelled, abandoned or past its deadline -- also after
+        an earlier commit -- so calls that haven't been sent are skipped.
+        """
+        if self.is_cancelled():
+            raise Cancelled(self.reason or "deadline exceeded")
+        self.committed = True
+
+    def cancel(self, reason: str) -> bool:
+        """
+        Abandon the request. Returns True if the committed call in flight will still
+        run to completion in the background (the policy allows it); later commits
+        raise.
+        """
+        if self.reason is None:
+            self.reason = reason
+        if self.committed and self.finish_committed:
+            if not self.abandoned:
+                self.abandoned = True
+                CancelToken.stats["finished_in_background"] += 1
+                print(f"Request abandoned ({reason}); finishing the model call in the background to warm the cache.")
+            return True
+        if not self._cancelled.is_set():
+            self._cancelled.set()
+            CancelToken.stats["cancelled"] += 1
+            print(f"Request cancelled ({reason}); stopping its work.")
+        return False
@@ -8,6 +8,141 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+    # Connect to Redis on a background thread so startup never blocks on the ping
+    REDIS_CONNECT_IN_BACKGROUND: bool = True
+    # Shard over several nodes, "host1:6379,host2:6379", on a client-side
+    # consistent-hash ring (REDIS_HOST / REDIS_PORT are then unused), or use a
+    # Redis Cluster reached through REDIS_HOST:REDIS_PORT
+    REDIS_NODES: str = ""
+    REDIS_CLUSTER: bool = False
+    # Keys of a ring node that fails use the local tier this long before it is retried
+    REDIS_NODE_RETRY_SECONDS: float = 30
+    # Minimum MinHash similarity for an upload to be treated as a near duplicate
+    # of an already analyzed resume (0 disables the check)
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8
+    # Above this share of changed text, re-extract the whole resume instead of diffing
+    NEAR_DUPLICATE_MAX_CHANGED_RATIO: float = 0.5
+    # SQLite file used as a fallback cache shared by all workers when Redis is
+    # unavailable. Empty keeps the per-process in-memory dict.
+    LOCAL_CACHE_PATH: str = ""
+    # Recycle a worker once its RSS exceeds this many MB (0 disables)
+    WORKER_MAX_RSS_MB: int = 0
+    WORKER_MEMORY_CHECK_INTERVAL: float = 5.0
+    # Cached values: "auto" (zstd if installed, else zlib), "zstd", "zlib" or "none"
+    CACHE_COMPRESSION: str = "auto"
+    # Values shorter than this many bytes are stored uncompressed
+    CACHE_COMPRESS_MIN_BYTES: int = 64
+    # Optional zstd dictionary trained on real entries (python -m services.cache_codec)
+    CACHE_ZSTD_DICT_PATH: str = ""
+    # Resume data and match results stay in Redis this long past their TTL and
+    # are served stale meanwhile; hot entries are refreshed by one background
+    # request (match results re-scored, resume data renewed). 0 disables.
+    CACHE_STALE_GRACE_SECONDS: int = 21600
+    # XFetch beta: > 1 refreshes hot entries earlier before they go stale
+    CACHE_REFRESH_BETA: float = 1.0
+    # Entries read fewer times than this per window are left to expire
+    CACHE_REFRESH_MIN_HITS: int = 3
+    CACHE_ACCESS_WINDOW_SECONDS: float = 3600
+    # Snapshot (python -m services.cache_snapshot export ...) to seed the local
+    # cache tier from at startup, in the background; at most this many entries.
+    # Only the shared tier (LOCAL_CACHE_PATH) is seeded, by one worker per instance
+    CACHE_SNAPSHOT_PATH: str = ""
+    CACHE_SNAPSHOT_PRELOAD_MAX: int = 50000
+
+    # Admission control (per worker). Requests are shed with 429/503 + Retry-After
+    # when their expected queue wait would not fit in the deadline.
+    REQUEST_DEADLINE_SECONDS: float = 110  # below the 120 s FC function timeout
+    ADMISSION_CACHE_CONCURRENCY: int = 32
+    ADMISSION_CACHE_QUEUE: int = 256
+    ADMISSION_TEXT_CONCURRENCY: int = 8
+    ADMISSION_TEXT_QUEUE: int = 32
+    ADMISSION_VISION_CONCURRENCY: int = 2
+    ADMISSION_VISION_QUEUE: int = 8
+    # When a client disconnects (or the deadline passes) after a model call was
+    # sent, let it finish in the background and cache the result instead of
+    # discarding it. Work that hasn't reached a model call is always cancelled,
+    # and no further model call (next batch, escalation) is sent after it.
+    FINISH_ABANDONED_MODEL_CALLS: bool = True
+
+    # Vision extraction: crop / grayscale / downscale pages and skip blank ones
+    # before sending them to qwen-vl (see services/image_preprocessor.py)
+    VISION_PREPROCESS: bool = True
+    VISION_TARGET_DPI: int = 100
+    VISION_MAX_PIXELS: int = 1003520  # 1280 patches of 28x28, qwen-vl's own default cap
+    # Split dense pages into two tiles rendered at full DPI (more images, more detail)
+    VISION_TILE_DENSE_PAGES: bool = False
+    # Pages whose extracted text scores below this (0..1, see
+    # services/text_quality_service.py) are treated as garbled and sent to vision
+    TEXT_QUALITY_MIN_SCORE: float = 0.5
+
+    # PDF parsing / rasterization runs in isolated worker processes (per server
+    # worker). A document exceeding the time or RSS limit is killed (HTTP 422);
+    # workers are replaced after PDF_PARSE_MAX_JOBS documents. 0 workers parses
+    # in the request thread without limits.
+    PDF_PARSE_WORKERS: int = 2
+    PDF_PARSE_TIMEOUT_SECONDS: float = 30
+    PDF_PARSE_MAX_RSS_MB: int = 512
+    PDF_PARSE_MAX_JOBS: int = 50
+    # PDFs with at least this many pages are split into page ranges parsed by
+    # several workers at once (up to the CPUs available); 0 disables
+    PDF_PARALLEL_MIN_PAGES: int = 20
+
+    # Resume extraction cascade (services/model_router.py): tiers are tried
+    # cheapest first, escalating while the result scores below MODEL_MIN_QUALITY
+    # (0..1 field completeness / validity). "local" is the rule-based extractor.
+    MODEL_TEXT_TIERS: str = "qwen-turbo,qwen-plus"
+    MODEL_VISION_TIERS: str = "qwen-vl-plus,qwen-vl-max"
+    MODEL_MIN_QUALITY: float = 0.7
+    # Relative cost of one call per tier, for the per-tier cost estimate in /healthz
+    MODEL_TIER_COSTS: str = "local=0,qwen-turbo=1,qwen-plus=3,qwen-max=10,qwen-vl-plus=4,qwen-vl-max=10"
+
+    # Token accounting per tenant (API client), named by this request header
+    TENANT_HEADER: str = "X-Tenant-ID"
+    # Daily (UTC) input + output token budget per tenant, 0 = unlimited, and
+    # per-tenant overrides: "team-a=2000000,team-b=500000"
+    TENANT_DAILY_TOKEN_BUDGET: int = 0
+    TENANT_TOKEN_BUDGETS: str = ""
+    # Over budget: "downgrade" (cache hits, rule-based extraction / scoring; scans
+    # are refused) or "reject" (429 until the budget resets)
+    TENANT_BUDGET_ACTION: str = "downgrade"
+    # Rule-based results produced over budget are cached only this long
+    TENANT_DOWNGRADED_TTL_SECONDS: int = 3600
+    # Requests one tenant may have past the cache at once (per worker, 0 = no limit)
+    TENANT_MAX_ACTIVE_REQUESTS: int = 4
+
+    # On-demand profiling (core/profiling.py): requests carrying PROFILE_HEADER set
+    # to PROFILE_ADMIN_TOKEN are profiled, and the token opens /api/admin/profiles
+    # (empty: neither). PROFILE_SAMPLE_RATE profiles that share of all requests.
+    # Both off installs nothing.
+    PROFILE_ADMIN_TOKEN: str = ""
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_SAMPLE_RATE: float = 0.0
+    # "sample" (stack samples every PROFILE_SAMPLE_INTERVAL_MS, cheap) or
+    # "cprofile" (every call); a request can pick one with PROFILE_HEADER-Mode
+    PROFILE_MODE: str = "sample"
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5
+    # Trace Python allocations (tracemalloc) while profiled requests rasterize pages
+    PROFILE_TRACE_ALLOCATIONS: bool = True
+    # Profiles kept per worker, oldest dropped first
+    PROFILE_BUFFER_SIZE: int = 50
+
+    # Browser caching of the frontend (core/static_assets.py): /static files
+    # without a ?v=<hash> version and index.html are reused this long, then
+    # revalidated with their ETag; versioned URLs are immutable
+    STATIC_MAX_AGE_SECONDS: int = 86400
+    STATIC_INDEX_MAX_AGE_SECONDS: int = 60
+
+    # /api/resume/{id}/match-jobs: at most this many JDs per request, scored
+    # this many per model call (the resume is sent once per call)
+    MATCH_JOBS_MAX: int = 100
+    MATCH_JOBS_BATCH_SIZE: int = 8
+
+    # Candidate search index (services/search_service.py) kept in process memory
+    # when Redis is unavailable: at most this many resumes, oldest dropped first
+    SEARCH_MEMORY_MAX_DOCUMENTS: int = 10000
+    # Per-JD candidate leaderboards (services/leaderboard_service.py) expire
+    # this many days after their last new score
+    LEADERBOARD_RETENTION_DAYS: int = 30
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,219 @@
+"""
+Isolated worker processes for parsing untrusted PDFs.
+
+A malformed or pathological PDF can make pdfplumber/PyMuPDF spin for minutes or
+balloon memory, and inside the API process that stalls or OOMs every request it
+serves. ParsePool runs each document in a pre-started worker process instead:
+  * each job gets a wall-clock timeout and an RSS ceiling; a job that exceeds
+    either (or crashes its worker) is killed with SIGKILL and fails with
+    ParseFailed, and the worker is replaced
+  * workers exit after `max_jobs` documents, which also contains PyMuPDF's
+    native memory leaks
+  * a `should_stop` callback (CancelToken.is_cancelled) is polled while a job
+    runs, so an abandoned request kills its worker instead of waiting for it
+Workers are spawned (not forked from the threaded server) on first use. With
+`workers=0` jobs run in the calling thread, without limits.
+"""
+import multiprocessing
+import queue
+from concurrent.futures import ThreadPoolExecutor, wait
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from core.process import process_rss_bytes
+
+# How often a waiting caller checks the worker's clock, memory and should_stop
+_POLL_SECONDS = 0.05
+
+
+class ParseFailed(Exception):
+    """The document was killed (timeout, memory ceiling, crash) or abandoned."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _worker_main(conn, initializer: Optional[Callable], max_jobs: int):
+    if initializer is not None:
+        initializer()
+    for _ in range(max_jobs):
+        try:
+            func, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            result = ("ok", func(*args, **kwargs))
+        except BaseException as e:  # MemoryError included: report it, the parent decides
+            result = ("error", f"{type(e).__name__}: {e}")
+        conn.send(result)
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context, initializer: Optional[Callable], max_jobs: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, initializer, max_jobs), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ParsePool:
+    def __init__(self, workers: int, timeout_seconds: float, max_rss_bytes: int = 0,
+                 max_jobs: int = 50, initializer: Optional[Callable] = None):
+        self.size = max(0, workers)
+        self.timeout_seconds = timeout_seconds
+        self.max_rss_bytes = max_rss_bytes
+        self.max_jobs = max(1, max_jobs)
+        self.initializer = initializer
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.counters: Dict[str, int] = {
+            "jobs": 0, "timeouts": 0, "memory_kills": 0, "crashes": 0, "cancelled": 0, "recycled": 0,
+        }
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, self.initializer, self.max_jobs)
+        self._workers.append(worker)
+        return worker
+
+    def start(self):
+        """Start the workers now instead of on the first job."""
+        with self._lock:
+            if not self._workers:
+                for _ in range(self.size):
+                    self._idle.put(self._spawn())
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            self._idle = queue.Queue()
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.stop()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            return self._spawn()
+
+    def _acquire(self, should_stop: Optional[Callable[[], bool]]) -> _Worker:
+        self.start()
+        while True:
+            try:
+                worker = self._idle.get(timeout=_POLL_SECONDS)
+                break
+            except queue.Empty:
+                if should_stop is not None and should_stop():
+                    self.counters["cancelled"] += 1
+                    raise ParseFailed("cancelled")
+        if not worker.process.is_alive():  # died while idle
+            worker = self._replace(worker)
+        return worker
+
+    def run(self, func: Callable, *args, timeout: Optional[float] = None,
+            should_stop: Optional[Callable[[], bool]] = None, **kwargs):
+        """
+        Run `func(*args, **kwargs)` in a worker and return its result. `func` and
+        its arguments must be picklable (module-level functions, staticmethods).
+        An exception inside `func` is re-raised as RuntimeError; a killed or
+        abandoned job raises ParseFailed.
+        """
+        if self.size == 0:
+            return func(*args, **kwargs)
+        timeout = self.timeout_seconds if timeout is None else timeout
+        worker = self._acquire(should_stop)
+        healthy = False
+        try:
+            self.counters["jobs"] += 1
+            worker.jobs += 1
+            try:
+                worker.conn.send((func, args, kwargs))
+                self._wait(worker, timeout, should_stop)
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                self.counters["crashes"] += 1
+                raise ParseFailed(f"worker crashed (exit code {worker.process.exitcode})")
+            healthy = True
+            if status == "error":
+                raise RuntimeError(payload)
+            return payload
+        finally:
+            if not healthy:
+                worker = self._replace(worker)
+            elif worker.jobs >= self.max_jobs:
+                # The worker exits on its own after max_jobs; start its successor now
+                self.counters["recycled"] += 1
+                worker = self._replace(worker)
+            self._idle.put(worker)
+
+    def map(self, func: Callable, calls: List[tuple],
+            should_stop: Optional[Callable[[], bool]] = None) -> list:
+        """
+        `run(func, *args)` for each tuple in `calls`, spread over the workers;
+        results in call order. If one call fails the others are stopped and its
+        error is raised.
+        """
+        if self.size <= 1 or len(calls) <= 1:
+            return [self.run(func, *args, should_stop=should_stop) for args in calls]
+        with self._lock:
+            if self._executor is None:
+                # Threads only wait on worker pipes; the work itself is in the workers
+                self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="parse-pool")
+        failed = threading.Event()
+
+        def stop() -> bool:
+            return failed.is_set() or (should_stop is not None and should_stop())
+
+        def call(args):
+            try:
+                return self.run(func, *args, should_stop=stop)
+            except BaseException:
+                failed.set()
+                raise
+
+        futures = [self._executor.submit(call, args) for args in calls]
+        wait(futures)
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            # Prefer the error that stopped the siblings over their "cancelled"
+            raise next((e for e in errors if not (isinstance(e, ParseFailed) and e.reason == "cancelled")), errors[0])
+        return [future.result() for future in futures]
+
+    def _wait(self, worker: _Worker, timeout: float, should_stop: Optional[Callable[[], bool]]):
+        deadline = time.monotonic() + timeout
+        while not worker.conn.poll(_POLL_SECONDS):
+            if not worker.process.is_alive():
+                return  # recv() reports the crash
+            if time.monotonic() > deadline:
+                self.counters["timeouts"] += 1
+                print(f"PDF parse worker {worker.process.pid} timed out after {timeout:.0f}s, killing it.")
+                raise ParseFailed(f"timed out after {timeout:.0f}s")
+            if self.max_rss_bytes and process_rss_bytes(worker.process.pid) > self.max_rss_bytes:
+                self.counters["memory_kills"] += 1
+                print(f"PDF parse worker {worker.process.pid} exceeded "
+                      f"{self.max_rss_bytes // (1024 * 1024)} MB, killing it.")
+                raise ParseFailed(f"exceeded the {self.max_rss_bytes // (1024 * 1024)} MB memory limit")
+            if should_stop is not None and should_stop():
+                self.counters["cancelled"] += 1
+                raise ParseFailed("cancelled")
+
+    def stats(self) -> dict:
+        return {"workers": self.size, "idle": self._idle.qsize(), **self.counters}
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import signal
+import sys
+from typing import Optional
+
+
+def available_cpu_count() -> int:
+    """
+    CPUs this process may actually use.
+    Honours CPU affinity and a cgroup v2/v1 CPU quota, which is what FC and most
+    containers use to size an instance; os.cpu_count() reports the host.
+    """
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    quota = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            limit, period = f.read().split()[:2]
+            if limit != "max":
+                quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+
+    if quota:
+        count = min(count, max(1, int(quota + 0.5)))
+    return max(1, count)
+
+
+def process_rss_bytes(pid) -> int:
+    """Resident set size of process `pid` ("self" for this one) from /proc; 0 where unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return 0
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of the current process."""
+    rss = process_rss_bytes("self")
+    if rss:
+        return rss
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    # Peak rather than current RSS, but good enough where /proc is missing (bytes on macOS, kB elsewhere)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryWatchdog:
+    """
+    Recycles the worker once its RSS crosses a ceiling.
+
+    PyMuPDF can leak native memory across documents, and the leak is invisible to
+    Python's GC. When the ceiling is hit the watchdog sends SIGTERM to its own
+    process: uvicorn stops accepting connections, drains in-flight requests, and
+    the gunicorn arbiter forks a fresh worker in its place.
+    """
+
+    def __init__(self, max_rss_bytes: int, interval_seconds: float = 5.0):
+        self.max_rss_bytes = max_rss_bytes
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+        self.triggered = False
+
+    def check(self) -> bool:
+        """Returns True (and requests a graceful shutdown) if the ceiling is exceeded."""
+        if self.triggered:
+            return True
+        rss = current_rss_bytes()
+        if rss <= self.max_rss_bytes:
+            return False
+        self.triggered = True
+        print(f"Worker {os.getpid()} RSS {rss // (1024 * 1024)} MB exceeds "
+              f"{self.max_rss_bytes // (1024 * 1024)} MB, recycling gracefully.")
+        os.kill(os.getpid(), signal.SIGTERM)
+        return True
+
+    async def _run(self):
+        while not self.triggered:
+            await asyncio.sleep(self.interval_seconds)
+            self.check()
+
+    def start(self):
+        if self.max_rss_bytes > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,382 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it carries the admin token in the profiling header
+(PROFILE_HEADER / PROFILE_ADMIN_TOKEN) or is picked by PROFILE_SAMPLE_RATE.
+Its blocking work -- everything the handler runs in the threadpool through
+`profiled`, i.e. PDF routing, model calls and cache reads/writes -- is then
+recorded in one of two modes:
+  * "cprofile": deterministic cProfile of every call (exact counts, slower)
+  * "sample": the stacks of the threads doing the request's work, every
+    PROFILE_SAMPLE_INTERVAL_MS, from a sampler thread (cheap, statistical)
+Page rasterization additionally runs under tracemalloc (`trace_allocations`),
+in the parse worker process that does it, and reports its peak and top
+allocation sites plus the worker's RSS growth (native PyMuPDF memory).
+
+Each profile is summarized (time per step, time inside PDFService, AIService
+and RedisService, allocations) and kept with its raw data in a per-process ring
+buffer of the last PROFILE_BUFFER_SIZE profiles, served by /api/admin/profiles.
+
+With profiling off nothing is installed: no middleware, and `profiled` /
+`trace_allocations` only read a context variable.
+"""
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, List, Optional
+
+from core.process import current_rss_bytes
+
+MODES = ("cprofile", "sample")
+# Time is attributed to these services by the file their code is in
+COMPONENTS = {
+    "PDFService": os.path.join("services", "pdf_service.py"),
+    "AIService": os.path.join("services", "ai_service.py"),
+    "RedisService": os.path.join("services", "redis_service.py"),
+}
+# Allocation sites reported per traced call, and frames kept per allocation
+_TOP_ALLOCATIONS = 15
+_TRACE_FRAMES = 5
+
+_current: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+def _component(filename: str) -> Optional[str]:
+    for name, suffix in COMPONENTS.items():
+        if filename.endswith(suffix):
+            return name
+    return None
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def traced_call(func: Callable, *args, **kwargs):
+    """
+    `func(*args, **kwargs)` under tracemalloc; returns (result, allocation report).
+    Module-level so that it can be sent to a ParsePool worker.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(_TRACE_FRAMES)
+    baseline = tracemalloc.take_snapshot() if was_tracing else None
+    tracemalloc.reset_peak()
+    rss_before = current_rss_bytes()
+    try:
+        result = func(*args, **kwargs)
+        snapshot = tracemalloc.take_snapshot()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    if baseline is not None:
+        stats = snapshot.compare_to(baseline, "lineno")
+    else:
+        stats = snapshot.statistics("lineno")
+    report = {
+        "function": getattr(func, "__qualname__", repr(func)),
+        "pid": os.getpid(),
+        "peak_kb": round(peak / 1024, 1),
+        "retained_kb": round(retained / 1024, 1),
+        "rss_delta_kb": round((current_rss_bytes() - rss_before) / 1024, 1),
+        "top": [
+            {
+                "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "kb": round(getattr(stat, "size_diff", stat.size) / 1024, 1),
+                "count": getattr(stat, "count_diff", stat.count),
+            }
+            for stat in stats[:_TOP_ALLOCATIONS]
+        ],
+    }
+    return result, report
+
+
+class ProfileSession:
+    """The profile of one request, built up while it runs."""
+
+    def __init__(self, mode: str, method: str, path: str, tenant: str, trace_allocations: bool,
+                 sample_interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.mode = mode
+        self.method = method
+        self.path = path
+        self.tenant = tenant
+        self.trace_allocations = trace_allocations
+        self.sample_interval = sample_interval
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.calls: List[dict] = []
+        self.allocations: List[dict] = []
+        self.components: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # cprofile: one profiler, enabled in one thread at a time
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._profile_busy = False
+        # sample: thread ids doing the request's work -> how many calls they're in
+        self._threads: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        if mode == "sample":
+            self._sampler = threading.Thread(target=self._sample_loop, name=f"profile-{self.id}", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                thread_ids = list(self._threads)
+            if not thread_ids:
+                continue
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                self.samples += 1
+                self.stacks[";".join(_frame_label(code) for code in reversed(stack))] += 1
+                for component in {_component(code.co_filename) for code in stack} - {None}:
+                    self.components[component] = self.components.get(component, 0) + self.sample_interval * 1000
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Call `func` in the current (threadpool) thread, recording it."""
+        started = time.perf_counter()
+        profile = None
+        thread_id = threading.get_ident()
+        with self._lock:
+            if self._profile is not None and not self._profile_busy:
+                profile, self._profile_busy = self._profile, True
+            self._threads[thread_id] += 1
+        try:
+            if profile is not None:
+                return profile.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                if profile is not None:
+                    self._profile_busy = False
+                self._threads[thread_id] -= 1
+                if self._threads[thread_id] <= 0:
+                    del self._threads[thread_id]
+                self.calls.append({
+                    "name": getattr(func, "__qualname__", repr(func)),
+                    "ms": round((time.perf_counter() - started) * 1000, 1),
+                })
+
+    def add_allocations(self, report: dict):
+        with self._lock:
+            self.allocations.append(report)
+
+    def finish(self, status: Optional[int]):
+        self.status = status
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 1)
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        if self._profile is not None:
+            self._profile.create_stats()
+            self.components = self._component_times(self._profile.stats)
+        self.components = {name: round(ms, 1) for name, ms in self.components.items()}
+
+    @staticmethod
+    def _component_times(stats: dict) -> Dict[str, float]:
+        """
+        Inclusive ms per component: the cumulative time of its functions when
+        called from outside it (calls within a component aren't counted twice).
+        """
+        times: Dict[str, float] = {}
+        for (filename, _, _), (_, _, _, _, callers) in stats.items():
+            component = _component(filename)
+            if component is None:
+                continue
+            for (caller_file, _, _), caller_stats in callers.items():
+                if _component(caller_file) != component:
+                    times[component] = times.get(component, 0.0) + caller_stats[3] * 1000
+        return times
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "pid": os.getpid(),
+            "mode": self.mode,
+            "method": self.method,
+            "path": self.path,
+            "tenant": self.tenant,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "calls": self.calls,
+            "components_ms": self.components,
+            "allocations": self.allocations,
+            "samples": self.samples if self.mode == "sample" else None,
+        }
+
+    def text(self, limit: int = 40) -> str:
+        """Human-readable profile: pstats by cumulative time, or the hottest stacks."""
+        if self._profile is not None:
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(limit)
+            return out.getvalue()
+        lines = [f"{count:6d}  {stack}" for stack, count in self.stacks.most_common(limit)]
+        return f"{self.samples} samples every {self.sample_interval * 1000:g} ms\n" + "\n".join(lines) + "\n"
+
+    def raw(self) -> bytes:
+        """
+        cprofile: a pstats file (pstats.Stats / snakeviz can open it);
+        sample: collapsed stacks, one "frame;frame;... count" per line (flamegraph.pl, speedscope).
+        """
+        if self._profile is not None:
+            return marshal.dumps(self._profile.stats)
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items()).encode("utf-8")
+
+
+class Profiler:
+    """Decides which requests are profiled and keeps the last `buffer_size` profiles."""
+
+    def __init__(self, admin_token: str = "", header: str = "X-Profile", sample_rate: float = 0.0,
+                 mode: str = "sample", sample_interval_ms: float = 5, trace_allocations: bool = True,
+                 buffer_size: int = 50, tenant_header: str = "X-Tenant-ID"):
+        self.admin_token = admin_token
+        self.header = header.lower().encode("latin-1")
+        self.mode_header = f"{header}-Mode".lower().encode("latin-1")
+        self.tenant_header = tenant_header.lower().encode("latin-1")
+        self.sample_rate = sample_rate
+        self.mode = mode if mode in MODES else "sample"
+        self.sample_interval = max(0.001, sample_interval_ms / 1000)
+        self.trace_allocations = trace_allocations
+        self.profiles: Deque[ProfileSession] = deque(maxlen=max(1, buffer_size))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings) -> "Profiler":
+        return cls(
+            admin_token=settings.PROFILE_ADMIN_TOKEN,
+            header=settings.PROFILE_HEADER,
+            sample_rate=settings.PROFILE_SAMPLE_RATE,
+            mode=settings.PROFILE_MODE,
+            sample_interval_ms=settings.PROFILE_SAMPLE_INTERVAL_MS,
+            trace_allocations=settings.PROFILE_TRACE_ALLOCATIONS,
+            buffer_size=settings.PROFILE_BUFFER_SIZE,
+            tenant_header=settings.TENANT_HEADER,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def is_admin(self, token: Optional[str]) -> bool:
+        return bool(self.admin_token) and token is not None and hmac.compare_digest(token, self.admin_token)
+
+    def start(self, scope) -> Optional[ProfileSession]:
+        """A session if this request (an ASGI scope) is to be profiled."""
+        headers = dict(scope.get("headers") or [])
+        token = headers.get(self.header)
+        requested = token is not None and self.is_admin(token.decode("latin-1"))
+        if not requested and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return None
+        mode = self.mode
+        if requested:
+            mode = headers.get(self.mode_header, b"").decode("latin-1") or mode
+            mode = mode if mode in MODES else self.mode
+        return ProfileSession(
+            mode, scope.get("method", ""), scope.get("path", ""),
+            headers.get(self.tenant_header, b"default").decode("latin-1"),
+            self.trace_allocations, self.sample_interval
+        )
+
+    def store(self, session: ProfileSession):
+        with self._lock:
+            self.profiles.append(session)
+
+    def get(self, profile_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            return next((session for session in self.profiles if session.id == profile_id), None)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            sessions = list(self.profiles)
+        return [session.summary() for session in reversed(sessions)]
+
+
+class ProfilingMiddleware:
+    """ASGI middleware: profiles the requests the Profiler picks (install it only when enabled)."""
+
+    def __init__(self, app, profiler: Profiler, skip_prefix: str = "/api/admin"):
+        self.app = app
+        self.profiler = profiler
+        self.skip_prefix = skip_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path", "").startswith(self.skip_prefix):
+            await self.app(scope, receive, send)
+            return
+        session = self.profiler.start(scope)
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+        status = {}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", session.id.encode("latin-1"))
+                ]
+            await send(message)
+
+        reset = _current.set(session)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current.reset(reset)
+            session.finish(status.get("code"))
+            self.profiler.store(session)
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    `func`, recorded in the current request's profile when there is one (wrap
+    what a handler runs in the threadpool). Returns `func` itself otherwise.
+    """
+    session = _current.get()
+    if session is None:
+        return func
+
+    def run(*args, **kwargs):
+        return session.run(func, *args, **kwargs)
+    return run
+
+
+def trace_allocations(func: Callable, *args, run: Optional[Callable] = None, **kwargs):
+    """
+    `func(*args, **kwargs)`, through `run` (e.g. ParsePool.run, which calls it
+    in a worker process) if given. In a profiled request it runs under
+    tracemalloc there and its allocation report is added to the profile.
+    """
+    session = _current.get()
+    if session is None or not session.trace_allocations:
+        return run(func, *args, **kwargs) if run is not None else func(*args, **kwargs)
+    if run is not None:
+        result, report = run(traced_call, func, *args, **kwargs)
+    else:
+        result, report = traced_call(func, *args, **kwargs)
+    session.add_allocations(report)
+    return result
@@ -0,0 +1,157 @@
+"""
+The frontend, served from memory.
+
+Every file under static/ is read once at startup, precompressed (gzip, and
+brotli when the package is installed) and given an ETag from a hash of its
+content. A request then costs no filesystem access: the best encoding the
+client accepts is picked from Accept-Encoding, a matching If-None-Match gets a
+304 without a body, and Cache-Control lets browsers (and a CDN in front of FC)
+reuse the response:
+  * /static/<file>?v=<hash>   immutable for a year (the URL changes with the content)
+  * /static/<file>            max_age seconds, then revalidated with the ETag
+  * / (index.html)            index_max_age seconds, then revalidated
+Files above max_file_bytes are not kept in memory and go out as plain FileResponses.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Content types worth compressing (images, fonts and archives already are)
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/xml",
+                 "image/svg+xml", "application/wasm", "application/manifest+json")
+
+
+def _accepted(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}."""
+    codings: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+class StaticAsset:
+    __slots__ = ("path", "media_type", "hash", "bodies")
+
+    def __init__(self, path: str, media_type: str, body: bytes, min_compress_bytes: int):
+        self.path = path
+        self.media_type = media_type
+        self.hash = hashlib.sha256(body).hexdigest()[:16]
+        # content coding -> body; only the encodings that came out smaller
+        self.bodies: Dict[str, bytes] = {"identity": body}
+        if len(body) >= min_compress_bytes and media_type.startswith(_COMPRESSIBLE):
+            # mtime=0 keeps the gzip bytes (and so any cache keyed on them) stable across restarts
+            encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                encoded["br"] = brotli.compress(body, quality=11)
+            for coding, data in encoded.items():
+                if len(data) < len(body):
+                    self.bodies[coding] = data
+
+    def etag(self, coding: str) -> str:
+        # One ETag per representation, all sharing the content hash
+        return f'"{self.hash}"' if coding == "identity" else f'"{self.hash}-{coding}"'
+
+    def matches(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag.strip('"').split("-")[0] == self.hash:
+                return True
+        return False
+
+    def coding_for(self, accept_encoding: str) -> str:
+        accepted = _accepted(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.bodies and accepted.get(coding, accepted.get("*", 0)) > 0:
+                return coding
+        return "identity"
+
+
+class StaticAssets:
+    def __init__(self, directory: str, max_age: int = 86400, index_max_age: int = 60,
+                 max_file_bytes: int = 5 * 1024 * 1024, min_compress_bytes: int = 512):
+        self.directory = directory
+        self.max_age = max_age
+        self.index_max_age = index_max_age
+        self.max_file_bytes = max_file_bytes
+        self.min_compress_bytes = min_compress_bytes
+        self.assets: Dict[str, StaticAsset] = {}
+        # Too large to keep in memory: relative path -> file on disk
+        self.large_files: Dict[str, str] = {}
+        if os.path.isdir(directory):
+            self.load()
+
+    def load(self):
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+                if os.path.getsize(full_path) > self.max_file_bytes:
+                    self.large_files[relative] = full_path
+                    continue
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                if media_type == "application/javascript":
+                    media_type += "; charset=utf-8"  # Response adds it to text/* itself
+                self.assets[relative] = StaticAsset(relative, media_type, body, self.min_compress_bytes)
+
+    def url(self, path: str) -> str:
+        """Versioned URL of an asset, for pages that reference it (cached as immutable)."""
+        asset = self.assets.get(path)
+        return f"/static/{path}?v={asset.hash}" if asset is not None else f"/static/{path}"
+
+    def response(self, request: Request, path: str, index: bool = False) -> Optional[Response]:
+        """The response for `path` (relative to the directory), None if there is no such file."""
+        asset = self.assets.get(path)
+        if asset is None:
+            if path in self.large_files:
+                return FileResponse(self.large_files[path])
+            return None
+        if index:
+            cache_control = f"public, max-age={self.index_max_age}"
+        elif request.query_params.get("v") == asset.hash:
+            cache_control = "public, max-age=31536000, immutable"
+        else:
+            cache_control = f"public, max-age={self.max_age}"
+        coding = asset.coding_for(request.headers.get("accept-encoding", ""))
+        headers = {"ETag": asset.etag(coding), "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if asset.matches(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        # For HEAD the server sends the headers only
+        return Response(content=asset.bodies[coding], media_type=asset.media_type, headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.assets),
+            "bytes": sum(len(asset.bodies["identity"]) for asset in self.assets.values()),
+            "compressed_bytes": sum(
+                min(len(body) for body in asset.bodies.values()) for asset in self.assets.values()
+            ),
+            "brotli": brotli is not None,
+        }
@@ -0,0 +1,44 @@
+"""
+Production server profile: pre-forked uvicorn workers under gunicorn.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Every setting below can be overridden from the environment:
+  PORT                  listen port (default 9000, the FC custom runtime port)
+  WEB_CONCURRENCY       worker count (default: CPUs available to the container)
+  WORKER_MAX_RSS_MB     recycle a worker gracefully above this RSS (default 768)
+  WORKER_MAX_REQUESTS   recycle a worker after this many requests (default 2000)
+  LOCAL_CACHE_PATH      cache file shared by workers when Redis is unavailable
+  GRACEFUL_TIMEOUT      seconds a stopping worker gets to drain (default 30)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.process import available_cpu_count
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '9000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.environ.get("WEB_CONCURRENCY") or available_cpu_count())
+
+# Match the FC function timeout so gunicorn doesn't kill a slow vision extraction first
+timeout = 120
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Request-count recycling is only a backstop; the memory ceiling (enforced inside
+# each worker by core.process.MemoryWatchdog) is what catches PyMuPDF leaks.
+max_requests = int(os.environ.get("WORKER_MAX_REQUESTS", "2000"))
+max_requests_jitter = max(1, max_requests // 10)
+
+# Workers inherit the master's environment, so these defaults reach Settings.
+os.environ.setdefault("WORKER_MAX_RSS_MB", "768")
+os.environ.setdefault("LOCAL_CACHE_PATH", "/tmp/resume_analyzer/cache.sqlite3")
+
+accesslog = "-"
+errorlog = "-"
+
+
+def worker_exit(server, worker):
+    server.log.info("Worker %s exited; the arbiter will start a replacement.", worker.pid)
@@ -1,10 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse
 from core.config import settings
-from api.resume import router as resume_router
+from core.process import MemoryWatchdog
+from core.admission import Overloaded
+from core.cancellation import CancelToken
+from api.resume import router as resume_router, redis_service, admission, parse_pool, model_router, tenant_limiter
+from api.admin import router as admin_router, profiler
+from core.profiling import ProfilingMiddleware
+from core.static_assets import StaticAssets
+from services.pdf_service import PDFService
+from services.ai_service import AIService
 import os
+import threading
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -21,24 +29,113 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request profiling is opt-in: without a token or sample rate nothing is installed
+if profiler.enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+memory_watchdog = MemoryWatchdog(
+    max_rss_bytes=settings.WORKER_MAX_RSS_MB * 1024 * 1024,
+    interval_seconds=settings.WORKER_MEMORY_CHECK_INTERVAL
+)
+
+@app.on_event("startup")
+async def start_memory_watchdog():
+    memory_watchdog.start()
+
+@app.on_event("shutdown")
+async def stop_memory_watchdog():
+    memory_watchdog.stop()
+
+@app.on_event("startup")
+async def start_parse_pool():
+    # Spawn the PDF parse workers now, so the first upload doesn't wait for them
+    parse_pool.start()
+
+@app.on_event("shutdown")
+async def stop_parse_pool():
+    parse_pool.close()
+
+def _preload_cache_snapshot(path: str):
+    try:
+        counts = redis_service.preload_snapshot(path, settings.CACHE_SNAPSHOT_PRELOAD_MAX)
+        print(f"Preloaded cache snapshot {path}: {counts}")
+    except Exception as e:
+        print(f"Could not preload cache snapshot {path}: {e}")
+
+@app.on_event("startup")
+async def preload_cache_snapshot():
+    # Start warm without holding up startup: entries become hits as they load
+    if settings.CACHE_SNAPSHOT_PATH:
+        threading.Thread(
+            target=_preload_cache_snapshot, args=(settings.CACHE_SNAPSHOT_PATH,), daemon=True
+        ).start()
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # Shed before any parsing or model work; Retry-After is the expected queue wait
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": f"Server is busy ({exc.reason}), please retry later."},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 app.include_router(resume_router, prefix="/api/resume", tags=["Resume"])
+app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 
 # Static directory path
 static_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 
-@app.get("/")
-def read_root():
+_warmed_up = False
+
+@app.get("/healthz")
+def healthz(warm: bool = False):
+    """
+    Liveness probe and warm-up hook.
+    With `?warm=true` the PDF parsers and the DashScope SDK are imported now, so the
+    first real upload after a cold start doesn't pay for them.
+    """
+    global _warmed_up
+    if warm and not _warmed_up:
+        PDFService.warmup()
+        AIService.warmup()
+        _warmed_up = True
+    return {
+        "status": "ok",
+        "warmed_up": _warmed_up,
+        "cache": "redis" if redis_service.client is not None else "memory",
+        "admission": admission.stats(),
+        "tenants": tenant_limiter.stats(),
+        "cancellation": CancelToken.stats,
+        "pdf_parse_pool": parse_pool.stats(),
+        "model_router": model_router.stats(),
+        "static": static_assets.stats(),
+    }
+
+# The frontend is read and precompressed once, then served from memory (core/static_assets.py)
+static_assets = StaticAssets(
+    static_path,
+    max_age=settings.STATIC_MAX_AGE_SECONDS,
+    index_max_age=settings.STATIC_INDEX_MAX_AGE_SECONDS
+)
+
+@app.api_route("/", methods=["GET", "HEAD"])
+def read_root(request: Request):
     # Return the index.html on root
-    index_file = os.path.join(static_path, "index.html")
-    if os.path.exists(index_file):
-        return FileResponse(index_file)
+    response = static_assets.response(request, "index.html", index=True)
+    if response is not None:
+        return response
     return {"message": "Welcome to AI Resume Analyzer API."}
 
-# Mount static files AFTER defining routes to avoid conflicts
-if os.path.exists(static_path):
-    app.mount("/static", StaticFiles(directory=static_path), name="static")
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def read_static(path: str, request: Request):
+    response = static_assets.response(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
 
 if __name__ == "__main__":
+    # Development server. In production use the pre-forked profile:
+    #   gunicorn -c gunicorn.conf.py main:app
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
 
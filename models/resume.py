@@ -25,6 +25,14 @@ class JobDescriptionRequest(BaseModel):
     resume_id: str
     job_description: str
 
+class JobProfile(BaseModel):
+    """Compact requirement profile extracted once per job description."""
+    title: Optional[str] = None
+    skills: List[str] = []
+    min_years: float = 0
+    degree: Optional[str] = None
+    summary: Optional[str] = None # Key responsibilities in a sentence
+
 class MatchResult(BaseModel):
     score: int # 0-100
     skills_match_rate: str
@@ -33,5 +41,48 @@ class MatchResult(BaseModel):
 
 class ResumeMatchResponse(BaseModel):
     resume_id: str
+    job_hash: str  # key of the JD's leaderboard
+    match_result: MatchResult
+    message: str = "Success"
+
+class JobMatchesRequest(BaseModel):
+    job_descriptions: List[str]
+
+class JobMatch(BaseModel):
+    index: int  # position in the request's job_descriptions
+    job_hash: str
     match_result: MatchResult
+    cached: bool = False
+
+class JobMatchesResponse(BaseModel):
+    resume_id: str
+    matches: List[JobMatch]  # best score first
+    message: str = "Success"
+
+class CandidateSummary(BaseModel):
+    resume_id: str
+    name: Optional[str] = None
+    address: Optional[str] = None
+    job_intention: Optional[str] = None
+    work_years: Optional[str] = None
+    education_background: Optional[str] = None
+
+class CandidateSearchResponse(BaseModel):
+    total: int
+    page: int
+    page_size: int
+    results: List[CandidateSummary]
+    message: str = "Success"
+
+class LeaderboardEntry(BaseModel):
+    rank: int  # 1-based, best score first
+    resume_id: str
+    score: int
+
+class LeaderboardResponse(BaseModel):
+    job_hash: str
+    total: int
+    page: int
+    page_size: int
+    results: List[LeaderboardEntry]
     message: str = "Success"
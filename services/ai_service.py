@@ -1,10 +1,23 @@
 import json
-import dashscope
-from typing import List
-from dashscope import Generation
-from models.resume import ResumeData, BasicInfo, MatchResult
+from typing import List, Optional
+from models.resume import ResumeData, BasicInfo, MatchResult, JobProfile
+from services.usage_service import record_model_usage
+
+# The dashscope SDK (and its aiohttp/requests dependency tree) is the slowest
+# import in the app, so it is loaded on the first model call instead.
 
 class AIService:
+    # Page images sent per vision request
+    MAX_VISION_IMAGES = 4
+    # Bump when the scoring prompts (score_resume / score_resume_many) change:
+    # candidate leaderboards are keyed by it, so old scores stop being ranked
+    MATCH_PROMPT_VERSION = "1"
+
+    @staticmethod
+    def warmup():
+        """Import the DashScope SDK ahead of the first model call."""
+        import dashscope  # noqa: F401
+
     @staticmethod
     def _parse_json_result(text: str) -> dict:
         """
@@ -71,13 +84,16 @@ class AIService:
         )
             
     @staticmethod
-    def extract_resume_info(pdf_text: str, api_key: str) -> ResumeData:
+    def extract_resume_info(pdf_text: str, api_key: str, model: str = "qwen-turbo") -> ResumeData:
         """
         Calls DashScope API to extract resume information from text into structured JSON.
+        `model` is picked by ModelRouter (services/model_router.py).
         """
         if not api_key:
             raise Exception("DashScope API Key is not configured")
         
+        import dashscope
+        from dashscope import Generation
         dashscope.api_key = api_key
         
         sys_prompt = AIService._get_extraction_system_prompt()
@@ -89,10 +105,11 @@ class AIService:
         ]
         
         response = Generation.call(
-            model='qwen-turbo',
+            model=model,
             messages=messages,
             result_format='message',
         )
+        record_model_usage(model, response)
 
         if response.status_code == 200:
             result_str = response.output.choices[0]['message']['content']
@@ -102,35 +119,42 @@ class AIService:
             raise Exception(f"DashScope API failed with status {response.status_code}: {response.code} - {response.message}")
 
     @staticmethod
-    def extract_resume_info_from_images(page_images_b64: List[str], api_key: str) -> ResumeData:
+    def extract_resume_info_from_images(page_images_b64: List[str], api_key: str, page_text: str = "",
+                                        model: str = "qwen-vl-max") -> ResumeData:
         """
         Calls DashScope multimodal vision API to extract resume info from PDF page images.
         Used for image-based/vector-drawn PDFs where text extraction fails.
+        `page_text` is the readable text of the pages that were not rendered (a
+        document with only some scanned or garbled pages), sent along as text.
         """
         if not api_key:
             raise Exception("DashScope API Key is not configured")
         
+        import dashscope
+        from dashscope import MultiModalConversation
         dashscope.api_key = api_key
         
         sys_prompt = AIService._get_extraction_system_prompt()
         
         # Build multimodal content with images
         user_content = [{"text": "请仔细分析以下简历图片中的所有文字信息并提取关键信息："}]
-        for img_b64 in page_images_b64[:4]:  # Limit to 4 pages
+        for img_b64 in page_images_b64[:AIService.MAX_VISION_IMAGES]:
             user_content.append({
                 "image": f"data:image/png;base64,{img_b64}"
             })
+        if page_text.strip():
+            user_content.append({"text": f"简历其余页面的文字内容：\n{page_text}"})
 
         messages = [
             {'role': 'system', 'content': [{"text": sys_prompt}]},
             {'role': 'user', 'content': user_content}
         ]
         
-        from dashscope import MultiModalConversation
         response = MultiModalConversation.call(
-            model='qwen-vl-max',
+            model=model,
             messages=messages,
         )
+        record_model_usage(model, response)
 
         if response.status_code == 200:
             result_str = response.output.choices[0]['message']['content'][0]['text']
@@ -141,16 +165,109 @@ class AIService:
             raise Exception(f"DashScope Vision API failed with status {response.status_code}: {response.code} - {response.message}")
 
     @staticmethod
-    def score_resume(resume_data: dict, job_description: str, api_key: str) -> MatchResult:
+    def update_resume_info(previous_data: dict, changed_text: str, api_key: str) -> ResumeData:
+        """
+        Re-extract only what changed in a near-duplicate resume.
+        The model gets the previous ResumeData and the changed sections, which is
+        far fewer tokens than the full resume text.
+        """
+        if not api_key:
+            raise Exception("DashScope API Key is not configured")
+        
+        import dashscope
+        from dashscope import Generation
+        dashscope.api_key = api_key
+        
+        sys_prompt = AIService._get_extraction_system_prompt() + \
+            "\n下面给出的是同一候选人此前的解析结果，以及其简历中新增或修改过的段落。请在此前结果的基础上，仅根据这些段落更新受影响的字段，其余字段保持不变，并返回完整JSON。"
+        previous_str = json.dumps(previous_data, ensure_ascii=False)
+        user_prompt = f"此前的解析结果：\n{previous_str}\n\n新增或修改的段落：\n{changed_text[:3000]}"
+        
+        messages = [
+            {'role': 'system', 'content': sys_prompt},
+            {'role': 'user', 'content': user_prompt}
+        ]
+        
+        response = Generation.call(
+            model='qwen-turbo',
+            messages=messages,
+            result_format='message',
+        )
+        record_model_usage('qwen-turbo', response)
+
+        if response.status_code == 200:
+            result_str = response.output.choices[0]['message']['content']
+            parsed_dict = AIService._parse_json_result(result_str)
+            if not parsed_dict:
+                return AIService._build_resume_data(previous_data)
+            return AIService._build_resume_data(parsed_dict)
+        else:
+            raise Exception(f"DashScope API failed with status {response.status_code}: {response.code} - {response.message}")
+
+    @staticmethod
+    def extract_job_profile(job_description: str, api_key: str) -> JobProfile:
         """
-        Calls DashScope to match the extracted resume data with the job description.
+        Calls DashScope once per job description to condense it into a JobProfile,
+        which then stands in for the JD text in every scoring call.
         """
         if not api_key:
             raise Exception("DashScope API Key is not configured")
         
+        import dashscope
+        from dashscope import Generation
         dashscope.api_key = api_key
         
-        sys_prompt = '''你是一个资深的招聘专家。你需要评估一份已解析的简历提取数据与目标招聘岗位需求描述的匹配程度。
+        sys_prompt = '''你是一个资深的招聘专家。请把给定的招聘岗位需求描述提炼为结构化的要求，严格按照如下JSON格式返回，不要包含其他无关内容：
+{
+    "title": "岗位名称，若无返回null",
+    "skills": ["必备技能关键词，每项不超过10个字，最多15项"],
+    "min_years": 最低工作年限数字，未要求返回0,
+    "degree": "最低学历要求（大专/本科/硕士/博士），未要求返回null",
+    "summary": "核心职责一句话概括（50字以内）"
+}
+'''
+        user_prompt = f"岗位需求：\n{job_description[:3000]}"
+        
+        messages = [
+            {'role': 'system', 'content': sys_prompt},
+            {'role': 'user', 'content': user_prompt}
+        ]
+        
+        response = Generation.call(
+            model='qwen-turbo',
+            messages=messages,
+            result_format='message',
+        )
+        record_model_usage('qwen-turbo', response)
+
+        if response.status_code == 200:
+            result_str = response.output.choices[0]['message']['content']
+            parsed_dict = AIService._parse_json_result(result_str)
+            return JobProfile(
+                title=parsed_dict.get("title"),
+                skills=[str(s) for s in parsed_dict.get("skills") or []],
+                min_years=parsed_dict.get("min_years") or 0,
+                degree=parsed_dict.get("degree"),
+                summary=parsed_dict.get("summary")
+            )
+        else:
+            raise Exception(f"DashScope API failed with status {response.status_code}: {response.code} - {response.message}")
+
+    @staticmethod
+    def score_resume(resume_data: dict, job_profile: dict, api_key: str, prescore: Optional[dict] = None) -> MatchResult:
+        """
+        Calls DashScope to match the extracted resume data with the job requirements.
+        `job_profile` is the cached JobProfile of the JD (see JobDescriptionService),
+        `prescore` the local rule-based comparison, given to the model as a hint.
+        """
+        if not api_key:
+            raise Exception("DashScope API Key is not configured")
+        
+        import dashscope
+        from dashscope import Generation
+        dashscope.api_key = api_key
+        
+        sys_prompt = '''你是一个资深的招聘专家。你需要评估一份已解析的简历提取数据与目标岗位结构化要求的匹配程度。
 请分析后给出一个匹配度打分（0-100的整数），并给出各项的匹配评价，严格按照如下JSON格式返回：
 {
     "score": 匹配度打分整数值,
@@ -159,8 +276,13 @@ class AIService:
     "comment": "综合短评（50字内）"
 }
 '''
-        resume_str = json.dumps(resume_data, ensure_ascii=False)
-        user_prompt = f"岗位需求：\n{job_description[:1000]}\n\n简历摘要数据：\n{resume_str}"
+        separators = (",", ":")
+        profile_str = json.dumps(job_profile, ensure_ascii=False, separators=separators)
+        resume_str = json.dumps(resume_data, ensure_ascii=False, separators=separators)
+        user_prompt = f"岗位要求：\n{profile_str}\n\n简历摘要数据：\n{resume_str}"
+        if prescore:
+            hint = {k: prescore[k] for k in ("matched_skills", "missing_skills") if k in prescore}
+            user_prompt += f"\n\n关键词预比对：\n{json.dumps(hint, ensure_ascii=False, separators=separators)}"
         
         messages = [
             {'role': 'system', 'content': sys_prompt},
@@ -172,16 +294,88 @@ class AIService:
             messages=messages,
             result_format='message',
         )
+        record_model_usage('qwen-turbo', response)
         
         if response.status_code == 200:
             result_str = response.output.choices[0]['message']['content']
             parsed_dict = AIService._parse_json_result(result_str)
-            
-            return MatchResult(
-                score=parsed_dict.get('score', 0),
-                skills_match_rate=parsed_dict.get('skills_match_rate', "N/A"),
-                experience_relevance=parsed_dict.get('experience_relevance', 'N/A'),
-                comment=parsed_dict.get('comment', '解析失败或模型未给出标准格式')
-            )
+            return AIService._build_match_result(parsed_dict)
+        else:
+            raise Exception(f"DashScope API failed during match with status {response.status_code}: {response.code}")
+
+    @staticmethod
+    def _build_match_result(parsed_dict: dict) -> MatchResult:
+        return MatchResult(
+            score=parsed_dict.get('score', 0),
+            skills_match_rate=parsed_dict.get('skills_match_rate', "N/A"),
+            experience_relevance=parsed_dict.get('experience_relevance', 'N/A'),
+            comment=parsed_dict.get('comment', '解析失败或模型未给出标准格式')
+        )
+
+    @staticmethod
+    def score_resume_many(resume_data: dict, job_profiles: List[dict], api_key: str,
+                          prescores: Optional[List[dict]] = None) -> List[Optional[MatchResult]]:
+        """
+        Score one resume against several job profiles in a single call: the resume
+        is sent once, the jobs are numbered. Results are in `job_profiles` order;
+        a job the model left out of its answer is None (score it on its own).
+        """
+        if not api_key:
+            raise Exception("DashScope API Key is not configured")
+
+        import dashscope
+        from dashscope import Generation
+        dashscope.api_key = api_key
+
+        sys_prompt = '''你是一个资深的招聘专家。你需要评估一份已解析的简历提取数据与多个目标岗位结构化要求的匹配程度。
+请对每个岗位分别给出一个匹配度打分（0-100的整数）及各项匹配评价，严格按照如下JSON格式返回，results 中每个岗位一项，job 为岗位编号：
+{
+    "results": [
+        {
+            "job": 岗位编号,
+            "score": 匹配度打分整数值,
+            "skills_match_rate": "技能要求匹配度分析及百分比感觉",
+            "experience_relevance": "经验与行业相关性分析",
+            "comment": "综合短评（50字内）"
+        }
+    ]
+}
+'''
+        separators = (",", ":")
+        jobs = []
+        for number, profile in enumerate(job_profiles, start=1):
+            job = {"job": number, "requirements": profile}
+            if prescores and prescores[number - 1]:
+                job["keyword_check"] = {k: prescores[number - 1][k] for k in ("matched_skills", "missing_skills")
+                                        if k in prescores[number - 1]}
+            jobs.append(job)
+        resume_str = json.dumps(resume_data, ensure_ascii=False, separators=separators)
+        jobs_str = json.dumps(jobs, ensure_ascii=False, separators=separators)
+        user_prompt = f"简历摘要数据：\n{resume_str}\n\n岗位列表（keyword_check 为关键词预比对）：\n{jobs_str}"
+
+        messages = [
+            {'role': 'system', 'content': sys_prompt},
+            {'role': 'user', 'content': user_prompt}
+        ]
+
+        response = Generation.call(
+            model='qwen-turbo',
+            messages=messages,
+            result_format='message',
+        )
+        record_model_usage('qwen-turbo', response)
+
+        if response.status_code == 200:
+            result_str = response.output.choices[0]['message']['content']
+            parsed_dict = AIService._parse_json_result(result_str)
+            results: List[Optional[MatchResult]] = [None] * len(job_profiles)
+            for item in parsed_dict.get("results") or []:
+                try:
+                    index = int(item.get("job")) - 1
+                except (AttributeError, TypeError, ValueError):
+                    continue
+                if 0 <= index < len(results) and results[index] is None:
+                    results[index] = AIService._build_match_result(item)
+            return results
         else:
             raise Exception(f"DashScope API failed during match with status {response.status_code}: {response.code}")
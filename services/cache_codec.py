@@ -0,0 +1,196 @@
+import json
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Optional, Union
+
+# Optional accelerators: orjson for (de)serialization, zstandard for compression.
+# Without them the codec falls back to the json module and zlib.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Encoded values start with this byte. 0xC1 never occurs in UTF-8 text, so it can
+# never be confused with a legacy plain-JSON entry written before the codec existed.
+MAGIC = 0xC1
+RAW, ZLIB, ZSTD = 0, 1, 2
+
+
+def dumps_compact(obj: Any) -> bytes:
+    """Compact UTF-8 JSON, byte-identical to what FastAPI renders for the same dict."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class CacheCodec:
+    """
+    Binary format for cached values.
+
+    Layout: MAGIC, one compression byte (RAW/ZLIB/ZSTD), then the payload, which is
+    compact JSON, optionally compressed. zstd can use a shared dictionary trained on
+    real entries (see `train_dictionary`). Resume and match JSON is small and
+    repetitive, so a dictionary is what makes compressing it worthwhile.
+
+    The payload stays JSON rather than msgpack so a cache hit can be spliced
+    straight into an HTTP response body without decoding (see api/resume.py).
+
+    `decode` also accepts the plain JSON strings written by earlier versions, so
+    old and new entries can be read side by side during migration.
+    """
+
+    def __init__(self, compression: str = "auto", level: int = 3, min_size: int = 64,
+                 zstd_dict: Optional[bytes] = None):
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "zlib"
+        if compression == "zstd" and zstandard is None:
+            print("zstandard is not installed, falling back to zlib cache compression.")
+            compression = "zlib"
+        self.compression = compression
+        self.level = level
+        self.min_size = min_size
+        self._zstd_dict = zstandard.ZstdCompressionDict(zstd_dict) if (zstd_dict and zstandard) else None
+        # zstd (de)compressor objects must not be shared between threads
+        self._local = threading.local()
+        # keyspace -> {"entries", "stored_bytes", "json_bytes"}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "CacheCodec":
+        """Codec configured from core.config Settings (CACHE_* values)."""
+        zstd_dict = None
+        if settings.CACHE_ZSTD_DICT_PATH:
+            try:
+                with open(settings.CACHE_ZSTD_DICT_PATH, "rb") as f:
+                    zstd_dict = f.read()
+            except OSError as e:
+                print(f"Could not read cache zstd dictionary, compressing without it: {e}")
+        return cls(
+            compression=settings.CACHE_COMPRESSION,
+            min_size=settings.CACHE_COMPRESS_MIN_BYTES,
+            zstd_dict=zstd_dict
+        )
+
+    def _zstd_compress(self, data: bytes) -> bytes:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._zstd_dict)
+        return compressor.compress(data)
+
+    def _zstd_decompress(self, data: bytes) -> bytes:
+        if zstandard is None:
+            raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor(dict_data=self._zstd_dict)
+        return decompressor.decompress(data)
+
+    def encode_json(self, json_bytes: bytes, keyspace: str = "other") -> bytes:
+        """Wrap already-serialized compact JSON."""
+        method, payload = RAW, json_bytes
+        if len(json_bytes) >= self.min_size and self.compression != "none":
+            if self.compression == "zstd":
+                compressed, candidate = self._zstd_compress(json_bytes), ZSTD
+            else:
+                compressed, candidate = zlib.compress(json_bytes, 6), ZLIB
+            if len(compressed) < len(json_bytes):
+                method, payload = candidate, compressed
+        encoded = bytes((MAGIC, method)) + payload
+        self._record(keyspace, len(encoded), len(json_bytes))
+        return encoded
+
+    def encode(self, obj: Any, keyspace: str = "other") -> bytes:
+        return self.encode_json(dumps_compact(obj), keyspace)
+
+    def decode_json(self, raw: Union[bytes, str, None]) -> Optional[bytes]:
+        """Compact JSON bytes for a stored value (new or legacy format), None for no value."""
+        if raw is None or raw == b"" or raw == "":
+            return None
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        if raw[0] != MAGIC:
+            # Legacy plain JSON entry: normalize it to the compact form
+            return dumps_compact(loads(raw))
+        method, payload = raw[1], raw[2:]
+        if method == RAW:
+            return payload
+        if method == ZLIB:
+            return zlib.decompress(payload)
+        if method == ZSTD:
+            return self._zstd_decompress(payload)
+        raise ValueError(f"Unknown cache compression method {method}")
+
+    def decode(self, raw: Union[bytes, str, None]) -> Any:
+        json_bytes = self.decode_json(raw)
+        return loads(json_bytes) if json_bytes is not None else None
+
+    def _record(self, keyspace: str, stored_bytes: int, json_bytes: int):
+        entry = self.stats.setdefault(keyspace, {"entries": 0, "stored_bytes": 0, "json_bytes": 0})
+        entry["entries"] += 1
+        entry["stored_bytes"] += stored_bytes
+        entry["json_bytes"] += json_bytes
+
+    def stats_summary(self) -> Dict[str, dict]:
+        """Bytes per entry and compression ratio for everything written by this process."""
+        summary = {}
+        for keyspace, entry in self.stats.items():
+            entries = entry["entries"] or 1
+            summary[keyspace] = {
+                "entries_written": entry["entries"],
+                "avg_stored_bytes": round(entry["stored_bytes"] / entries, 1),
+                "avg_json_bytes": round(entry["json_bytes"] / entries, 1),
+                "compression_ratio": round(entry["json_bytes"] / entry["stored_bytes"], 2) if entry["stored_bytes"] else 0.0,
+            }
+        return {"compression": self.compression, "zstd_dictionary": self._zstd_dict is not None, "keyspaces": summary}
+
+    @staticmethod
+    def train_dictionary(samples: Iterable[bytes], size: int = 16 * 1024) -> bytes:
+        """Train a zstd dictionary from sample JSON payloads (needs zstandard)."""
+        if zstandard is None:
+            raise RuntimeError("Training a dictionary requires the zstandard package")
+        return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+
+if __name__ == "__main__":
+    # Train a dictionary from the entries currently in Redis:
+    #   python -m services.cache_codec cache.dict [--host H] [--port P] [--db N]
+    import argparse
+    import redis
+
+    parser = argparse.ArgumentParser(description="Train a zstd dictionary for CACHE_ZSTD_DICT_PATH")
+    parser.add_argument("output")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--db", type=int, default=0)
+    parser.add_argument("--size", type=int, default=16 * 1024)
+    parser.add_argument("--max-samples", type=int, default=5000)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=args.host, port=args.port, db=args.db)
+    codec = CacheCodec(compression="none")
+    samples = []
+    for key in client.scan_iter(match="resume_data:*", count=500):
+        value = codec.decode_json(client.get(key))
+        if value:
+            samples.append(value)
+        if len(samples) >= args.max_samples:
+            break
+    for key in client.scan_iter(match="matches:*", count=500):
+        # Skip the per-match expiry fields (plain timestamps)
+        samples.extend(codec.decode_json(v) for k, v in client.hgetall(key).items() if not k.endswith(b":exp"))
+        if len(samples) >= 2 * args.max_samples:
+            break
+    with open(args.output, "wb") as f:
+        f.write(CacheCodec.train_dictionary(samples, args.size))
+    print(f"Trained a {args.size}-byte dictionary from {len(samples)} entries -> {args.output}")
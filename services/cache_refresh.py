@@ -0,0 +1,103 @@
+import math
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RefreshPolicy:
+    """
+    Soft/hard expiry for cache entries that are worth keeping warm.
+
+    An entry written with a (soft) TTL of T is stored in Redis for T + grace
+    seconds, so the remaining Redis TTL says where it stands:
+      * ttl > grace: fresh
+      * ttl <= grace: past its soft expiry -- still served (stale), but due for
+        a refresh; it disappears when the hard TTL runs out
+    Entries are refreshed only if they are hot: every read is counted in a
+    per-process table whose counts are halved every `window_seconds`, and keys
+    read fewer than `min_hits` times per window are left to expire.
+
+    Refreshes of hot keys are spread out with probabilistic early expiration
+    (XFetch, Vattani et al. 2015): a read refreshes early when
+        recompute_seconds * beta * -ln(random()) >= seconds until soft expiry
+    so entries that are expensive to recompute are refreshed a little earlier,
+    and concurrent readers of the same key don't all decide at the same moment.
+    The caller makes sure only one of them actually refreshes (a Redis lock, see
+    RedisService.claim_refresh).
+    """
+
+    def __init__(self, grace_seconds: int, beta: float = 1.0, min_hits: int = 3,
+                 window_seconds: float = 3600, max_tracked: int = 100000):
+        self.grace_seconds = grace_seconds
+        self.beta = beta
+        self.min_hits = min_hits
+        self.window_seconds = window_seconds
+        self.max_tracked = max_tracked
+        self._hits: Dict[str, float] = {}
+        # Moving average of the time it takes to recompute an entry, per keyspace
+        self._recompute: Dict[str, float] = {}
+        self._decayed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"stale_hits": 0, "early_refreshes": 0, "refreshes": 0, "cold_skipped": 0}
+
+    def hard_ttl(self, expire_seconds: int) -> int:
+        """Redis TTL for an entry whose soft TTL is `expire_seconds`."""
+        return expire_seconds + self.grace_seconds
+
+    def record_access(self, key: str) -> float:
+        """Count a read of `key`; returns its (decayed) hit count."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._decayed_at >= self.window_seconds or len(self._hits) > self.max_tracked:
+                self._hits = {k: v / 2 for k, v in self._hits.items() if v >= 1}
+                self._decayed_at = now
+            hits = self._hits.get(key, 0) + 1
+            self._hits[key] = hits
+            return hits
+
+    def record_recompute(self, keyspace: str, seconds: float):
+        previous = self._recompute.get(keyspace)
+        self._recompute[keyspace] = seconds if previous is None else 0.8 * previous + 0.2 * seconds
+
+    def recompute_seconds(self, keyspace: str, default: float = 0.0) -> float:
+        return self._recompute.get(keyspace, default)
+
+    def should_refresh(self, key: str, ttl: Optional[int], recompute_seconds: float = 0.0) -> bool:
+        """
+        Record a cache hit on `key`, whose Redis TTL is `ttl`, and decide whether
+        it should be refreshed now. Entries without a TTL are never refreshed.
+        """
+        if ttl is None or ttl < 0:
+            self.record_access(key)
+            return False
+        return self.should_refresh_in(key, ttl - self.grace_seconds, recompute_seconds)
+
+    def should_refresh_in(self, key: str, soft_remaining: float, recompute_seconds: float = 0.0) -> bool:
+        """
+        The same for an entry `soft_remaining` seconds from its soft expiry
+        (negative once stale), for entries that record their own expiry.
+        """
+        hits = self.record_access(key)
+        if soft_remaining <= 0:
+            self.counters["stale_hits"] += 1
+            early = False
+        elif recompute_seconds > 0:
+            early = recompute_seconds * self.beta * -math.log(1.0 - random.random()) >= soft_remaining
+            if not early:
+                return False
+        else:
+            return False
+        if hits < self.min_hits:
+            self.counters["cold_skipped"] += 1
+            return False
+        self.counters["early_refreshes" if early else "refreshes"] += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "grace_seconds": self.grace_seconds,
+            "tracked_keys": len(self._hits),
+            "recompute_seconds": {k: round(v, 3) for k, v in self._recompute.items()},
+            **self.counters,
+        }
@@ -0,0 +1,157 @@
+"""
+Cache snapshot files: resume data and match results with their remaining TTLs.
+
+Written by RedisService.export_snapshot and read by import_snapshot (into
+another Redis: instance rotation, a new region) and preload_snapshot (into the
+local tier of a fresh instance at boot, CACHE_SNAPSHOT_PATH), so none of it has
+to go through the model again.
+
+The file is a gzip stream: a header (MAGIC, export time) followed by one record
+per resume_data key, matches hash or legacy match key:
+
+    kind (1 byte)  ttl_ms (int64, -1 = no expiry)  resume_id
+    field count (uint32)  then per field: name, value
+
+where every byte string is a uint32 length plus the bytes. resume_data and
+legacy match records have one field (an empty name / the job hash); a matches
+record has one per job hash, plus the "<job hash>:exp" soft expiry of each. Keys are stored as (kind, resume_id, field), not
+as Redis keys, so a snapshot taken from a single node can be imported into a
+sharded setup (whose keys are hash-tagged) and vice versa. Values are copied as
+stored (CacheCodec bytes): importing zstd-dictionary entries needs the same
+CACHE_ZSTD_DICT_PATH.
+
+Import subtracts the time since export from each TTL and drops entries that
+have expired in the meantime.
+"""
+import gzip
+import struct
+import time
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Tuple
+
+MAGIC = b"RCSNAP\x01"
+RESUME_DATA = b"r"
+MATCHES = b"m"
+LEGACY_MATCH = b"l"
+# Redis key prefix per kind
+KEYSPACES = {RESUME_DATA: "resume_data", MATCHES: "matches", LEGACY_MATCH: "match"}
+
+_U32 = struct.Struct(">I")
+_RECORD = struct.Struct(">cq")
+_HEADER = struct.Struct(">d")
+
+
+class SnapshotRecord(NamedTuple):
+    kind: bytes
+    resume_id: str
+    # -1: no expiry
+    ttl_ms: int
+    # field name -> stored value ({"": value} for resume data)
+    fields: Dict[str, bytes]
+
+
+def parse_key(key: bytes) -> Tuple[bytes, str, str]:
+    """(kind, resume_id, job_hash or "") of a cache key, hash-tagged or not."""
+    text = key.decode("utf-8")
+    prefix, _, rest = text.partition(":")
+    kind = {keyspace: kind for kind, keyspace in KEYSPACES.items()}.get(prefix)
+    if kind is None or not rest:
+        raise ValueError(f"Not a snapshot keyspace: {text}")
+    job_hash = ""
+    if kind == LEGACY_MATCH:
+        rest, _, job_hash = rest.rpartition(":")
+    return kind, rest.strip("{}"), job_hash
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise EOFError("Truncated cache snapshot")
+    return data
+
+
+def _read_bytes(f: BinaryIO) -> bytes:
+    (size,) = _U32.unpack(_read_exact(f, _U32.size))
+    return _read_exact(f, size)
+
+
+class SnapshotWriter:
+    """Streams records into a snapshot file (use as a context manager)."""
+
+    def __init__(self, path: str, compresslevel: int = 6):
+        self._file = gzip.open(path, "wb", compresslevel=compresslevel)
+        self._file.write(MAGIC + _HEADER.pack(time.time()))
+        self.records = 0
+
+    def write(self, record: SnapshotRecord):
+        resume_id = record.resume_id.encode("utf-8")
+        parts = [_RECORD.pack(record.kind, record.ttl_ms), _U32.pack(len(resume_id)), resume_id,
+                 _U32.pack(len(record.fields))]
+        for field, value in record.fields.items():
+            name = field.encode("utf-8")
+            parts += [_U32.pack(len(name)), name, _U32.pack(len(value)), value]
+        self._file.write(b"".join(parts))
+        self.records += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_snapshot(path: str) -> Iterator[Tuple[SnapshotRecord, float]]:
+    """(record, seconds since the export) for each record of a snapshot file."""
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a cache snapshot")
+        (exported_at,) = _HEADER.unpack(_read_exact(f, _HEADER.size))
+        age = max(0.0, time.time() - exported_at)
+        while True:
+            head = f.read(_RECORD.size)
+            if not head:
+                return
+            if len(head) != _RECORD.size:
+                raise EOFError("Truncated cache snapshot")
+            kind, ttl_ms = _RECORD.unpack(head)
+            resume_id = _read_bytes(f).decode("utf-8")
+            (count,) = _U32.unpack(_read_exact(f, _U32.size))
+            fields = {}
+            for _ in range(count):
+                name = _read_bytes(f).decode("utf-8")
+                fields[name] = _read_bytes(f)
+            yield SnapshotRecord(kind, resume_id, ttl_ms, fields), age
+
+
+if __name__ == "__main__":
+    # Copy the cache between Redis deployments (REDIS_* settings from the environment / .env):
+    #   python -m services.cache_snapshot export cache.snap.gz
+    #   python -m services.cache_snapshot import cache.snap.gz [--overwrite]
+    import argparse
+    import json
+
+    from core.config import settings
+    from services.cache_codec import CacheCodec
+    from services.redis_service import RedisService
+
+    parser = argparse.ArgumentParser(description="Export / import resume and match cache entries")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path")
+    parser.add_argument("--overwrite", action="store_true", help="Import over entries that already exist")
+    args = parser.parse_args()
+
+    service = RedisService(
+        host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD, codec=CacheCodec.from_settings(settings),
+        nodes=settings.REDIS_NODES.split(","), cluster=settings.REDIS_CLUSTER,
+        node_retry_seconds=settings.REDIS_NODE_RETRY_SECONDS
+    )
+    if service.client is None:
+        parser.error("Redis is not reachable")
+    if args.action == "export":
+        summary = service.export_snapshot(args.path)
+    else:
+        summary = service.import_snapshot(args.path, overwrite=args.overwrite)
+    print(json.dumps(summary))
@@ -0,0 +1,154 @@
+import hashlib
+import random
+import re
+from typing import List, Optional, Tuple
+
+# MinHash parameters: 64 permutations split into 16 LSH bands of 4 rows.
+# Two documents become LSH candidates with probability 1-(1-s^4)^16, which is
+# ~0.5 at Jaccard similarity s=0.5 and >0.99 at s=0.8.
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240229)  # fixed seed: signatures must be stable across processes and deploys
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+# One CJK character or one run of latin letters/digits is a token
+_TOKEN_RE = re.compile(r"[一-鿿]|[a-z0-9@.+#]+")
+_SECTION_HEADER_RE = re.compile(
+    r"^(=+.*=+|#+\s*.+|"
+    r"(个人信息|基本信息|求职意向|教育背景|教育经历|工作经历|工作经验|项目经历|项目经验|专业技能|技能特长|"
+    r"自我评价|获奖情况|证书|"
+    r"education|experience|work experience|employment|projects?|skills|summary|profile|"
+    r"certifications?|awards|objective|job intention)\b.{0,20}[:：]?)$",
+    re.IGNORECASE
+)
+
+
+class FingerprintService:
+    """
+    Content fingerprints for recognising the same resume across re-exports.
+
+    `resume_id` is the MD5 of the file bytes, so a re-exported PDF (new metadata,
+    fonts, producer) or a one-line edit looks like a brand-new document. The
+    fingerprint is computed on the extracted text instead:
+      * `text_hash`: hash of the normalized text, catches exact content duplicates
+      * `signature`: MinHash over token shingles, indexed with LSH bands, catches
+        near duplicates
+      * `sections`: per-section hashes, so a near duplicate can be diffed and
+        only the changed sections sent to the model
+    """
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Lowercase and collapse whitespace; formatting-only differences disappear."""
+        return " ".join(text.lower().split())
+
+    @staticmethod
+    def _tokens(normalized: str) -> List[str]:
+        return _TOKEN_RE.findall(normalized)
+
+    @staticmethod
+    def _hash64(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+    @staticmethod
+    def minhash(normalized: str) -> List[int]:
+        tokens = FingerprintService._tokens(normalized)
+        if len(tokens) < SHINGLE_SIZE:
+            shingles = {" ".join(tokens)}
+        else:
+            shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+        hashes = [FingerprintService._hash64(s) for s in shingles]
+        return [
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in _PERMUTATIONS
+        ]
+
+    @staticmethod
+    def lsh_bands(signature: List[int]) -> List[str]:
+        """One bucket key per band; documents sharing any bucket are candidates."""
+        bands = []
+        for band in range(LSH_BANDS):
+            rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            digest = hashlib.md5(",".join(map(str, rows)).encode()).hexdigest()[:16]
+            bands.append(f"{band}:{digest}")
+        return bands
+
+    @staticmethod
+    def similarity(signature_a: List[int], signature_b: List[int]) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        if not signature_a or len(signature_a) != len(signature_b):
+            return 0.0
+        return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+    @staticmethod
+    def split_sections(text: str) -> List[str]:
+        """Split resume text on recognisable section headers (教育经历, Skills, === X === ...)."""
+        sections, current = [], []
+        for line in text.split("\n"):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if current and len(stripped) <= 40 and _SECTION_HEADER_RE.match(stripped):
+                sections.append("\n".join(current))
+                current = []
+            current.append(stripped)
+        if current:
+            sections.append("\n".join(current))
+        return sections
+
+    @staticmethod
+    def _section_hash(section: str) -> str:
+        return hashlib.md5(FingerprintService.normalize_text(section).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def fingerprint(text: str) -> dict:
+        normalized = FingerprintService.normalize_text(text)
+        return {
+            "text_hash": hashlib.sha1(normalized.encode("utf-8")).hexdigest(),
+            "signature": FingerprintService.minhash(normalized),
+            "sections": [FingerprintService._section_hash(s) for s in FingerprintService.split_sections(text)],
+        }
+
+    @staticmethod
+    def changed_sections(text: str, previous_fingerprint: dict) -> List[str]:
+        """Sections of `text` whose content does not appear in the previous version."""
+        known = set(previous_fingerprint.get("sections", []))
+        return [s for s in FingerprintService.split_sections(text)
+                if FingerprintService._section_hash(s) not in known]
+
+    @staticmethod
+    def find_duplicate(fingerprint: dict, redis_service, threshold: float) -> Optional[Tuple[str, float]]:
+        """
+        Look up a previously analyzed resume with the same or near-identical content.
+        Returns (resume_id, similarity) of the best match at or above `threshold`,
+        or None. Only resumes whose ResumeData is still cached are considered.
+        """
+        resume_id = redis_service.get_resume_id_by_text_hash(fingerprint["text_hash"])
+        if resume_id and redis_service.get_resume_data(resume_id):
+            return resume_id, 1.0
+
+        best: Optional[Tuple[str, float]] = None
+        candidates = redis_service.get_lsh_candidates(FingerprintService.lsh_bands(fingerprint["signature"]))
+        for candidate_id in candidates:
+            candidate_fp = redis_service.get_fingerprint(candidate_id)
+            if not candidate_fp:
+                continue
+            score = FingerprintService.similarity(fingerprint["signature"], candidate_fp["signature"])
+            if score >= threshold and (best is None or score > best[1]) and redis_service.get_resume_data(candidate_id):
+                best = (candidate_id, score)
+        return best
+
+    @staticmethod
+    def index(resume_id: str, fingerprint: dict, redis_service):
+        """Register a resume's fingerprint so later uploads can find it."""
+        redis_service.cache_fingerprint(resume_id, fingerprint)
+        redis_service.index_text_hash(fingerprint["text_hash"], resume_id)
+        redis_service.add_to_lsh(FingerprintService.lsh_bands(fingerprint["signature"]), resume_id)
+
@@ -0,0 +1,148 @@
+import math
+from typing import List, Tuple
+
+# qwen-vl bills one token per 28x28 pixel patch and downscales anything above
+# max_pixels (1280 patches) on its side, so pixels beyond that are paid for in
+# payload bytes and upload time but never seen by the model.
+VISION_PATCH = 28
+VISION_DEFAULT_MAX_PIXELS = 1280 * VISION_PATCH * VISION_PATCH
+
+_PROBE_DPI = 36
+_INK = bytes(1 if v < 200 else 0 for v in range(256))
+_MIDTONE = bytes(1 if 64 <= v <= 192 else 0 for v in range(256))
+
+
+def estimate_vision_tokens(width: int, height: int, max_pixels: int = VISION_DEFAULT_MAX_PIXELS) -> int:
+    """Approximate qwen-vl image tokens: the image is resized to whole 28px patches."""
+    if width * height > max_pixels:
+        scale = math.sqrt(max_pixels / (width * height))
+        columns, rows = math.floor(width * scale / VISION_PATCH), math.floor(height * scale / VISION_PATCH)
+    else:
+        columns, rows = round(width / VISION_PATCH), round(height / VISION_PATCH)
+    return max(4, max(1, columns) * max(1, rows))
+
+
+class PageImagePreprocessor:
+    """
+    Turns a PDF page into the smallest image(s) that still carry its text for the
+    vision model:
+      * near-blank pages are skipped
+      * the page is cropped to its ink bounding box (plus a margin)
+      * pages without color are rendered in grayscale; high-DPI renders of plain
+        black-on-white text (no photos or shading) are also binarized. At the
+        default ~100 DPI the anti-aliasing is kept, it helps legibility there.
+      * the render uses `target_dpi`, about the resolution qwen-vl ends up seeing
+        of a full A4 page sent at any DPI (it downscales to max_pixels), capped
+        by `max_edge` and `max_pixels`: cropping then cuts tokens, not legibility
+      * optionally, dense pages are split into two overlapping tiles rendered at
+        the full requested DPI, for small print that needs more detail
+    Everything is done with PyMuPDF pixmaps; decisions are made on a low-DPI probe.
+    """
+
+    def __init__(self, target_dpi: int = 100, max_edge: int = 1600, max_pixels: int = VISION_DEFAULT_MAX_PIXELS,
+                 crop: bool = True, grayscale: bool = True, binarize: bool = True,
+                 skip_blank: bool = True, tile_dense: bool = False,
+                 blank_ink_ratio: float = 0.002, dense_ink_ratio: float = 0.12,
+                 margin: float = 12.0, binarize_threshold: int = 160, binarize_min_dpi: int = 150):
+        self.target_dpi = target_dpi
+        self.max_edge = max_edge
+        self.max_pixels = max_pixels
+        self.crop = crop
+        self.grayscale = grayscale
+        self.binarize = binarize
+        self.skip_blank = skip_blank
+        self.tile_dense = tile_dense
+        self.blank_ink_ratio = blank_ink_ratio
+        self.dense_ink_ratio = dense_ink_ratio
+        self.margin = margin
+        self.binarize_min_dpi = binarize_min_dpi
+        self._threshold = bytes(0 if v < binarize_threshold else 255 for v in range(256))
+
+    def _probe(self, page) -> Tuple[float, object, bool]:
+        """(ink ratio, ink bounding box in page coordinates, has color) from a low-DPI render."""
+        import fitz  # PyMuPDF
+        zoom = _PROBE_DPI / 72
+        gray = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+        width, height = gray.width, gray.height
+        ink = gray.samples.translate(_INK)
+        ink_ratio = ink.count(1) / max(1, len(ink))
+
+        top = bottom = None
+        left, right = width, -1
+        stride = gray.stride
+        for y in range(height):
+            row = ink[y * stride:y * stride + width]
+            first = row.find(1)
+            if first < 0:
+                continue
+            if top is None:
+                top = y
+            bottom = y
+            left = min(left, first)
+            right = max(right, row.rfind(1))
+        bbox = None
+        if top is not None:
+            bbox = fitz.Rect(left / zoom, top / zoom, (right + 1) / zoom, (bottom + 1) / zoom)
+
+        rgb = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csRGB, alpha=False)
+        samples = rgb.samples
+        colored = checked = 0
+        for i in range(0, len(samples) - 2, 3 * 4):  # every 4th pixel is plenty
+            r, g, b = samples[i], samples[i + 1], samples[i + 2]
+            checked += 1
+            if max(r, g, b) - min(r, g, b) > 40:
+                colored += 1
+        return ink_ratio, bbox, colored > checked * 0.005
+
+    def _zoom_for(self, clip, dpi: int) -> float:
+        zoom = dpi / 72
+        longest = max(clip.width, clip.height)
+        if longest * zoom > self.max_edge:
+            zoom = self.max_edge / longest
+        if clip.width * clip.height * zoom * zoom > self.max_pixels:
+            zoom = math.sqrt(self.max_pixels / (clip.width * clip.height))
+        return zoom
+
+    def _tiles(self, clip, ink_ratio: float) -> List[object]:
+        if not (self.tile_dense and ink_ratio >= self.dense_ink_ratio and clip.height > clip.width):
+            return [clip]
+        import fitz  # PyMuPDF
+        overlap = 24.0  # points, so a line cut by the seam appears whole in one tile
+        middle = clip.y0 + clip.height / 2
+        return [
+            fitz.Rect(clip.x0, clip.y0, clip.x1, min(clip.y1, middle + overlap)),
+            fitz.Rect(clip.x0, max(clip.y0, middle - overlap), clip.x1, clip.y1),
+        ]
+
+    def render(self, page, dpi: int = 200) -> List[bytes]:
+        """PNG bytes for the page (one per tile); empty for a near-blank page."""
+        import fitz  # PyMuPDF
+        ink_ratio, bbox, has_color = self._probe(page)
+        if self.skip_blank and (bbox is None or ink_ratio < self.blank_ink_ratio):
+            return []
+
+        clip = page.rect
+        if self.crop and bbox is not None:
+            clip = (bbox + (-self.margin, -self.margin, self.margin, self.margin)) & page.rect
+
+        colorspace = fitz.csGRAY if (self.grayscale and not has_color) else fitz.csRGB
+        tiles = self._tiles(clip, ink_ratio)
+        tile_dpi = dpi if len(tiles) > 1 else min(dpi, self.target_dpi)
+        images = []
+        for tile in tiles:
+            zoom = self._zoom_for(tile, tile_dpi)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=tile, colorspace=colorspace, alpha=False)
+            if colorspace is fitz.csGRAY and self.binarize and zoom * 72 >= self.binarize_min_dpi:
+                pix = self._binarized(pix)
+            images.append(pix.tobytes("png"))
+        return images
+
+    def _binarized(self, pix):
+        """Black-and-white copy of a grayscale pixmap, unless it has real gray content (photos, shading)."""
+        import fitz  # PyMuPDF
+        samples = pix.samples
+        if pix.stride != pix.width:
+            return pix
+        if samples.translate(_MIDTONE).count(1) > len(samples) * 0.08:
+            return pix
+        return fitz.Pixmap(fitz.csGRAY, pix.width, pix.height, samples.translate(self._threshold), 0)
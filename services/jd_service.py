@@ -0,0 +1,163 @@
+import hashlib
+import re
+import unicodedata
+from typing import List, Optional
+
+from models.resume import JobProfile
+from services.search_service import parse_work_years
+
+# Latin skill tokens (python, c++, c#, node.js, k8s) and a few common CJK skill phrases
+_SKILL_RE = re.compile(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+_CJK_SKILLS = (
+    "机器学习", "深度学习", "自然语言处理", "计算机视觉", "数据分析", "数据挖掘", "推荐系统",
+    "分布式", "微服务", "高并发", "消息队列", "前端", "后端", "算法", "测试", "运维",
+)
+_NOT_SKILLS = {
+    "and", "or", "with", "the", "of", "in", "at", "for", "a", "an", "to", "on", "is", "are", "be",
+    "years", "year", "yrs", "experience", "experienced", "senior", "junior", "engineer", "developer",
+    "required", "requirements", "preferred", "plus", "strong", "good", "knowledge", "skills",
+    "familiar", "team", "work", "working", "degree", "bachelor", "master", "phd", "above",
+    "we", "you", "our", "will", "must", "etc", "e.g", "ability", "least", "using", "build",
+}
+_YEARS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:年|years?|yrs?)", re.IGNORECASE)
+
+# Lowest to highest; the first keyword of each level is its canonical name
+_DEGREE_LEVELS = (
+    ("大专", "专科", "associate"),
+    ("本科", "学士", "bachelor", "b.s"),
+    ("硕士", "研究生", "master", "m.s"),
+    ("博士", "phd", "ph.d", "doctor"),
+)
+_MAX_SKILLS = 20
+
+
+def _mentions(text: str, term: str) -> bool:
+    """Whole-word match for latin terms ("go" is not in "google"), substring for CJK."""
+    if term.isascii():
+        return re.search(rf"(?<![a-z0-9]){re.escape(term)}(?![a-z0-9+#])", text) is not None
+    return term in text
+
+
+def _degree_level(text: Optional[str], lowest: bool = False) -> int:
+    """
+    1-4 for 大专..博士, 0 if no degree is recognised. A resume is credited with the
+    highest degree it mentions; a JD ("本科及以上，硕士优先") requires the lowest.
+    """
+    if not text:
+        return 0
+    lowered = text.lower()
+    levels = [i for i, keywords in enumerate(_DEGREE_LEVELS, start=1)
+              if any(_mentions(lowered, keyword) for keyword in keywords)]
+    if not levels:
+        return 0
+    return min(levels) if lowest else max(levels)
+
+
+class JobDescriptionService:
+    """
+    Parse-once preprocessing for job descriptions.
+
+    A JD is normalized before hashing, so copies that differ only in whitespace,
+    case or full-width characters share one `job_hash` and one set of cached
+    matches. It is also condensed into a JobProfile (skills, years, degree) that is
+    cached by job hash and sent to the model instead of the full JD text, and that
+    drives the local rule-based `prescore`.
+    """
+
+    @staticmethod
+    def normalize(job_description: str) -> str:
+        """NFKC (full-width -> half-width), lowercase, collapse whitespace."""
+        return " ".join(unicodedata.normalize("NFKC", job_description).lower().split())
+
+    @staticmethod
+    def job_hash(job_description: str) -> str:
+        return hashlib.md5(JobDescriptionService.normalize(job_description).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def parse_profile(job_description: str) -> JobProfile:
+        """Rule-based JobProfile, used without an API key or when the model call fails."""
+        normalized = JobDescriptionService.normalize(job_description)
+        skills: List[str] = []
+        for phrase in _CJK_SKILLS:
+            if phrase in normalized:
+                skills.append(phrase)
+        for token in _SKILL_RE.findall(normalized):
+            token = token.rstrip(".")
+            if len(token) == 1 and token not in ("c", "r"):
+                continue  # stray letters, e.g. the "s" of "bachelor's"
+            if token and token not in _NOT_SKILLS and token not in skills:
+                skills.append(token)
+        years = _YEARS_RE.search(normalized)
+        level = _degree_level(normalized, lowest=True)
+        first_line = job_description.strip().split("\n", 1)[0].strip()
+        return JobProfile(
+            title=first_line if 0 < len(first_line) <= 30 else None,
+            skills=skills[:_MAX_SKILLS],
+            min_years=float(years.group(1)) if years else 0,
+            degree=_DEGREE_LEVELS[level - 1][0] if level else None,
+        )
+
+    @staticmethod
+    def get_profile(job_description: str, job_hash: str, redis_service, api_key: str = "",
+                    cache_rule_based: bool = True) -> dict:
+        """
+        The cached JobProfile of a JD, extracting (and caching) it on first use.
+        With `cache_rule_based=False` a rule-based profile is returned but not
+        cached, so a later request with model access extracts a proper one.
+        """
+        cached = redis_service.get_job_profile(job_hash)
+        if cached:
+            return cached
+        profile = None
+        if api_key:
+            try:
+                from services.ai_service import AIService
+                profile = AIService.extract_job_profile(job_description, api_key)
+            except Exception as e:
+                print(f"JD profile extraction failed, using rule-based profile: {e}")
+        if profile is None or not profile.skills:
+            profile = JobDescriptionService.parse_profile(job_description)
+        profile_dict = profile.dict()
+        if api_key or cache_rule_based:
+            redis_service.cache_job_profile(job_hash, profile_dict)
+        return profile_dict
+
+    @staticmethod
+    def prescore(job_profile: dict, resume_data: dict) -> dict:
+        """
+        Local comparison of a resume against a JobProfile: skill keyword overlap,
+        years against the minimum and degree level. `score` is a 0-100 estimate.
+        """
+        basic_info = resume_data.get("basic_info") or {}
+        resume_text = JobDescriptionService.normalize(" ".join(
+            str(v) for v in (
+                resume_data.get("job_intention"), resume_data.get("raw_text_summary"),
+                resume_data.get("education_background"), basic_info.get("address"),
+            ) if v
+        ))
+        skills = job_profile.get("skills") or []
+        matched = [s for s in skills if _mentions(resume_text, JobDescriptionService.normalize(s))]
+        missing = [s for s in skills if s not in matched]
+        skill_rate = len(matched) / len(skills) if skills else 1.0
+
+        min_years = job_profile.get("min_years") or 0
+        years = parse_work_years(resume_data.get("work_years"))
+        years_rate = min(1.0, years / min_years) if min_years else 1.0
+
+        required_level = _degree_level(job_profile.get("degree"), lowest=True)
+        resume_level = _degree_level(resume_data.get("education_background"))
+        if not required_level or resume_level >= required_level:
+            degree_rate = 1.0
+        else:
+            degree_rate = 0.5 if not resume_level else 0.0
+
+        score = round(100 * (0.6 * skill_rate + 0.25 * years_rate + 0.15 * degree_rate))
+        return {
+            "score": score,
+            "skill_match_rate": round(skill_rate, 2),
+            "matched_skills": matched,
+            "missing_skills": missing,
+            "years": years,
+            "years_ok": years_rate >= 1.0,
+            "degree_ok": degree_rate >= 1.0,
+        }
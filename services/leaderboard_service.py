@@ -0,0 +1,139 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+import redis
+
+
+class LeaderboardService:
+    """
+    Candidate ranking per job description, kept up to date as matches are scored.
+
+    Every score produced for a (resume, JD) pair is added to the JD's board at
+    once, so opening a ranking never re-reads the `matches:` entries. With Redis
+    a board is a ZSET
+        leaderboard:{prompt_version}:{job_hash}   resume_id -> score
+    and a page is one ZCARD + ZREVRANGE round trip, O(log n + page size) however
+    many candidates there are. The scoring prompt version is part of the key:
+    when the prompt changes, scores given under the old one are no longer read
+    and their boards expire after `retention_days` without writes. Without Redis
+    the same boards are kept in process memory as sorted lists.
+
+    A board outlives the resumes on it: a candidate whose resume data Redis
+    confirms has expired is removed from the board when a page would show it
+    (one pipelined EXISTS per page, plus a ZREM when some are gone) and left off
+    that page; the page is not read again, so it may come up short once. When
+    the check gets no answer, nobody is removed.
+    """
+
+    def __init__(self, redis_service, prompt_version: str, retention_days: int = 30):
+        self.redis_service = redis_service
+        self.prompt_version = prompt_version
+        self.retention_seconds = retention_days * 86400
+        # job_hash -> {resume_id: score} and the same entries as sorted (score, resume_id)
+        self._scores: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._ordered: Dict[str, List[Tuple[float, str]]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @property
+    def _client(self):
+        return self.redis_service.client
+
+    def _board(self, job_hash: str) -> str:
+        return f"leaderboard:{self.prompt_version}:{job_hash}"
+
+    def record(self, job_hash: str, resume_id: str, score: float):
+        """Add or update one candidate's score for a JD."""
+        self.record_many(resume_id, {job_hash: score})
+
+    def record_many(self, resume_id: str, scores: Dict[str, float]):
+        """Add one candidate's scores for several JDs (job hash -> score) in one round trip."""
+        if not scores:
+            return
+        if self._client is not None:
+            try:
+                pipe = self._client.pipeline(transaction=False)
+                for job_hash, score in scores.items():
+                    pipe.zadd(self._board(job_hash), {resume_id: score})
+                    if self.retention_seconds:
+                        pipe.expire(self._board(job_hash), self.retention_seconds)
+                pipe.execute()
+                return
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis leaderboard write failed, falling back to memory: {e}")
+        with self._lock:
+            for job_hash, score in scores.items():
+                board = self._scores[job_hash]
+                ordered = self._ordered[job_hash]
+                if resume_id in board:
+                    del ordered[bisect.bisect_left(ordered, (board[resume_id], resume_id))]
+                board[resume_id] = float(score)
+                bisect.insort(ordered, (float(score), resume_id))
+
+    def top(self, job_hash: str, page: int = 1, page_size: int = 20) -> dict:
+        """
+        One page of a JD's ranking, best score first (ties by resume_id, descending,
+        as Redis orders them). Returns {"total", "results": [{rank, resume_id, score}]}.
+        """
+        offset = (max(page, 1) - 1) * page_size
+        total, rows = self._read(job_hash, offset, page_size)
+        gone = self._gone(rows)
+        if gone:
+            if self._remove(job_hash, gone):
+                total -= len(gone)
+            rows = [row for row in rows if row[0] not in gone]
+        return self._page(total, rows, offset)
+
+    def _read(self, job_hash: str, offset: int, page_size: int) -> Tuple[int, List[Tuple[str, float]]]:
+        if self._client is not None:
+            try:
+                pipe = self._client.pipeline(transaction=False)
+                pipe.zcard(self._board(job_hash))
+                pipe.zrevrange(self._board(job_hash), offset, offset + page_size - 1, withscores=True)
+                total, rows = pipe.execute()
+                # The client does not decode responses (cached values are binary)
+                rows = [(member.decode("utf-8") if isinstance(member, bytes) else member, score)
+                        for member, score in rows]
+                return total, rows
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis leaderboard read failed, falling back to memory: {e}")
+        with self._lock:
+            ordered = self._ordered.get(job_hash, [])
+            total = len(ordered)
+            end = max(total - offset, 0)
+            rows = [(resume_id, score) for score, resume_id in reversed(ordered[max(end - page_size, 0):end])]
+        return total, rows
+
+    def _gone(self, rows: List[Tuple[str, float]]) -> Set[str]:
+        """Candidates on a page whose resume data is confirmed to have expired."""
+        try:
+            return self.redis_service.expired_resume_ids([resume_id for resume_id, _ in rows])
+        except Exception as e:
+            print(f"Leaderboard member check failed: {e}")
+            return set()
+
+    def _remove(self, job_hash: str, resume_ids: Set[str]) -> bool:
+        if self._client is not None:
+            try:
+                self._client.zrem(self._board(job_hash), *resume_ids)
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis leaderboard write failed: {e}")
+                return False
+        with self._lock:
+            board = self._scores.get(job_hash, {})
+            ordered = self._ordered.get(job_hash, [])
+            for resume_id in resume_ids:
+                if resume_id in board:
+                    del ordered[bisect.bisect_left(ordered, (board.pop(resume_id), resume_id))]
+        return True
+
+    @staticmethod
+    def _page(total: int, rows: List[Tuple[str, float]], offset: int) -> dict:
+        return {
+            "total": total,
+            "results": [
+                {"rank": offset + position + 1, "resume_id": resume_id, "score": int(score)}
+                for position, (resume_id, score) in enumerate(rows)
+            ],
+        }
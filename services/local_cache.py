@@ -0,0 +1,110 @@
+import fcntl
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+
+class SharedDiskCache:
+    """
+    A small dict-like cache stored in a SQLite file, shared by every worker process
+    on the machine.
+
+    RedisService keeps its fallback entries in `memory_cache`, which is private to
+    each process: with N pre-forked workers and no Redis, a resume analyzed by one
+    worker is a miss in the other N-1. Pointing all workers at the same file (WAL
+    mode, so readers never block the writer) keeps a single local cache tier.
+
+    Supports the subset of the dict interface RedisService uses: `get`,
+    `__getitem__`, `__setitem__`, `__contains__`, `pop` and `__len__`.
+    """
+
+    def __init__(self, path: str, default_ttl: int = 86400, purge_every: int = 1000):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.purge_every = purge_every
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        # A SQLite connection must not cross a fork, so each worker opens its own.
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @contextmanager
+    def instance_lock(self, name: str):
+        """
+        An exclusive lock shared by every worker process using this cache file (a
+        flock on "<path>.<name>.lock"), for work done once per instance.
+        """
+        with open(f"{self.path}.{name}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def set(self, key: str, value, ttl: Optional[int] = None):
+        expires_at = time.time() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return default
+        return row[0]
+
+    def pop(self, key: str, default=None):
+        value = self.get(key, default)
+        with self._lock:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute("DELETE FROM cache")
+
+    def __setitem__(self, key: str, value):
+        self.set(key, value)
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT COUNT(*) FROM cache WHERE expires_at >= ?", (time.time(),)
+            ).fetchone()
+        return row[0]
@@ -0,0 +1,123 @@
+import re
+from typing import List, Optional
+
+from models.resume import BasicInfo, ResumeData
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Mainland mobile numbers, optionally with +86 and separators
+_PHONE_RE = re.compile(r"(?<![\d])(?:\+?86[-\s]?)?(1[3-9]\d[-\s]?\d{4}[-\s]?\d{4})(?![\d])")
+_YEARS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:年|years?|yrs?)", re.IGNORECASE)
+_LABEL_RE = r"^\W*(?:{})\s*[:：]\s*(.+)$"
+_NAME_RE = re.compile(_LABEL_RE.format(r"姓\s*名|name"), re.IGNORECASE)
+_ADDRESS_RE = re.compile(_LABEL_RE.format(r"地\s*址|籍\s*贯|现居地?|所在地|address|location"), re.IGNORECASE)
+_INTENTION_RE = re.compile(_LABEL_RE.format(r"求职意向|期望职位|目标岗位|应聘职位|job intention|objective"), re.IGNORECASE)
+# Degree keywords, lowest to highest
+_DEGREES = (
+    ("大专", "专科", "associate"),
+    ("本科", "学士", "bachelor"),
+    ("硕士", "研究生", "master"),
+    ("博士", "phd", "ph.d", "doctor"),
+)
+# Section headings: "=== Skills ===", "【专业技能】", "技能：" ...
+_HEADINGS = {
+    "intention": ("求职意向", "期望职位", "目标岗位", "job intention", "objective"),
+    "experience": ("工作经历", "工作经验", "项目经历", "work experience", "experience", "projects"),
+    "education": ("教育背景", "教育经历", "education"),
+    "skills": ("专业技能", "个人技能", "技能特长", "技能", "skills", "technical skills"),
+}
+_SUMMARY_CHARS = 100
+
+
+def _heading(line: str) -> Optional[str]:
+    """The heading a line starts a section with ("=== Skills ===" -> "skills"), if any."""
+    stripped = re.sub(r"^[\W_]+|[\W_]+$", "", line.strip().lower())
+    if not stripped or len(stripped) > 30:
+        return None
+    for section, names in _HEADINGS.items():
+        if any(stripped == name or stripped.startswith(name + ":") or stripped.startswith(name + " ")
+               or stripped.startswith(name + "：") for name in names):
+            return section
+    return None
+
+
+def _section(lines: List[str], section: str) -> List[str]:
+    """Lines of the first `section` (up to the next heading)."""
+    body: List[str] = []
+    inside = False
+    for line in lines:
+        found = _heading(line)
+        if found is not None:
+            if inside:
+                break
+            inside = found == section
+            continue
+        if inside and line.strip():
+            body.append(line.strip())
+    return body
+
+
+def _labelled(lines: List[str], pattern: re.Pattern) -> Optional[str]:
+    for line in lines:
+        match = pattern.match(line.strip())
+        if match:
+            return match.group(1).strip() or None
+    return None
+
+
+class LocalExtractor:
+    """
+    Rule-based ResumeData from resume text: labelled fields ("姓名：", "Email:"),
+    phone / e-mail patterns, a years-of-experience mention, the highest degree
+    and the skills section as the summary. No model call, so it costs nothing,
+    but it only works on conventionally laid out resumes; the model router (see
+    services/model_router.py) uses it as its cheapest tier and escalates when
+    the result is incomplete.
+    """
+
+    @staticmethod
+    def extract(text: str) -> ResumeData:
+        lines = [line for line in text.splitlines() if line.strip()]
+
+        email = _EMAIL_RE.search(text)
+        phone = _PHONE_RE.search(text)
+        name = _labelled(lines, _NAME_RE)
+        if name is not None and (len(name) > 30 or _EMAIL_RE.search(name) or any(c.isdigit() for c in name)):
+            name = None
+
+        intention = _labelled(lines, _INTENTION_RE)
+        if intention is None:
+            section = _section(lines, "intention")
+            intention = section[0] if section else None
+
+        work_years = None
+        for line in lines:
+            lowered = line.lower()
+            if "经验" in line or "工作" in line or "experience" in lowered:
+                match = _YEARS_RE.search(line)
+                if match:
+                    work_years = f"{match.group(1)}年"
+                    break
+
+        education = None
+        best_level = 0
+        for line in _section(lines, "education") or lines:
+            lowered = line.lower()
+            for level, keywords in enumerate(_DEGREES, start=1):
+                if level > best_level and any(keyword in lowered for keyword in keywords):
+                    best_level, education = level, line.strip()
+
+        skills = " ".join(_section(lines, "skills"))
+        summary = skills[:_SUMMARY_CHARS] if skills else None
+
+        return ResumeData(
+            basic_info=BasicInfo(
+                name=name,
+                phone=re.sub(r"[-\s]", "", phone.group(1)) if phone else None,
+                email=email.group(0) if email else None,
+                address=_labelled(lines, _ADDRESS_RE)
+            ),
+            job_intention=intention,
+            work_years=work_years,
+            education_background=education,
+            raw_text_summary=summary
+        )
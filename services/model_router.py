@@ -0,0 +1,182 @@
+"""
+Model cascade for resume extraction.
+
+Most resumes are easy: a cheap model (or the rule-based LocalExtractor) gets
+every field right, and only scans, odd layouts and long documents need a large
+model. ModelRouter tries the tiers configured in Settings cheapest first,
+scores each result with ExtractionQuality (are the fields there, and do they
+look like what they claim to be), and escalates to the next tier only when the
+score is below MODEL_MIN_QUALITY or the call fails. The best result seen is
+returned if no tier reaches the bar.
+
+Per tier it records calls, acceptances, escalations, errors, latency, result
+quality and a cost estimate (MODEL_TIER_COSTS), reported by /healthz.
+"""
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from models.resume import ResumeData
+from services.ai_service import AIService
+from services.local_extractor import LocalExtractor
+
+# The rule-based tier (text only)
+LOCAL_TIER = "local"
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[A-Za-z]{2,}$")
+_EMPTY_VALUES = {"", "null", "none", "n/a", "na", "-", "无", "暂无", "未知", "未提供"}
+# Share of the quality score per field; the summary drives matching and search
+_FIELD_WEIGHTS = {
+    "name": 0.15,
+    "phone": 0.1,
+    "email": 0.1,
+    "job_intention": 0.1,
+    "work_years": 0.1,
+    "education_background": 0.15,
+    "raw_text_summary": 0.3,
+}
+
+
+class ExtractionQuality:
+    """How complete and plausible an extracted ResumeData is, 0..1."""
+
+    @staticmethod
+    def field_ok(field: str, value: Optional[str]) -> bool:
+        if value is None or not isinstance(value, str) or value.strip().lower() in _EMPTY_VALUES:
+            return False
+        value = value.strip()
+        if field == "email":
+            return _EMAIL_RE.match(value) is not None
+        if field == "phone":
+            return len(re.sub(r"\D", "", value)) >= 7
+        if field == "name":
+            return len(value) <= 30 and not any(c.isdigit() for c in value)
+        if field == "work_years":
+            return any(c.isdigit() for c in value) or "应届" in value
+        if field == "raw_text_summary":
+            return len(value) >= 10
+        return True
+
+    @staticmethod
+    def score(data: ResumeData) -> float:
+        values = dict(data.basic_info.dict(), **data.dict(exclude={"basic_info"}))
+        return round(sum(weight for field, weight in _FIELD_WEIGHTS.items()
+                         if ExtractionQuality.field_ok(field, values.get(field))), 3)
+
+
+def _parse_tiers(value: str) -> List[str]:
+    return [tier.strip() for tier in value.split(",") if tier.strip()]
+
+
+def _parse_costs(value: str) -> Dict[str, float]:
+    costs: Dict[str, float] = {}
+    for item in _parse_tiers(value):
+        tier, _, cost = item.partition("=")
+        try:
+            costs[tier.strip()] = float(cost)
+        except ValueError:
+            print(f"Ignoring malformed MODEL_TIER_COSTS entry: {item}")
+    return costs
+
+
+class ModelRouter:
+    def __init__(self, text_tiers: List[str], vision_tiers: List[str], min_quality: float,
+                 tier_costs: Optional[Dict[str, float]] = None):
+        self.text_tiers = text_tiers or ["qwen-turbo"]
+        # The local extractor reads text, it can't stand in for a vision model
+        self.vision_tiers = [tier for tier in vision_tiers if tier != LOCAL_TIER] or ["qwen-vl-max"]
+        self.min_quality = min_quality
+        self.tier_costs = tier_costs or {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Dict[str, float]]] = {"text": {}, "vision": {}}
+
+    @classmethod
+    def from_settings(cls, settings) -> "ModelRouter":
+        return cls(
+            text_tiers=_parse_tiers(settings.MODEL_TEXT_TIERS),
+            vision_tiers=_parse_tiers(settings.MODEL_VISION_TIERS),
+            min_quality=settings.MODEL_MIN_QUALITY,
+            tier_costs=_parse_costs(settings.MODEL_TIER_COSTS)
+        )
+
+    def _record(self, kind: str, tier: str, outcome: str, seconds: float, quality: float = 0.0):
+        with self._lock:
+            entry = self._stats[kind].setdefault(tier, {
+                "calls": 0, "accepted": 0, "escalated": 0, "errors": 0, "seconds": 0.0, "quality": 0.0,
+            })
+            entry["calls"] += 1
+            entry[outcome] += 1
+            entry["seconds"] += seconds
+            entry["quality"] += quality
+
+    def _cascade(self, kind: str, tiers: List[str], call: Callable[[str], ResumeData],
+                 before_call: Optional[Callable[[], None]]) -> ResumeData:
+        best: Optional[ResumeData] = None
+        best_quality = -1.0
+        for position, tier in enumerate(tiers):
+            last = position == len(tiers) - 1
+            if tier != LOCAL_TIER and before_call is not None:
+                try:
+                    before_call()  # e.g. CancelToken.commit: may raise instead
+                except Exception:
+                    if best is None:
+                        raise
+                    break  # request abandoned: no escalation, keep the result already paid for
+            started = time.monotonic()
+            try:
+                data = call(tier)
+            except Exception as e:
+                self._record(kind, tier, "errors", time.monotonic() - started)
+                if last and best is None:
+                    raise
+                print(f"Extraction with {tier} failed ({e}), escalating.")
+                continue
+            quality = ExtractionQuality.score(data)
+            if quality > best_quality:
+                best, best_quality = data, quality
+            if quality >= self.min_quality or last:
+                self._record(kind, tier, "accepted", time.monotonic() - started, quality)
+                break
+            self._record(kind, tier, "escalated", time.monotonic() - started, quality)
+            print(f"Extraction with {tier} scored {quality:.2f} < {self.min_quality}, escalating.")
+        return best
+
+    def extract_text(self, text: str, api_key: str,
+                     before_call: Optional[Callable[[], None]] = None) -> ResumeData:
+        """ResumeData from resume text, cheapest adequate tier first."""
+        def call(tier: str) -> ResumeData:
+            if tier == LOCAL_TIER:
+                return LocalExtractor.extract(text)
+            return AIService.extract_resume_info(text, api_key, model=tier)
+
+        return self._cascade("text", self.text_tiers, call, before_call)
+
+    def extract_images(self, page_images_b64: List[str], api_key: str, page_text: str = "",
+                       before_call: Optional[Callable[[], None]] = None) -> ResumeData:
+        """ResumeData from page images (plus the text of the other pages)."""
+        def call(tier: str) -> ResumeData:
+            return AIService.extract_resume_info_from_images(page_images_b64, api_key, page_text=page_text, model=tier)
+
+        return self._cascade("vision", self.vision_tiers, call, before_call)
+
+    def stats(self) -> dict:
+        """Per kind and tier: calls, outcome rates, average latency / quality, estimated cost."""
+        report: Dict[str, Dict[str, dict]] = {}
+        with self._lock:
+            for kind, tiers in self._stats.items():
+                report[kind] = {}
+                for tier, entry in tiers.items():
+                    calls = entry["calls"]
+                    scored = calls - entry["errors"]
+                    report[kind][tier] = {
+                        "calls": calls,
+                        "accepted": entry["accepted"],
+                        "escalated": entry["escalated"],
+                        "errors": entry["errors"],
+                        "escalation_rate": round((entry["escalated"] + entry["errors"]) / calls, 3),
+                        "avg_latency_ms": round(1000 * entry["seconds"] / calls, 1),
+                        "avg_quality": round(entry["quality"] / scored, 3) if scored else None,
+                        "estimated_cost": round(calls * self.tier_costs.get(tier, 0.0), 4),
+                    }
+        return report
@@ -1,10 +1,35 @@
-import pdfplumber
-import fitz  # PyMuPDF
 import io
 import base64
-from typing import List
+import math
+import os
+import tempfile
+from typing import Callable, List, Optional, Tuple, Union
+
+from services.text_quality_service import TextQualityService
+
+# pdfplumber and fitz (PyMuPDF) are imported inside the methods that use them:
+# together they add a noticeable chunk to cold-start time, and most requests
+# (cache hits, /match) never touch a PDF parser.
+
+def _open_fitz(source: Union[bytes, str]):
+    import fitz  # PyMuPDF
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _open_pdfplumber(source: Union[bytes, str]):
+    import pdfplumber
+    return pdfplumber.open(source if isinstance(source, str) else io.BytesIO(source))
+
 
 class PDFService:
+    @staticmethod
+    def warmup():
+        """Import the PDF parsers ahead of the first upload (used by the /healthz warm-up hook)."""
+        import pdfplumber  # noqa: F401
+        import fitz  # noqa: F401  # PyMuPDF
+
     @staticmethod
     def extract_text(file_bytes: bytes) -> str:
         """
@@ -26,6 +51,7 @@ class PDFService:
     @staticmethod
     def _extract_with_pdfplumber(file_bytes: bytes) -> str:
         """Extract text using pdfplumber."""
+        import pdfplumber
         text_content = []
         try:
             with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
@@ -44,6 +70,7 @@ class PDFService:
     @staticmethod
     def _extract_with_pymupdf(file_bytes: bytes) -> str:
         """Extract text using PyMuPDF (fitz)."""
+        import fitz  # PyMuPDF
         text_content = []
         try:
             doc = fitz.open(stream=file_bytes, filetype="pdf")
@@ -60,9 +87,146 @@ class PDFService:
             print(f"PyMuPDF extraction failed: {e}")
             return ""
 
+    @staticmethod
+    def page_count(source: Union[bytes, str]) -> int:
+        """Number of pages of a PDF (bytes or a file path), 0 if it can't be opened."""
+        try:
+            doc = _open_fitz(source)
+            count = doc.page_count
+            doc.close()
+            return count
+        except Exception as e:
+            print(f"PDF page count failed: {e}")
+            return 0
+
+    @staticmethod
+    def extract_page_texts(source: Union[bytes, str], engine: str = "pdfplumber",
+                           start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """
+        Text of each page in [start, stop) ("" for pages without text), with the
+        same line cleanup as extract_text. `source` is the PDF bytes or a file
+        path. `engine` is "pdfplumber" or "pymupdf"; pdfplumber falls back to
+        PyMuPDF if it can't open the file.
+        """
+        pages = []
+        try:
+            if engine == "pdfplumber":
+                with _open_pdfplumber(source) as pdf:
+                    pages = [page.extract_text() or "" for page in pdf.pages[start:stop]]
+            else:
+                doc = _open_fitz(source)
+                stop = doc.page_count if stop is None else min(stop, doc.page_count)
+                pages = [doc[index].get_text() or "" for index in range(start, stop)]
+                doc.close()
+        except Exception as e:
+            print(f"{engine} page extraction failed: {e}")
+            if engine == "pdfplumber":
+                return PDFService.extract_page_texts(source, engine="pymupdf", start=start, stop=stop)
+            return []
+        return ["\n".join(line.strip() for line in text.split("\n") if line.strip()) for text in pages]
+
+    @staticmethod
+    def scan_pages(source: Union[bytes, str], min_score: float, start: int = 0,
+                   stop: Optional[int] = None) -> List[Tuple[str, float, bool]]:
+        """
+        (text, quality score, has graphics) for each page in [start, stop); the
+        graphics check is only made for pages without text. Pages below
+        `min_score` are retried with PyMuPDF, which decodes some font encodings
+        that pdfplumber doesn't (and vice versa).
+        """
+        pages = PDFService.extract_page_texts(source, start=start, stop=stop)
+        scores = [TextQualityService.score(text) for text in pages]
+        if any(score < min_score for score in scores):
+            alternative = PDFService.extract_page_texts(source, engine="pymupdf", start=start, stop=stop)
+            for index, text in enumerate(alternative[:len(pages)]):
+                if scores[index] < min_score:
+                    score = TextQualityService.score(text)
+                    if score > scores[index]:
+                        pages[index], scores[index] = text, score
+        blank = [start + index for index, text in enumerate(pages) if not text]
+        graphics = set(PDFService.pages_with_graphics(source, blank)) if blank else set()
+        return [(text, score, start + index in graphics) for index, (text, score) in enumerate(zip(pages, scores))]
+
+    @staticmethod
+    def route_scanned(scanned: List[Tuple[str, float, bool]], min_score: float) -> Tuple[str, List[int]]:
+        """
+        Readable text of the PDF and the pages that need vision extraction, decided
+        per page: pages whose text layer is garbled (CID fonts, broken ToUnicode
+        maps, see services/text_quality_service.py) and pages that have no text
+        but do have images or drawings. A PDF without any readable text goes to
+        vision as a whole. Returns ("", []) for a PDF that couldn't be opened.
+        """
+        readable = [index for index, (_, score, _) in enumerate(scanned) if score >= min_score]
+        if not readable:
+            return "", list(range(len(scanned)))
+        garbled = [index for index, (text, score, _) in enumerate(scanned) if text and score < min_score]
+        drawn = [index for index, (text, _, graphics) in enumerate(scanned) if not text and graphics]
+        vision_pages = sorted(garbled + drawn)
+        if vision_pages:
+            print(f"Routing pages {[index + 1 for index in vision_pages]} to vision extraction "
+                  f"({len(garbled)} garbled, {len(drawn)} without text)")
+        return "\n".join(scanned[index][0] for index in readable), vision_pages
+
+    @staticmethod
+    def route_pages(source: Union[bytes, str], min_score: float) -> Tuple[str, List[int]]:
+        """Readable text and vision pages of the whole PDF (see route_scanned)."""
+        return PDFService.route_scanned(PDFService.scan_pages(source, min_score), min_score)
+
+    @staticmethod
+    def route_pages_parallel(file_bytes: bytes, min_score: float, pool, min_pages: int,
+                             should_stop: Optional[Callable[[], bool]] = None,
+                             shards: Optional[int] = None) -> Tuple[str, List[int]]:
+        """
+        route_pages in `pool` (core.parse_pool.ParsePool). Documents of at least
+        `min_pages` pages are split into contiguous page ranges, one per shard,
+        that workers scan concurrently (each opens the document itself); the
+        results are merged in page order. `shards` defaults to the pool size,
+        capped by the CPUs available, so short documents and single-CPU
+        instances stay in one worker.
+        """
+        if pool.size == 0:
+            return PDFService.route_pages(file_bytes, min_score)
+        if shards is None:
+            from core.process import available_cpu_count
+            shards = min(pool.size, available_cpu_count())
+
+        # Workers open the document from a temporary file rather than receiving
+        # a copy of it through their pipe (a scanned PDF can be tens of MB)
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(file_bytes)
+            count = 0
+            if shards > 1 and min_pages > 0:
+                count = pool.run(PDFService.page_count, path, should_stop=should_stop)
+            if count < max(min_pages, 1) or shards < 2:
+                return pool.run(PDFService.route_pages, path, min_score, should_stop=should_stop)
+            size = math.ceil(count / shards)
+            calls = [(path, min_score, start, min(start + size, count)) for start in range(0, count, size)]
+            scanned = pool.map(PDFService.scan_pages, calls, should_stop=should_stop)
+            return PDFService.route_scanned([page for shard in scanned for page in shard], min_score)
+        finally:
+            os.unlink(path)
+
+    @staticmethod
+    def pages_with_graphics(source: Union[bytes, str], page_indices: List[int]) -> List[int]:
+        """The given pages that contain images or vector drawings (possibly drawn text)."""
+        found = []
+        try:
+            doc = _open_fitz(source)
+            for index in page_indices:
+                page = doc[index]
+                if page.get_images() or page.get_drawings():
+                    found.append(index)
+            doc.close()
+        except Exception as e:
+            print(f"Page graphics check failed: {e}")
+        return found
+
     @staticmethod
     def is_image_based_pdf(file_bytes: bytes) -> bool:
         """Check if a PDF is image/vector-based (no extractable text)."""
+        import fitz  # PyMuPDF
         try:
             doc = fitz.open(stream=file_bytes, filetype="pdf")
             has_text = False
@@ -76,16 +240,36 @@ class PDFService:
             return False
 
     @staticmethod
-    def pdf_pages_to_base64_images(file_bytes: bytes, dpi: int = 200) -> List[str]:
+    def pdf_pages_to_base64_images(file_bytes: bytes, dpi: int = 200,
+                                   should_stop: Optional[Callable[[], bool]] = None,
+                                   preprocessor=None, max_images: Optional[int] = None,
+                                   pages: Optional[List[int]] = None) -> List[str]:
         """
         Convert PDF pages to base64-encoded PNG images.
         Used for image-based PDFs that need OCR/vision AI processing.
         Returns a list of base64-encoded image strings.
+        `should_stop` is checked before each page; when it returns True the pages
+        rendered so far are returned (the caller decides what that means).
+        With a `preprocessor` (services.image_preprocessor.PageImagePreprocessor)
+        pages are cropped, converted to grayscale/black-and-white and downscaled,
+        and blank pages are skipped. Rendering stops once `max_images` are ready.
+        `pages` (0-based indices) limits rendering to those pages.
         """
+        import fitz  # PyMuPDF
         images = []
         try:
             doc = fitz.open(stream=file_bytes, filetype="pdf")
             for page in doc:
+                if pages is not None and page.number not in pages:
+                    continue
+                if should_stop is not None and should_stop():
+                    break
+                if max_images is not None and len(images) >= max_images:
+                    break
+                if preprocessor is not None:
+                    for img_bytes in preprocessor.render(page, dpi=dpi):
+                        images.append(base64.b64encode(img_bytes).decode("utf-8"))
+                    continue
                 # Render page to pixmap at given DPI
                 mat = fitz.Matrix(dpi / 72, dpi / 72)
                 pix = page.get_pixmap(matrix=mat)
@@ -95,4 +279,6 @@ class PDFService:
             doc.close()
         except Exception as e:
             print(f"PDF to image conversion failed: {e}")
+        if max_images is not None:
+            images = images[:max_images]
         return images
@@ -1,81 +1,673 @@
 import redis
 import json
-from typing import Optional
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple, Union
+from services.cache_codec import CacheCodec, loads
+from services.cache_refresh import RefreshPolicy
+from services.cache_snapshot import (
+    KEYSPACES, LEGACY_MATCH, MATCHES, RESUME_DATA, SnapshotRecord, SnapshotWriter, parse_key, read_snapshot
+)
+from services.local_cache import SharedDiskCache
+from services.redis_shards import ShardedRedis
+
+# Companion field of each match in a matches:{resume_id} hash holding its soft
+# expiry (unix seconds): matches expire one by one, the hash TTL is a hard bound only
+MATCH_EXPIRY_SUFFIX = ":exp"
+# Soft TTL of resume data; an entry written with another one records it in a
+# resume_data_ttl:{id} companion key, so that renewals keep it
+RESUME_DATA_TTL = 86400
+
+def _text(value: Union[bytes, str, None]) -> Optional[str]:
+    """Redis returns bytes (the client does not decode, values are binary)."""
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
 
 class RedisService:
-    def __init__(self, host: str, port: int, db: int, password: Optional[str] = None):
-        self.memory_cache = {}
+    # Default codec; the app passes one configured from Settings
+    codec = CacheCodec()
+    # Soft/hard TTLs for resume data and match results; None keeps hard TTLs only
+    refresh_policy: Optional[RefreshPolicy] = None
+    # How long one reader holds the right to refresh an entry
+    refresh_lock_seconds = 120
+    # A matches:{id} hash larger than this (fields, each match has two) drops its
+    # expired matches whenever a new one is added
+    match_prune_fields = 64
+    # Several nodes or a cluster (set by __init__): resume keys carry hash tags
+    sharded = False
+    cluster = False
+
+    def __init__(self, host: str, port: int, db: int, password: Optional[str] = None,
+                 connect_in_background: bool = False, local_cache_path: Optional[str] = None,
+                 codec: Optional[CacheCodec] = None, refresh_policy: Optional[RefreshPolicy] = None,
+                 nodes: Optional[List[str]] = None, cluster: bool = False, node_retry_seconds: float = 30):
+        if codec is not None:
+            self.codec = codec
+        if refresh_policy is not None:
+            self.refresh_policy = refresh_policy
+        # With a local_cache_path, the fallback tier is a SQLite file shared by all
+        # worker processes on the instance instead of a per-process dict.
+        self.memory_cache = SharedDiskCache(local_cache_path) if local_cache_path else {}
         self.client = None
+        # Several "host:port" nodes (a client-side hash ring) or a Redis Cluster
+        # seeded from host:port; either way keys are hash-tagged per resume.
+        self.nodes = [node.strip() for node in nodes or [] if node.strip()]
+        self.cluster = cluster
+        self.node_retry_seconds = node_retry_seconds
+        self.sharded = bool(self.nodes) or cluster
+        if connect_in_background:
+            # Don't hold up startup on the ping: serve from memory until Redis answers.
+            threading.Thread(
+                target=self._connect, args=(host, port, db, password), daemon=True
+            ).start()
+        else:
+            self._connect(host, port, db, password)
+
+    def _connect(self, host: str, port: int, db: int, password: Optional[str]):
         try:
-            self.client = redis.Redis(
-                host=host, port=port, db=db, password=password,
-                decode_responses=True, socket_connect_timeout=2
-            )
+            # Values are CacheCodec bytes, so responses are not decoded to str
+            if self.nodes:
+                client = ShardedRedis.from_nodes(self.nodes, db, password, self.node_retry_seconds)
+            elif self.cluster:
+                from redis.cluster import RedisCluster
+                client = RedisCluster(
+                    host=host, port=port, password=password,
+                    decode_responses=False, socket_connect_timeout=2
+                )
+            else:
+                client = redis.Redis(
+                    host=host, port=port, db=db, password=password,
+                    decode_responses=False, socket_connect_timeout=2
+                )
             # Test the connection once at startup
-            self.client.ping()
+            client.ping()
+            self.client = client
             print("Redis connected successfully.")
         except Exception as e:
             print(f"Redis connection failed at startup, using in-memory cache: {e}")
             self.client = None
 
+    def _connection_lost(self):
+        """
+        After a connection error: a single node is given up on (the local tier
+        serves from then on); with several nodes only the failed one is -- the
+        ring marks it down for a while, the cluster client re-discovers its
+        topology -- and the other keys keep going to Redis.
+        """
+        if not self.sharded:
+            self.client = None
+
+    def _key(self, keyspace: str, resume_id: str, *parts: str) -> str:
+        """
+        Key of a resume's entry: "{keyspace}:{resume_id}[:part...]". When sharded
+        the resume_id is a hash tag, so a resume's entries share a node / slot.
+        """
+        tagged = f"{{{resume_id}}}" if self.sharded else resume_id
+        return ":".join((keyspace, tagged) + parts)
+
     def _is_available(self) -> bool:
         """Check if Redis client is available without pinging every time."""
         return self.client is not None
 
-    def cache_resume_data(self, resume_id: str, data: dict, expire_seconds: int = 86400):
+    def _set(self, key: str, value: Union[bytes, str], expire_seconds: int):
+        """Write a value to Redis, or to the local tier if Redis is unavailable."""
+        if self._is_available():
+            try:
+                self.client.setex(key, expire_seconds, value)
+                return
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis write failed, falling back to memory: {e}")
+                self._connection_lost()
+        self._local_set(key, value, expire_seconds)
+
+    def _local_set(self, key: str, value: Union[bytes, str], expire_seconds: Optional[int] = None):
+        """Write to the local tier; the SQLite tier expires it like Redis would (a dict keeps it)."""
+        if isinstance(self.memory_cache, SharedDiskCache):
+            self.memory_cache.set(key, value, expire_seconds)
+        else:
+            self.memory_cache[key] = value
+
+    def _get(self, key: str) -> Union[bytes, str, None]:
+        """Read a value from Redis, falling back to the local tier."""
+        data = None
+        if self._is_available():
+            try:
+                data = self.client.get(key)
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis read failed, falling back to memory: {e}")
+                self._connection_lost()
+        if not data:
+            data = self.memory_cache.get(key)
+        return data
+
+    def _hard_ttl(self, expire_seconds: int) -> int:
+        """Redis TTL for an entry that goes stale after `expire_seconds`."""
+        if self.refresh_policy is None:
+            return expire_seconds
+        return self.refresh_policy.hard_ttl(expire_seconds)
+
+    def claim_refresh(self, key: str) -> bool:
+        """
+        Take the right to refresh `key` (SET NX with a timeout): of all the
+        readers, and all the worker processes, that find it due, one wins.
+        """
+        if not self._is_available():
+            return False
+        try:
+            return bool(self.client.set(f"refresh_lock:{key}", b"1", nx=True, ex=self.refresh_lock_seconds))
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            print(f"Redis write failed, falling back to memory: {e}")
+            self._connection_lost()
+            return False
+
+    def _decode_json(self, raw: Union[bytes, str, None]) -> Optional[bytes]:
+        """Compact JSON for a stored entry; undecodable entries are treated as misses."""
+        try:
+            return self.codec.decode_json(raw)
+        except Exception as e:
+            print(f"Discarding undecodable cache entry: {e}")
+            return None
+
+    def cache_resume_data(self, resume_id: str, data: dict, expire_seconds: int = RESUME_DATA_TTL):
         """Cache the parsed resume basic info JSON."""
-        key = f"resume_data:{resume_id}"
-        data_str = json.dumps(data, ensure_ascii=False)
+        self.cache_resume_data_many({resume_id: data}, expire_seconds)
+
+    def cache_resume_data_many(self, items: Dict[str, dict], expire_seconds: int = RESUME_DATA_TTL):
+        """Cache many resumes at once: one pipelined round trip (bulk backfills)."""
+        values = {
+            resume_id: self.codec.encode(data, "resume_data")
+            for resume_id, data in items.items()
+        }
         if self._is_available():
             try:
-                self.client.setex(key, expire_seconds, data_str)
+                pipe = self.client.pipeline(transaction=False)
+                for resume_id, value in values.items():
+                    pipe.setex(self._key("resume_data", resume_id), self._hard_ttl(expire_seconds), value)
+                    if expire_seconds != RESUME_DATA_TTL:
+                        pipe.setex(self._key("resume_data_ttl", resume_id), self._hard_ttl(expire_seconds),
+                                   str(expire_seconds))
+                    else:
+                        pipe.delete(self._key("resume_data_ttl", resume_id))
+                pipe.execute()
                 return
             except (redis.ConnectionError, redis.TimeoutError) as e:
                 print(f"Redis write failed, falling back to memory: {e}")
-                self.client = None  # Mark as unavailable
-        self.memory_cache[key] = data_str
+                self._connection_lost()
+        for resume_id, value in values.items():
+            self._local_set(self._key("resume_data", resume_id), value, self._hard_ttl(expire_seconds))
+
+    def get_resume_data_json(self, resume_id: str) -> Optional[bytes]:
+        """
+        Cached resume data as compact JSON bytes, without building a dict.
+        Resume data can't be recomputed (the PDF isn't kept), but it doesn't go
+        out of date either: refreshing a hot entry renews it for the TTL it was
+        written with, so resumes that are still being matched against don't
+        expire into a 404.
+        """
+        key = self._key("resume_data", resume_id)
+        if self.refresh_policy is None or not self._is_available():
+            return self._decode_json(self._get(key))
+        ttl_key = self._key("resume_data_ttl", resume_id)
+        raw = ttl = soft_ttl = None
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.ttl(key)
+            pipe.get(ttl_key)
+            raw, ttl, soft_ttl = pipe.execute()
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            print(f"Redis read failed, falling back to memory: {e}")
+            self._connection_lost()
+        if not raw:
+            raw = self.memory_cache.get(key)
+        elif self.refresh_policy.should_refresh(key, ttl):
+            hard_ttl = self._hard_ttl(int(soft_ttl) if soft_ttl else RESUME_DATA_TTL)
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.expire(key, hard_ttl)
+                if soft_ttl:
+                    pipe.expire(ttl_key, hard_ttl)
+                pipe.execute()
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis write failed: {e}")
+        return self._decode_json(raw)
+
+    def cache_downgraded_resume_data(self, resume_id: str, tenant: str, data: dict, expire_seconds: int):
+        """
+        Resume data extracted without a model for a tenant over its budget. It is
+        kept under that tenant's own key for exactly `expire_seconds` (no grace
+        window, never renewed), so it is never another request's cache hit.
+        """
+        self._set(self._key("downgraded", resume_id, tenant), self.codec.encode(data, "resume_data"), expire_seconds)
+
+    def get_downgraded_resume_data(self, resume_id: str, tenant: str) -> Optional[dict]:
+        json_bytes = self._decode_json(self._get(self._key("downgraded", resume_id, tenant)))
+        if json_bytes:
+            return loads(json_bytes)
+        return None
+
+    def expired_resume_ids(self, resume_ids: List[str]) -> Set[str]:
+        """
+        Those of `resume_ids` whose resume data Redis confirms is gone (one
+        pipelined EXISTS each). Without an answer from Redis -- no connection,
+        a node down -- nothing is confirmed and the set is empty.
+        """
+        if not self._is_available() or not resume_ids:
+            return set()
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for resume_id in resume_ids:
+                pipe.exists(self._key("resume_data", resume_id))
+            found = pipe.execute()
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            print(f"Redis read failed: {e}")
+            self._connection_lost()
+            return set()
+        # Written to the local tier during an outage: not gone either
+        return {resume_id for resume_id, exists in zip(resume_ids, found)
+                if not exists and self._key("resume_data", resume_id) not in self.memory_cache}
 
     def get_resume_data(self, resume_id: str) -> Optional[dict]:
         """Get cached resume data."""
-        key = f"resume_data:{resume_id}"
-        data_str = None
+        json_bytes = self.get_resume_data_json(resume_id)
+        if json_bytes:
+            return loads(json_bytes)
+        return None
+
+    @staticmethod
+    def _match_fields(values: Dict[str, bytes], expire_seconds: int) -> Dict[str, bytes]:
+        """Hash fields for matches (job hash -> value), each with its soft expiry."""
+        expires_at = str(int(time.time()) + expire_seconds).encode("ascii")
+        fields = dict(values)
+        fields.update({job_hash + MATCH_EXPIRY_SUFFIX: expires_at for job_hash in values})
+        return fields
+
+    def _match_soft_remaining(self, expires_at: Union[bytes, str, None]) -> Optional[float]:
+        """Seconds until a match's soft expiry (negative once stale); None if it has none."""
+        if not expires_at:
+            return None
+        return int(expires_at) - time.time()
+
+    def _match_expired(self, soft_remaining: Optional[float]) -> bool:
+        """Past the soft expiry and the grace window (entries without an expiry go by the hash TTL)."""
+        grace = self.refresh_policy.grace_seconds if self.refresh_policy is not None else 0
+        return soft_remaining is not None and soft_remaining + grace <= 0
+
+    def cache_match_result(self, resume_id: str, job_hash: str, match_result: dict, expire_seconds: int = 86400,
+                           compute_seconds: Optional[float] = None):
+        """
+        Cache match result for a specific resume and job description pair.
+        All matches of a resume live in one Redis hash, matches:{resume_id}: one
+        key per resume instead of one per match (and, when sharded, on the same
+        node as the resume's other entries). Each match carries its own soft
+        expiry in a companion field, so writing one doesn't renew the others; the
+        hash TTL (renewed on every write) only bounds how long any of them lives,
+        and expired ones are dropped as new ones are added (_prune_matches).
+        `compute_seconds` (how long scoring took) paces early refreshes.
+        """
+        if compute_seconds is not None and self.refresh_policy is not None:
+            self.refresh_policy.record_recompute("match", compute_seconds)
+        self.cache_match_results_many(resume_id, {job_hash: match_result}, expire_seconds)
+
+    def cache_match_results_many(self, resume_id: str, match_results: Dict[str, dict], expire_seconds: int = 86400):
+        """Cache the matches of one resume against several JDs (by job hash) in one round trip."""
+        values = {job_hash: self.codec.encode(result, "match") for job_hash, result in match_results.items()}
+        if not values:
+            return
         if self._is_available():
+            key = self._key("matches", resume_id)
             try:
-                data_str = self.client.get(key)
+                pipe = self.client.pipeline(transaction=False)
+                pipe.hset(key, mapping=self._match_fields(values, expire_seconds))
+                pipe.expire(key, self._hard_ttl(expire_seconds))
+                pipe.hlen(key)
+                added, _, size = pipe.execute()
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis write failed, falling back to memory: {e}")
+                self._connection_lost()
+            else:
+                if added and size > self.match_prune_fields:
+                    self._prune_matches(key)
+                return
+        for job_hash, value in values.items():
+            self._local_set(self._key("match", resume_id, job_hash), value, self._hard_ttl(expire_seconds))
+
+    def _prune_matches(self, key: str):
+        """
+        HDEL the matches of a hash that are past their soft expiry and grace
+        window, with their expiry fields. The hash TTL is renewed on every write,
+        so a resume scored against new JDs now and then would otherwise keep all
+        of them. One HSCAN over the hash, only when a write added a match to a
+        large one: next to the model call that produced the match, it is cheap.
+        """
+        try:
+            expired: List[str] = []
+            for field, expires_at in self.client.hscan_iter(key, match="*" + MATCH_EXPIRY_SUFFIX, count=500):
+                if self._match_expired(self._match_soft_remaining(expires_at)):
+                    job_hash = _text(field)[:-len(MATCH_EXPIRY_SUFFIX)]
+                    expired += [job_hash, job_hash + MATCH_EXPIRY_SUFFIX]
+            if expired:
+                self.client.hdel(key, *expired)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            print(f"Pruning expired matches failed: {e}")
+
+    def get_match_results_json_many(self, resume_id: str, job_hashes: List[str]) -> Dict[str, bytes]:
+        """Cached matches of one resume against several JDs, one pipeline; misses are left out."""
+        raws: Dict[str, Union[bytes, str, None]] = {}
+        if job_hashes and self._is_available():
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.hmget(self._key("matches", resume_id),
+                           job_hashes + [job_hash + MATCH_EXPIRY_SUFFIX for job_hash in job_hashes])
+                # Entries written before the per-resume hash existed
+                pipe.mget([self._key("match", resume_id, job_hash) for job_hash in job_hashes])
+                fields, legacy = pipe.execute()
+                hashed, expiries = fields[:len(job_hashes)], fields[len(job_hashes):]
+                raws = {
+                    job_hash: (None if self._match_expired(self._match_soft_remaining(expires_at)) else a) or b
+                    for job_hash, a, expires_at, b in zip(job_hashes, hashed, expiries, legacy)
+                }
             except (redis.ConnectionError, redis.TimeoutError) as e:
                 print(f"Redis read failed, falling back to memory: {e}")
-                self.client = None  # Mark as unavailable
-        if not data_str:
-            data_str = self.memory_cache.get(key)
-            
-        if data_str:
-            return json.loads(data_str)
+                self._connection_lost()
+        results: Dict[str, bytes] = {}
+        for job_hash in job_hashes:
+            raw = raws.get(job_hash) or self.memory_cache.get(self._key("match", resume_id, job_hash))
+            json_bytes = self._decode_json(raw) if raw else None
+            if json_bytes:
+                results[job_hash] = json_bytes
+        return results
+
+    def get_match_entry(self, resume_id: str, job_hash: str) -> Tuple[Optional[bytes], bool]:
+        """
+        Cached match result as compact JSON bytes, and whether the caller should
+        re-score it in the background: the entry is hot and stale (or due for an
+        early refresh) and this caller won the refresh lock. Other readers keep
+        getting the stale entry meanwhile.
+        """
+        if self.refresh_policy is None or not self._is_available():
+            return self.get_match_result_json(resume_id, job_hash), False
+        key = self._key("matches", resume_id)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.hmget(key, [job_hash, job_hash + MATCH_EXPIRY_SUFFIX])
+            pipe.ttl(key)
+            (raw, expires_at), ttl = pipe.execute()
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            print(f"Redis read failed, falling back to memory: {e}")
+            self._connection_lost()
+            return self.get_match_result_json(resume_id, job_hash), False
+        soft_remaining = self._match_soft_remaining(expires_at)
+        if not raw or self._match_expired(soft_remaining):
+            return self.get_match_result_json(resume_id, job_hash), False
+        entry = self._key("match", resume_id, job_hash)
+        recompute_seconds = self.refresh_policy.recompute_seconds("match", 5.0)
+        if soft_remaining is None:
+            # Written before matches carried their own expiry: go by the hash TTL
+            due = self.refresh_policy.should_refresh(entry, ttl, recompute_seconds)
+        else:
+            due = self.refresh_policy.should_refresh_in(entry, soft_remaining, recompute_seconds)
+        return self._decode_json(raw), due and self.claim_refresh(entry)
+
+    def get_match_result_json(self, resume_id: str, job_hash: str) -> Optional[bytes]:
+        """Cached match result as compact JSON bytes."""
+        raw = None
+        if self._is_available():
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                pipe.hmget(self._key("matches", resume_id), [job_hash, job_hash + MATCH_EXPIRY_SUFFIX])
+                # Entries written before the per-resume hash existed
+                pipe.get(self._key("match", resume_id, job_hash))
+                (hashed, expires_at), legacy = pipe.execute()
+                if self._match_expired(self._match_soft_remaining(expires_at)):
+                    hashed = None
+                raw = hashed or legacy
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis read failed, falling back to memory: {e}")
+                self._connection_lost()
+        if not raw:
+            raw = self.memory_cache.get(self._key("match", resume_id, job_hash))
+        return self._decode_json(raw)
+
+    def get_match_result(self, resume_id: str, job_hash: str) -> Optional[dict]:
+        json_bytes = self.get_match_result_json(resume_id, job_hash)
+        if json_bytes:
+            return loads(json_bytes)
         return None
 
-    def cache_match_result(self, resume_id: str, job_hash: str, match_result: dict, expire_seconds: int = 86400):
-        """Cache match result for a specific resume and job description pair."""
-        key = f"match:{resume_id}:{job_hash}"
-        data_str = json.dumps(match_result, ensure_ascii=False)
+    def cache_job_profile(self, job_hash: str, profile: dict, expire_seconds: int = 7 * 86400):
+        """Cache the JobProfile of a job description (see JobDescriptionService)."""
+        self._set(f"jd_profile:{job_hash}", self.codec.encode(profile, "jd_profile"), expire_seconds)
+
+    def get_job_profile(self, job_hash: str) -> Optional[dict]:
+        json_bytes = self._decode_json(self._get(f"jd_profile:{job_hash}"))
+        if json_bytes:
+            return loads(json_bytes)
+        return None
+
+    def get_cache_stats(self) -> dict:
+        """Stored bytes per entry by keyspace (this process's writes), plus Redis memory."""
+        stats = self.codec.stats_summary()
+        stats["backend"] = "redis" if self._is_available() else "memory"
+        if self.refresh_policy is not None:
+            stats["refresh"] = self.refresh_policy.stats()
+        if isinstance(self.client, ShardedRedis):
+            stats["shards"] = self.client.node_status()
         if self._is_available():
             try:
-                self.client.setex(key, expire_seconds, data_str)
+                info = self.client.info("memory")
+                if self.cluster:
+                    # RedisCluster answers per node
+                    stats["redis_used_memory"] = sum(
+                        node_info.get("used_memory", 0) for node_info in info.values() if isinstance(node_info, dict)
+                    )
+                else:
+                    stats["redis_used_memory"] = info.get("used_memory")
+            except (redis.ConnectionError, redis.TimeoutError, redis.ResponseError):
+                pass
+        return stats
+
+    # --- Content fingerprints (near-duplicate detection) ---
+
+    def cache_fingerprint(self, resume_id: str, fingerprint: dict, expire_seconds: int = 86400):
+        """Store the text fingerprint of an analyzed resume (see FingerprintService)."""
+        self._set(self._key("fingerprint", resume_id), self.codec.encode(fingerprint, "fingerprint"), expire_seconds)
+
+    def get_fingerprint(self, resume_id: str) -> Optional[dict]:
+        json_bytes = self._decode_json(self._get(self._key("fingerprint", resume_id)))
+        if json_bytes:
+            return loads(json_bytes)
+        return None
+
+    def index_text_hash(self, text_hash: str, resume_id: str, expire_seconds: int = 86400):
+        """Map a normalized-text hash to the resume_id that produced it."""
+        self._set(f"text_hash:{text_hash}", resume_id, expire_seconds)
+
+    def get_resume_id_by_text_hash(self, text_hash: str) -> Optional[str]:
+        return _text(self._get(f"text_hash:{text_hash}"))
+
+    def add_to_lsh(self, bands: List[str], resume_id: str, expire_seconds: int = 86400):
+        """Add resume_id to the LSH bucket of each band."""
+        if self._is_available():
+            try:
+                pipe = self.client.pipeline(transaction=False)
+                for band in bands:
+                    pipe.sadd(f"lsh:{band}", resume_id)
+                    pipe.expire(f"lsh:{band}", expire_seconds)
+                pipe.execute()
                 return
             except (redis.ConnectionError, redis.TimeoutError) as e:
                 print(f"Redis write failed, falling back to memory: {e}")
-                self.client = None
-        self.memory_cache[key] = data_str
-        
-    def get_match_result(self, resume_id: str, job_hash: str) -> Optional[dict]:
-        key = f"match:{resume_id}:{job_hash}"
-        data_str = None
+                self._connection_lost()
+        for band in bands:
+            key = f"lsh:{band}"
+            members = set(json.loads(self.memory_cache.get(key) or "[]"))
+            members.add(resume_id)
+            self._local_set(key, json.dumps(sorted(members)), expire_seconds)
+
+    def get_lsh_candidates(self, bands: List[str]) -> Set[str]:
+        """Union of the resume_ids sharing at least one LSH bucket with `bands`."""
+        candidates: Set[str] = set()
         if self._is_available():
             try:
-                data_str = self.client.get(key)
+                pipe = self.client.pipeline(transaction=False)
+                for band in bands:
+                    pipe.smembers(f"lsh:{band}")
+                for members in pipe.execute():
+                    candidates.update(_text(member) for member in members)
+                return candidates
             except (redis.ConnectionError, redis.TimeoutError) as e:
                 print(f"Redis read failed, falling back to memory: {e}")
-                self.client = None
-        if not data_str:
-            data_str = self.memory_cache.get(key)
-        if data_str:
-            return json.loads(data_str)
-        return None
+                self._connection_lost()
+        for band in bands:
+            candidates.update(json.loads(self.memory_cache.get(f"lsh:{band}") or "[]"))
+        return candidates
+
+    # --- Snapshots (warm starts, migrations; see services/cache_snapshot.py) ---
+
+    def export_snapshot(self, path: str, batch_size: int = 500) -> dict:
+        """
+        Write every resume_data, matches and legacy match entry, with its
+        remaining TTL, to a snapshot file. Keys are found with SCAN (never
+        KEYS) and read in pipelined batches, so Redis keeps serving meanwhile.
+        """
+        counts = {keyspace: 0 for keyspace in KEYSPACES.values()}
+        with SnapshotWriter(path) as writer:
+            for keyspace in KEYSPACES.values():
+                keys = []
+                for key in self.client.scan_iter(match=f"{keyspace}:*", count=batch_size):
+                    keys.append(key)
+                    if len(keys) >= batch_size:
+                        self._export_batch(writer, keys, counts)
+                        keys = []
+                if keys:
+                    self._export_batch(writer, keys, counts)
+        return dict(counts, records=writer.records)
+
+    def _export_batch(self, writer: SnapshotWriter, keys: List[bytes], counts: Dict[str, int]):
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            kind = parse_key(key)[0]
+            if kind == MATCHES:
+                pipe.hgetall(key)
+            else:
+                pipe.get(key)
+            pipe.pttl(key)
+        replies = pipe.execute()
+        for key, value, ttl_ms in zip(keys, replies[::2], replies[1::2]):
+            if not value or ttl_ms == -2:
+                continue  # expired since the SCAN
+            kind, resume_id, job_hash = parse_key(key)
+            if kind == MATCHES:
+                fields = {_text(field): field_value for field, field_value in value.items()}
+            else:
+                fields = {job_hash: value}
+            writer.write(SnapshotRecord(kind, resume_id, ttl_ms, fields))
+            counts[KEYSPACES[kind]] += 1
+
+    def _snapshot_key(self, record: SnapshotRecord) -> str:
+        if record.kind == LEGACY_MATCH:
+            return self._key("match", record.resume_id, next(iter(record.fields)))
+        return self._key(KEYSPACES[record.kind], record.resume_id)
+
+    def import_snapshot(self, path: str, overwrite: bool = False, batch_size: int = 500) -> dict:
+        """
+        Load a snapshot into Redis with the TTLs it had at export time, less the
+        time since. Entries that already exist are kept unless `overwrite`.
+        """
+        counts = {"imported": 0, "expired": 0, "existing": 0}
+        batch = []
+        for record, age in read_snapshot(path):
+            ttl_ms = record.ttl_ms
+            if ttl_ms >= 0:
+                ttl_ms -= int(age * 1000)
+                if ttl_ms <= 0:
+                    counts["expired"] += 1
+                    continue
+            batch.append((record._replace(ttl_ms=ttl_ms), self._snapshot_key(record)))
+            if len(batch) >= batch_size:
+                self._import_batch(batch, overwrite, counts)
+                batch = []
+        if batch:
+            self._import_batch(batch, overwrite, counts)
+        return counts
+
+    def _import_batch(self, batch: List[Tuple[SnapshotRecord, str]], overwrite: bool, counts: Dict[str, int]):
+        if not overwrite:
+            pipe = self.client.pipeline(transaction=False)
+            for _, key in batch:
+                pipe.exists(key)
+            exists = pipe.execute()
+            counts["existing"] += sum(1 for found in exists if found)
+            batch = [entry for entry, found in zip(batch, exists) if not found]
+        pipe = self.client.pipeline(transaction=False)
+        for record, key in batch:
+            ttl_ms = record.ttl_ms if record.ttl_ms > 0 else None
+            if record.kind == MATCHES:
+                pipe.hset(key, mapping=record.fields)
+                if ttl_ms:
+                    pipe.pexpire(key, ttl_ms)
+            else:
+                pipe.set(key, next(iter(record.fields.values())), px=ttl_ms)
+        pipe.execute()
+        counts["imported"] += len(batch)
+
+    def preload_snapshot(self, path: str, max_entries: Optional[int] = None) -> dict:
+        """
+        Seed the local tier from a snapshot (at boot, so a new instance starts
+        warm even before, or without, a populated Redis). Expired entries are
+        skipped; the SQLite tier keeps the remaining TTLs.
+
+        Only the shared SQLite tier is seeded, and once per instance: every
+        worker calls this at startup, the first one loads the snapshot and records
+        it in "<LOCAL_CACHE_PATH>.preloaded", the others find it there and skip.
+        A per-process dict has no expiry and is never seeded.
+        """
+        if not isinstance(self.memory_cache, SharedDiskCache):
+            return {"entries": 0, "expired": 0, "skipped": "no shared local tier (LOCAL_CACHE_PATH)"}
+        marker_path = f"{self.memory_cache.path}.preloaded"
+        snapshot = f"{os.path.abspath(path)} {os.stat(path).st_mtime_ns}"
+        with self.memory_cache.instance_lock("preload"):
+            try:
+                with open(marker_path) as f:
+                    if f.read() == snapshot:
+                        return {"entries": 0, "expired": 0, "skipped": "already preloaded on this instance"}
+            except FileNotFoundError:
+                pass
+            counts = self._preload_snapshot(path, max_entries)
+            with open(marker_path, "w") as f:
+                f.write(snapshot)
+        return counts
+
+    def _preload_snapshot(self, path: str, max_entries: Optional[int]) -> dict:
+        counts = {"entries": 0, "expired": 0}
+        for record, age in read_snapshot(path):
+            ttl_seconds = None
+            if record.ttl_ms >= 0:
+                ttl_seconds = int(record.ttl_ms / 1000 - age)
+                if ttl_seconds <= 0:
+                    counts["expired"] += 1
+                    continue
+            for field, value in record.fields.items():
+                field_ttl = ttl_seconds
+                if record.kind == RESUME_DATA:
+                    key = self._key("resume_data", record.resume_id)
+                elif field.endswith(MATCH_EXPIRY_SUFFIX):
+                    continue
+                else:
+                    key = self._key("match", record.resume_id, field)
+                    soft_remaining = self._match_soft_remaining(record.fields.get(field + MATCH_EXPIRY_SUFFIX))
+                    if soft_remaining is not None:
+                        grace = self.refresh_policy.grace_seconds if self.refresh_policy is not None else 0
+                        hard_remaining = int(soft_remaining + grace)
+                        if hard_remaining <= 0:
+                            continue
+                        field_ttl = hard_remaining if field_ttl is None else min(field_ttl, hard_remaining)
+                self._local_set(key, value, field_ttl)
+                counts["entries"] += 1
+            if max_entries is not None and counts["entries"] >= max_entries:
+                break
+        return counts
@@ -0,0 +1,226 @@
+"""
+Client-side sharding over several independent Redis nodes.
+
+ShardedRedis stands in for a `redis.Redis` client (the commands RedisService,
+SearchService and UsageService use) and sends every key to one node picked on
+a consistent-hash ring, so adding or removing a node moves only ~1/N of the
+keys. Keys are placed by their hash tag, as in Redis Cluster: if a key contains
+`{...}`, only the part between the braces is hashed. RedisService tags resume
+keys with the resume_id (resume_data:{id}, matches:{id}, ...), so a resume and
+all of its matches live on one node and the multi-key reads of one resume stay
+a single round trip.
+
+Pipelines are split per node: commands are queued with the node of their
+(first) key, each node's batch is sent as one pipeline, and the replies are put
+back in the order the commands were queued. Multi-key commands (MGET in a
+pipeline, ZINTERSTORE) must keep their keys on one node -- use a hash tag.
+
+A node that fails is marked down for `retry_seconds`: commands for its keys
+raise redis.ConnectionError right away (callers fall back to their local tier)
+while the keys of the other nodes keep being served, and the node is tried
+again once the interval has passed. Keys are not moved to the surviving nodes
+meanwhile, so a node that comes back doesn't serve entries that were
+overwritten elsewhere while it was gone.
+"""
+import bisect
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import redis
+
+Key = Union[bytes, str]
+
+
+def shard_key(key: Key) -> bytes:
+    """The part of `key` that decides its node: the hash tag if there is one (Redis Cluster rules)."""
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    start = key.find(b"{")
+    if start != -1:
+        end = key.find(b"}", start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+
+def _point(value: bytes) -> int:
+    return int.from_bytes(hashlib.md5(value).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hashing with `vnodes` points per node."""
+
+    def __init__(self, nodes: List[str], vnodes: int = 160):
+        if not nodes:
+            raise ValueError("HashRing needs at least one node")
+        self.nodes = list(nodes)
+        points = sorted(
+            (_point(f"{node}#{replica}".encode("utf-8")), node)
+            for node in self.nodes for replica in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: Key) -> str:
+        index = bisect.bisect(self._points, _point(shard_key(key))) % len(self._points)
+        return self._owners[index]
+
+
+class ShardedPipeline:
+    """Commands queued per node; `execute` sends one pipeline to each node involved."""
+
+    def __init__(self, sharded: "ShardedRedis", transaction: bool = False):
+        self._sharded = sharded
+        self._transaction = transaction
+        # (node, command, args, kwargs) in the order queued
+        self._commands: List[Tuple[str, str, tuple, dict]] = []
+
+    def __getattr__(self, command: str):
+        def queue(*args, **kwargs):
+            # A multi-key command (MGET [keys]) goes to the node of its first key
+            key = args[0][0] if isinstance(args[0], (list, tuple)) else args[0]
+            self._commands.append((self._sharded.node_for(key), command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        by_node: Dict[str, List[int]] = defaultdict(list)
+        for position, (node, _, _, _) in enumerate(self._commands):
+            by_node[node].append(position)
+        replies: list = [None] * len(self._commands)
+        failed: Optional[Exception] = None
+        for node, positions in by_node.items():
+            try:
+                client = self._sharded.client(node)
+                pipe = client.pipeline(transaction=self._transaction)
+                for position in positions:
+                    _, command, args, kwargs = self._commands[position]
+                    getattr(pipe, command)(*args, **kwargs)
+                for position, reply in zip(positions, pipe.execute()):
+                    replies[position] = reply
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                self._sharded.mark_down(node, e)
+                failed = e  # the other nodes' commands still run
+        self._commands = []
+        if failed is not None:
+            raise redis.ConnectionError(f"Redis shard unavailable: {failed}")
+        return replies
+
+
+class ShardedRedis:
+    """A consistent-hash ring of redis.Redis clients, used like one client."""
+
+    def __init__(self, clients: Dict[str, redis.Redis], retry_seconds: float = 30, vnodes: int = 160):
+        self.clients = clients
+        self.retry_seconds = retry_seconds
+        self.ring = HashRing(sorted(clients), vnodes)
+        # node -> monotonic time until which it is considered down
+        self._down_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_nodes(cls, nodes: List[str], db: int = 0, password: Optional[str] = None,
+                   retry_seconds: float = 30) -> "ShardedRedis":
+        """Clients for "host:port" node addresses."""
+        clients = {}
+        for node in nodes:
+            host, _, port = node.strip().rpartition(":")
+            clients[node.strip()] = redis.Redis(
+                host=host, port=int(port), db=db, password=password,
+                decode_responses=False, socket_connect_timeout=2
+            )
+        return cls(clients, retry_seconds)
+
+    def node_for(self, key: Key) -> str:
+        return self.ring.node_for(key)
+
+    def mark_down(self, node: str, error: Exception):
+        with self._lock:
+            if node in self._down_until:
+                return  # already down (the error came from `client`)
+            self._down_until[node] = time.monotonic() + self.retry_seconds
+        print(f"Redis shard {node} unavailable for {self.retry_seconds}s, its keys use the local tier: {error}")
+
+    def client(self, node: str) -> redis.Redis:
+        """The node's client, or ConnectionError while it is marked down."""
+        down_until = self._down_until.get(node)
+        if down_until is not None:
+            if time.monotonic() < down_until:
+                raise redis.ConnectionError(f"Redis shard {node} is marked down")
+            with self._lock:
+                self._down_until.pop(node, None)
+        return self.clients[node]
+
+    def _call(self, node: str, command: str, *args, **kwargs):
+        try:
+            return getattr(self.client(node), command)(*args, **kwargs)
+        except (redis.ConnectionError, redis.TimeoutError) as e:
+            self.mark_down(node, e)
+            raise
+
+    def __getattr__(self, command: str):
+        # Single-key commands: routed by their key
+        def route(key, *args, **kwargs):
+            return self._call(self.node_for(key), command, key, *args, **kwargs)
+        return route
+
+    def pipeline(self, transaction: bool = False) -> ShardedPipeline:
+        return ShardedPipeline(self, transaction)
+
+    def mget(self, keys: List[Key], *more: Key) -> list:
+        keys = list(keys) + list(more) if isinstance(keys, (list, tuple)) else [keys, *more]
+        pipe = self.pipeline()
+        for key in keys:
+            pipe.get(key)
+        return pipe.execute()
+
+    def delete(self, *keys: Key) -> int:
+        pipe = self.pipeline()
+        for key in keys:
+            pipe.delete(key)
+        return sum(pipe.execute())
+
+    def ping(self) -> bool:
+        """True if at least one node answers; the others are marked down."""
+        reachable = False
+        for node in self.clients:
+            try:
+                reachable = self._call(node, "ping") or reachable
+            except (redis.ConnectionError, redis.TimeoutError):
+                pass
+        if not reachable:
+            raise redis.ConnectionError("No Redis shard is reachable")
+        return True
+
+    def info(self, section: Optional[str] = None) -> dict:
+        """INFO of the reachable nodes, numeric fields summed."""
+        total: Dict[str, Union[int, float]] = {}
+        for node in self.clients:
+            try:
+                info = self._call(node, "info", section) if section else self._call(node, "info")
+            except (redis.ConnectionError, redis.TimeoutError):
+                continue
+            for field, value in info.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    total[field] = total.get(field, 0) + value
+        return total
+
+    def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None) -> Iterator[bytes]:
+        """SCAN every reachable node in turn."""
+        for node in self.clients:
+            try:
+                client = self.client(node)
+            except redis.ConnectionError:
+                continue
+            yield from client.scan_iter(match=match, count=count)
+
+    def flushdb(self):
+        for node in self.clients:
+            self._call(node, "flushdb")
+
+    def node_status(self) -> Dict[str, str]:
+        now = time.monotonic()
+        return {node: "down" if self._down_until.get(node, 0) > now else "up" for node in self.clients}
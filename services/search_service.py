@@ -0,0 +1,242 @@
+import heapq
+import json
+import re
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import redis
+
+# Latin words (keeping things like c++, c#, node.js) and runs of CJK characters
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]|[一-鿿]+")
+_YEARS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?|年)", re.IGNORECASE)
+_STOPWORDS = {
+    "and", "or", "with", "the", "of", "in", "at", "for", "a", "an", "to", "on",
+    "years", "year", "yrs", "experience", "skilled", "skills", "familiar",
+    "熟悉", "掌握", "精通", "了解", "以及", "和", "及",
+}
+_INDEXED_FIELDS = ("job_intention", "education_background", "raw_text_summary")
+
+
+def _tokenize(text: Optional[str]) -> Set[str]:
+    """
+    Lowercased latin words plus CJK character bigrams, so that "北京" matches
+    "北京市海淀区" without a segmentation dictionary.
+    """
+    if not text:
+        return set()
+    terms = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if "一" <= word[0] <= "鿿":
+            if len(word) == 1:
+                terms.add(word)
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            word = word.rstrip(".")
+            if word and word not in _STOPWORDS:
+                terms.add(word)
+    return terms - _STOPWORDS
+
+
+def parse_work_years(value: Optional[str]) -> float:
+    """'5年', '5 years', '3.5 yrs' -> 5.0, 5.0, 3.5; anything unparseable -> 0."""
+    if not value:
+        return 0.0
+    match = _YEARS_RE.search(value) or re.search(r"\d+(?:\.\d+)?", value)
+    return float(match.group(1) if match.groups() else match.group(0)) if match else 0.0
+
+
+class SearchService:
+    """
+    Inverted index over analyzed resumes, for queries like "Python, 5 years, Beijing".
+
+    Indexed terms come from job_intention, education_background, basic_info.address
+    and the skills in raw_text_summary; work_years is kept as a number for
+    minimum-experience filtering. Entries are written incrementally on every
+    /analyze and, unlike `resume_data:` keys, do not expire.
+
+    With Redis the index lives in
+        search:term:{term}   SET of resume_ids
+        search:years         ZSET resume_id -> years of experience
+        search:doc:{id}      JSON summary returned in results (plus its terms)
+    and a query is one SINTER-style ZINTERSTORE plus a range read. Without Redis
+    the same structures are kept in process memory, for at most
+    `max_memory_documents` resumes (the oldest indexed are dropped first). With
+    sharded Redis the keys are hash-tagged ({search}:term:...) so the whole
+    index stays on one node.
+    """
+
+    def __init__(self, redis_service, max_memory_documents: int = 10000):
+        self.redis_service = redis_service
+        self.max_memory_documents = max_memory_documents
+        self._prefix = "{search}" if getattr(redis_service, "sharded", False) else "search"
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._years: Dict[str, float] = {}
+        # resume_ids bucketed by years of experience, for ordered paging
+        self._by_years: Dict[float, Set[str]] = defaultdict(set)
+        self._docs: Dict[str, dict] = {}
+
+    @property
+    def _client(self):
+        return self.redis_service.client
+
+    @staticmethod
+    def document_terms(data: dict) -> Set[str]:
+        basic_info = data.get("basic_info") or {}
+        terms = _tokenize(basic_info.get("address"))
+        for field in _INDEXED_FIELDS:
+            terms |= _tokenize(data.get(field))
+        return terms
+
+    @staticmethod
+    def parse_query(q: str) -> Tuple[Set[str], float]:
+        """Split a free-text query into required terms and a minimum years filter."""
+        min_years = 0.0
+        match = _YEARS_RE.search(q or "")
+        if match:
+            min_years = float(match.group(1))
+            q = q[:match.start()] + " " + q[match.end():]
+        return _tokenize(q), min_years
+
+    def index_resume(self, resume_id: str, data: dict):
+        """Add or replace a resume in the index."""
+        basic_info = data.get("basic_info") or {}
+        terms = self.document_terms(data)
+        years = parse_work_years(data.get("work_years"))
+        doc = {
+            "resume_id": resume_id,
+            "name": basic_info.get("name"),
+            "address": basic_info.get("address"),
+            "job_intention": data.get("job_intention"),
+            "work_years": data.get("work_years"),
+            "education_background": data.get("education_background"),
+        }
+
+        if self._client is not None:
+            try:
+                previous = self._client.get(f"{self._prefix}:doc:{resume_id}")
+                old_terms = set(json.loads(previous).get("terms", [])) if previous else set()
+                pipe = self._client.pipeline(transaction=True)
+                for term in old_terms - terms:
+                    pipe.srem(f"{self._prefix}:term:{term}", resume_id)
+                for term in terms - old_terms:
+                    pipe.sadd(f"{self._prefix}:term:{term}", resume_id)
+                pipe.zadd(f"{self._prefix}:years", {resume_id: years})
+                pipe.set(f"{self._prefix}:doc:{resume_id}", json.dumps(dict(doc, terms=sorted(terms)), ensure_ascii=False))
+                pipe.execute()
+                return
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis search index write failed, falling back to memory: {e}")
+
+        # Re-indexing moves the resume to the newest end of the eviction order
+        self._remove_memory(resume_id)
+        for term in terms:
+            self._postings[term].add(resume_id)
+        self._years[resume_id] = years
+        self._by_years[years].add(resume_id)
+        self._docs[resume_id] = dict(doc, terms=terms)
+        while len(self._docs) > self.max_memory_documents:
+            self._remove_memory(next(iter(self._docs)))
+
+    def _remove_memory(self, resume_id: str):
+        """Drop a resume from the in-memory index, and the postings it leaves empty."""
+        doc = self._docs.pop(resume_id, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            postings = self._postings[term]
+            postings.discard(resume_id)
+            if not postings:
+                del self._postings[term]
+        years = self._years.pop(resume_id)
+        self._by_years[years].discard(resume_id)
+        if not self._by_years[years]:
+            del self._by_years[years]
+
+    def search(self, q: str = "", min_years: float = 0.0, page: int = 1, page_size: int = 20) -> dict:
+        """
+        Resumes containing every query term with at least `min_years` of experience,
+        most experienced first. Returns {"total", "results"} for the requested page.
+        """
+        terms, parsed_years = self.parse_query(q)
+        min_years = max(min_years, parsed_years)
+        offset = (max(page, 1) - 1) * page_size
+
+        if self._client is not None:
+            try:
+                return self._search_redis(terms, min_years, offset, page_size)
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis search failed, falling back to memory: {e}")
+        return self._search_memory(terms, min_years, offset, page_size)
+
+    def _search_redis(self, terms: Set[str], min_years: float, offset: int, limit: int) -> dict:
+        if terms:
+            # Intersect the term sets with the years ZSET; weights keep the years as score.
+            tmp_key = f"{self._prefix}:tmp:{uuid.uuid4().hex}"
+            keys = {f"{self._prefix}:years": 1}
+            keys.update({f"{self._prefix}:term:{term}": 0 for term in terms})
+            pipe = self._client.pipeline(transaction=False)
+            pipe.zinterstore(tmp_key, keys)
+            pipe.zcount(tmp_key, min_years, "+inf")
+            pipe.zrevrangebyscore(tmp_key, "+inf", min_years, start=offset, num=limit)
+            pipe.delete(tmp_key)
+            _, total, ids, _ = pipe.execute()
+        else:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.zcount(f"{self._prefix}:years", min_years, "+inf")
+            pipe.zrevrangebyscore(f"{self._prefix}:years", "+inf", min_years, start=offset, num=limit)
+            total, ids = pipe.execute()
+
+        results = []
+        if ids:
+            # The client does not decode responses (cached values are binary)
+            ids = [i.decode("utf-8") if isinstance(i, bytes) else i for i in ids]
+            for raw in self._client.mget([f"{self._prefix}:doc:{resume_id}" for resume_id in ids]):
+                if raw:
+                    doc = json.loads(raw)
+                    doc.pop("terms", None)
+                    results.append(doc)
+        return {"total": total, "results": results}
+
+    def _search_memory(self, terms: Set[str], min_years: float, offset: int, limit: int) -> dict:
+        matches: Optional[Set[str]] = None  # None means every indexed resume
+        if terms:
+            postings = sorted((self._postings.get(term, set()) for term in terms), key=len)
+            matches = postings[0]
+            for other in postings[1:]:
+                matches = matches & other
+                if not matches:
+                    break
+
+        def hits_in(years: float) -> Set[str]:
+            bucket = self._by_years[years]
+            if matches is None:
+                return bucket
+            return bucket & matches if len(bucket) <= len(matches) else matches & bucket
+
+        ordered = sorted(self._by_years, reverse=True)
+        eligible = [years for years in ordered if years >= min_years]
+        excluded = ordered[len(eligible):]
+        # Count from whichever side of the min_years cut has fewer buckets to intersect
+        total = len(self._years) if matches is None else len(matches)
+        if excluded:
+            if len(excluded) < len(eligible):
+                total -= sum(len(hits_in(years)) for years in excluded)
+            else:
+                total = sum(len(hits_in(years)) for years in eligible)
+
+        # Most experienced first: only the buckets that reach the requested page are
+        # intersected, and only the rows on it are ordered.
+        page: List[str] = []
+        needed = offset + limit
+        for years in eligible:
+            if len(page) >= needed:
+                break
+            page.extend(heapq.nlargest(needed - len(page), hits_in(years)))
+
+        results = []
+        for resume_id in page[offset:offset + limit]:
+            doc = dict(self._docs[resume_id])
+            doc.pop("terms", None)
+            results.append(doc)
+        return {"total": total, "results": results}
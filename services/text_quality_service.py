@@ -0,0 +1,105 @@
+import re
+import unicodedata
+
+# Garbage markers left by broken text layers
+_CID_RE = re.compile(r"\(cid:\d+\)")
+# UTF-8 bytes decoded as Latin-1/CP1252: "Ã©", "Â ", "â€™" ...
+_MOJIBAKE_RE = re.compile("Ã[\u0080-¿]|Â[\u0080-¿ ]|â€")
+_LATIN_WORD_RE = re.compile(r"[A-Za-z]{3,}")
+_CONSONANT_RUN_RE = re.compile(r"[bcdfghjklmnpqrstvwxz]{5,}")
+_CJK_PUNCTUATION = set("，。、；：？！“”‘’（）《》【】—…·「」『』〈〉")
+
+# Frequent words in resumes; together with the vowel check this makes the Latin
+# "dictionary hit rate" without shipping a word list.
+_COMMON_WORDS = {
+    "the", "and", "for", "with", "from", "this", "that", "have", "has", "was", "are", "our",
+    "experience", "education", "skills", "project", "projects", "work", "engineer", "developer",
+    "manager", "university", "bachelor", "master", "degree", "company", "team", "system",
+    "systems", "design", "development", "software", "data", "service", "services", "python",
+    "java", "email", "phone", "address", "summary", "profile", "years", "senior", "lead",
+}
+
+
+def _is_common_cjk(ch: str) -> bool:
+    """
+    The 6763 GB2312 hanzi (Simplified) and the 13060 Big5 ones (Traditional)
+    cover nearly all real resume text; mojibake tends to fall outside both.
+    """
+    for encoding in ("gb2312", "big5"):
+        try:
+            ch.encode(encoding)
+            return True
+        except UnicodeEncodeError:
+            pass
+    return False
+
+
+class TextQualityService:
+    """
+    Cheap per-page check for garbled text layers (CID/Type3 fonts, broken
+    ToUnicode maps). Such pages extract "successfully" but as mojibake; sending
+    them to qwen-turbo returns nulls and costs a round trip, so they are routed
+    to the vision path instead. Pure string statistics, no model call.
+    """
+
+    @staticmethod
+    def analyze(text: str) -> dict:
+        """Character statistics behind `score`."""
+        chars = [ch for ch in text if not ch.isspace()]
+        total = len(chars)
+        stats = {
+            "chars": total, "bad": 0, "other": 0, "cjk": 0, "rare_cjk": 0,
+            "words": 0, "valid_words": 0,
+        }
+        if not total:
+            return stats
+
+        bad = text.count("�") + 3 * len(_CID_RE.findall(text)) + 2 * len(_MOJIBAKE_RE.findall(text))
+        for ch in chars:
+            if ch.isascii():
+                if unicodedata.category(ch) == "Cc":
+                    bad += 1
+                continue
+            if "一" <= ch <= "鿿" or "㐀" <= ch <= "䶿":
+                stats["cjk"] += 1
+                if not _is_common_cjk(ch):
+                    stats["rare_cjk"] += 1
+                continue
+            if ch in _CJK_PUNCTUATION or "！" <= ch <= "～":  # full-width forms
+                continue
+            category = unicodedata.category(ch)
+            if category in ("Co", "Cc", "Cn") or ch == "�":  # private use, control, unassigned
+                bad += 1
+            elif category[0] != "L" or category == "Lo":
+                # Symbols, box drawing, stray scripts: rare in a resume
+                stats["other"] += 1
+        stats["bad"] = bad
+
+        for word in _LATIN_WORD_RE.findall(text):
+            stats["words"] += 1
+            lowered = word.lower()
+            if lowered in _COMMON_WORDS or word.isupper() and len(word) <= 5:
+                stats["valid_words"] += 1
+            elif re.search(r"[aeiouy]", lowered) and not _CONSONANT_RUN_RE.search(lowered):
+                stats["valid_words"] += 1
+        return stats
+
+    @staticmethod
+    def score(text: str) -> float:
+        """0 (garbage) .. 1 (clean). Empty text scores 0."""
+        stats = TextQualityService.analyze(text)
+        total = stats["chars"]
+        if not total:
+            return 0.0
+        score = 1.0
+        score -= min(1.0, stats["bad"] / total * 10)          # 10% bad characters -> 0
+        score -= min(0.6, stats["other"] / total * 2)
+        if stats["cjk"] >= 10:
+            score -= 0.8 * stats["rare_cjk"] / stats["cjk"]
+        if stats["words"] >= 5:
+            score -= 0.6 * (1 - stats["valid_words"] / stats["words"])
+        return round(max(0.0, min(1.0, score)), 3)
+
+    @staticmethod
+    def is_garbled(text: str, min_score: float) -> bool:
+        return TextQualityService.score(text) < min_score
@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+import redis
+
+_TENANT_RE = re.compile(r"[^A-Za-z0-9_.-]")
+_COUNTERS = ("input_tokens", "output_tokens", "image_tokens", "calls")
+# (UsageService, tenant) that model calls in the current context are billed to
+_current: ContextVar[Optional[Tuple["UsageService", str]]] = ContextVar("usage_meter", default=None)
+
+
+def _usage_value(usage, name: str) -> int:
+    """A counter from a DashScope `usage` (a dict subclass; some SDK versions use attributes)."""
+    value = usage.get(name) if hasattr(usage, "get") else getattr(usage, name, None)
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def record_model_usage(model: str, response):
+    """
+    Bill the token usage of a DashScope response to the tenant of the current
+    request (see UsageService.metering). A no-op outside of a metered context.
+    """
+    meter = _current.get()
+    usage = getattr(response, "usage", None)
+    if meter is None or usage is None:
+        return
+    service, tenant = meter
+    try:
+        service.record(tenant, model, {
+            "input_tokens": _usage_value(usage, "input_tokens"),
+            "output_tokens": _usage_value(usage, "output_tokens"),
+            "image_tokens": _usage_value(usage, "image_tokens"),
+        })
+    except Exception as e:
+        print(f"Token accounting failed: {e}")
+
+
+class UsageService:
+    """
+    Model token accounting and daily budgets per tenant (the API client, named
+    by a request header).
+
+    Every DashScope response carries a `usage` block; AIService hands it to
+    `record_model_usage`, which bills it to the tenant of the request being
+    served (a context variable set by `metering`, so it follows the request into
+    the threadpool). Counters are Redis hashes updated with HINCRBY, so every
+    worker process and instance adds to the same totals:
+        usage:{YYYYMMDD}:{tenant}   input_tokens, output_tokens, image_tokens,
+                                    calls, tokens:{model}
+        usage:tenants:{YYYYMMDD}    SET of the tenants seen that (UTC) day
+    Without Redis the counters are kept in process memory.
+
+    A tenant's budget is its input + output tokens per UTC day; 0 is unlimited.
+    """
+
+    def __init__(self, redis_service, default_budget: int = 0, budgets: Optional[Dict[str, int]] = None,
+                 retention_days: int = 35):
+        self.redis_service = redis_service
+        self.default_budget = default_budget
+        self.budgets = budgets or {}
+        self.retention_seconds = retention_days * 86400
+        self._memory: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, redis_service, settings) -> "UsageService":
+        budgets: Dict[str, int] = {}
+        for item in settings.TENANT_TOKEN_BUDGETS.split(","):
+            tenant, _, budget = item.strip().partition("=")
+            if tenant:
+                try:
+                    budgets[tenant.strip()] = int(budget)
+                except ValueError:
+                    print(f"Ignoring malformed TENANT_TOKEN_BUDGETS entry: {item}")
+        return cls(redis_service, settings.TENANT_DAILY_TOKEN_BUDGET, budgets)
+
+    @property
+    def _client(self):
+        return self.redis_service.client
+
+    @staticmethod
+    def tenant_name(value: Optional[str]) -> str:
+        """A safe tenant name from a header value ("default" if absent)."""
+        name = _TENANT_RE.sub("", value or "")[:64]
+        return name or "default"
+
+    @staticmethod
+    def day(timestamp: Optional[float] = None) -> str:
+        return time.strftime("%Y%m%d", time.gmtime(timestamp))
+
+    @staticmethod
+    def seconds_until_reset() -> int:
+        return 86400 - int(time.time()) % 86400
+
+    @contextmanager
+    def metering(self, tenant: str):
+        """Bill the model calls made in this context (threadpool work included) to `tenant`."""
+        reset = _current.set((self, tenant))
+        try:
+            yield
+        finally:
+            _current.reset(reset)
+
+    def record(self, tenant: str, model: str, counts: Dict[str, int]):
+        day = self.day()
+        increments = dict(counts, calls=1)
+        increments[f"tokens:{model}"] = counts.get("input_tokens", 0) + counts.get("output_tokens", 0)
+        if self._client is not None:
+            try:
+                key = f"usage:{day}:{tenant}"
+                pipe = self._client.pipeline(transaction=False)
+                for field, amount in increments.items():
+                    if amount:
+                        pipe.hincrby(key, field, amount)
+                pipe.expire(key, self.retention_seconds)
+                pipe.sadd(f"usage:tenants:{day}", tenant)
+                pipe.expire(f"usage:tenants:{day}", self.retention_seconds)
+                pipe.execute()
+                return
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis usage write failed, counting in memory: {e}")
+        with self._lock:
+            counters = self._memory[f"{day}:{tenant}"]
+            for field, amount in increments.items():
+                counters[field] += amount
+
+    def _tenants(self, day: str):
+        if self._client is not None:
+            try:
+                return sorted(member.decode("utf-8") if isinstance(member, bytes) else member
+                              for member in self._client.smembers(f"usage:tenants:{day}"))
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis usage read failed, falling back to memory: {e}")
+        prefix = f"{day}:"
+        return sorted(key[len(prefix):] for key in list(self._memory) if key.startswith(prefix))
+
+    def usage(self, tenant: str, day: Optional[str] = None) -> dict:
+        """One tenant's counters for a day (today by default), with its budget."""
+        day = day or self.day()
+        raw: Dict[str, int] = {}
+        if self._client is not None:
+            try:
+                raw = {
+                    (field.decode("utf-8") if isinstance(field, bytes) else field): int(value)
+                    for field, value in self._client.hgetall(f"usage:{day}:{tenant}").items()
+                }
+            except (redis.ConnectionError, redis.TimeoutError) as e:
+                print(f"Redis usage read failed, falling back to memory: {e}")
+                raw = dict(self._memory.get(f"{day}:{tenant}", {}))
+        else:
+            raw = dict(self._memory.get(f"{day}:{tenant}", {}))
+        report = {counter: raw.get(counter, 0) for counter in _COUNTERS}
+        report["total_tokens"] = report["input_tokens"] + report["output_tokens"]
+        report["by_model"] = {field[len("tokens:"):]: value for field, value in raw.items()
+                              if field.startswith("tokens:")}
+        budget = self.budget(tenant)
+        report["budget"] = budget
+        report["remaining"] = max(0, budget - report["total_tokens"]) if budget else None
+        return report
+
+    def report(self, day: Optional[str] = None) -> dict:
+        """Every tenant's usage for a day."""
+        day = day or self.day()
+        return {"day": day, "tenants": {tenant: self.usage(tenant, day) for tenant in self._tenants(day)}}
+
+    def budget(self, tenant: str) -> int:
+        return self.budgets.get(tenant, self.default_budget)
+
+    def over_budget(self, tenant: str) -> bool:
+        """Whether the tenant has used up today's token budget."""
+        if not self.budget(tenant):
+            return False
+        return self.usage(tenant)["total_tokens"] >= self.budget(tenant)
@@ -7,6 +7,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from services.cache_codec import CacheCodec
+from services.redis_service import RedisService
 
 
 @pytest.fixture(scope="session")
@@ -15,6 +17,25 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def redis_service():
+    """
+    Factory for RedisService instances built without connecting to anything:
+    `client` is the Redis to use (fakeredis, a ShardedRedis) or None for the
+    local tier only, `memory_cache` the local tier (a fresh dict by default).
+    Each instance gets its own CacheCodec, so its stats start at zero.
+    """
+    def make(client=None, memory_cache=None, sharded=False, refresh_policy=None, codec=None):
+        service = RedisService.__new__(RedisService)
+        service.memory_cache = {} if memory_cache is None else memory_cache
+        service.client = client
+        service.codec = codec or CacheCodec()
+        service.sharded = sharded
+        service.refresh_policy = refresh_policy
+        return service
+    return make
+
+
 @pytest.fixture(scope="session")
 def test_pdf_bytes():
     """Generate and return test PDF bytes."""
@@ -67,6 +67,78 @@ def generate_empty_pdf(output_path: str):
     print(f"Empty PDF generated: {output_path}")
 
 
+def _write_resume_page(pdf: FPDF, page_number: int):
+    """Write one page of filler resume content (project history etc.)."""
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=14)
+    pdf.cell(0, 10, text=f"Project Portfolio - Page {page_number}", new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=10)
+    for i in range(25):
+        pdf.cell(
+            0, 7,
+            text=f"Project {page_number}.{i}: Built a Python/FastAPI service with Redis caching and Docker.",
+            new_x="LMARGIN", new_y="NEXT"
+        )
+
+
+def generate_multipage_resume_pdf(output_path: str, pages: int = 1):
+    """Generate a text-based resume PDF with the given number of pages."""
+    generate_test_resume_pdf(output_path)
+    if pages <= 1:
+        return
+    import fitz  # PyMuPDF
+
+    extra = FPDF()
+    for page_number in range(2, pages + 1):
+        _write_resume_page(extra, page_number)
+    doc = fitz.open(output_path)
+    doc.insert_pdf(fitz.open(stream=bytes(extra.output()), filetype="pdf"))
+    doc.save(output_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+    doc.close()
+
+
+def generate_scanned_resume_pdf(output_path: str, pages: int = 1, dpi: int = 100):
+    """
+    Generate an image-only ("scanned") resume PDF.
+    Each page of a text resume is rasterized and re-embedded as a picture, so the
+    result has no text layer at all.
+    """
+    import fitz  # PyMuPDF
+    import tempfile
+
+    text_path = os.path.join(tempfile.gettempdir(), f"_scan_src_{os.getpid()}.pdf")
+    generate_multipage_resume_pdf(text_path, pages)
+    src = fitz.open(text_path)
+    out = fitz.open()
+    for page in src:
+        pix = page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72))
+        new_page = out.new_page(width=page.rect.width, height=page.rect.height)
+        new_page.insert_image(new_page.rect, stream=pix.tobytes("png"))
+    out.save(output_path)
+    out.close()
+    src.close()
+    os.remove(text_path)
+
+
+def generate_mixed_resume_pdf(output_path: str, pages: int = 2, dpi: int = 100):
+    """Generate a resume whose first page has a text layer and the rest are scanned images."""
+    import fitz  # PyMuPDF
+    import tempfile
+
+    scan_path = os.path.join(tempfile.gettempdir(), f"_mixed_src_{os.getpid()}.pdf")
+    generate_test_resume_pdf(output_path)
+    if pages <= 1:
+        return
+    generate_scanned_resume_pdf(scan_path, pages, dpi=dpi)
+    doc = fitz.open(output_path)
+    scanned = fitz.open(scan_path)
+    doc.insert_pdf(scanned, from_page=1)
+    doc.save(output_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+    doc.close()
+    scanned.close()
+    os.remove(scan_path)
+
+
 if __name__ == "__main__":
     test_dir = os.path.dirname(os.path.abspath(__file__))
     generate_test_resume_pdf(os.path.join(test_dir, "test_resume.pdf"))
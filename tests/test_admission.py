@@ -0,0 +1,154 @@
+"""Unit tests for the admission controller (core/admission.py)."""
+import asyncio
+import time
+
+import pytest
+from core.admission import AdmissionController, Lane, Overloaded, TenantLimiter
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestLane:
+    """Test lane limits, queueing and wait-time based shedding."""
+
+    def test_admits_up_to_concurrency_then_queues(self):
+        async def scenario():
+            lane = Lane("text", concurrency=2, queue_size=4, service_time=0.01)
+            deadline = time.monotonic() + 10
+            order = []
+
+            async def job(i):
+                async with lane.slot(deadline):
+                    order.append(i)
+                    await asyncio.sleep(0.02)
+
+            await asyncio.gather(*(job(i) for i in range(5)))
+            return lane, order
+
+        lane, order = _run(scenario())
+        assert order == [0, 1, 2, 3, 4]  # FIFO
+        assert lane.active == 0 and lane.queued == 0
+        assert lane.admitted == 5
+
+    def test_full_queue_returns_429(self):
+        async def scenario():
+            lane = Lane("vision", concurrency=1, queue_size=1, service_time=0.01)
+            deadline = time.monotonic() + 10
+            await lane.acquire(deadline)  # running
+            queued = asyncio.ensure_future(lane.acquire(deadline))
+            await asyncio.sleep(0)
+            with pytest.raises(Overloaded) as exc_info:
+                await lane.acquire(deadline)
+            lane.release(0.01)
+            await queued
+            lane.release(0.01)
+            return exc_info.value
+
+        exc = _run(scenario())
+        assert exc.status_code == 429
+        assert exc.retry_after >= 1
+
+    def test_expected_wait_past_deadline_returns_503_without_queueing(self):
+        async def scenario():
+            lane = Lane("vision", concurrency=1, queue_size=10, service_time=30.0)
+            await lane.acquire(time.monotonic() + 100)
+            with pytest.raises(Overloaded) as exc_info:
+                await lane.acquire(time.monotonic() + 40)  # 30 s wait + 30 s work > 40 s
+            return lane, exc_info.value
+
+        lane, exc = _run(scenario())
+        assert exc.status_code == 503
+        assert exc.retry_after == 30
+        assert lane.queued == 0
+        assert lane.stats()["shed_503"] == 1
+
+    def test_waiting_past_the_deadline_is_shed(self):
+        async def scenario():
+            lane = Lane("text", concurrency=1, queue_size=10, service_time=0.0)
+            await lane.acquire(time.monotonic() + 10)
+            start = time.monotonic()
+            with pytest.raises(Overloaded):
+                await lane.acquire(time.monotonic() + 0.05)
+            return time.monotonic() - start, lane
+
+        waited, lane = _run(scenario())
+        assert waited < 1
+        assert lane.queued == 0
+
+    def test_cancelled_waiter_does_not_leak_a_slot(self):
+        async def scenario():
+            lane = Lane("text", concurrency=1, queue_size=10, service_time=0.01)
+            deadline = time.monotonic() + 10
+            await lane.acquire(deadline)
+            waiter = asyncio.ensure_future(lane.acquire(deadline))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+            lane.release(0.01)
+            return lane
+
+        lane = _run(scenario())
+        assert lane.active == 0
+
+    def test_service_time_is_a_moving_average(self):
+        lane = Lane("text", concurrency=1, queue_size=1, service_time=10.0)
+        lane.active = 1
+        lane.release(0.0)
+        assert lane.service_time == pytest.approx(8.0)
+
+
+class TestAdmissionController:
+    def test_lanes_are_independent(self):
+        async def scenario():
+            controller = AdmissionController({
+                "cache": Lane("cache", 4, 10, 0.01),
+                "vision": Lane("vision", 1, 0, 30.0),
+            })
+            deadline = time.monotonic() + 100
+            await controller.lane("vision").acquire(deadline)
+            with pytest.raises(Overloaded):
+                await controller.lane("vision").acquire(deadline)
+            # A saturated vision lane does not affect cache hits
+            async with controller.lane("cache").slot(deadline):
+                pass
+            return controller.stats()
+
+        stats = _run(scenario())
+        assert stats["vision"]["shed_429"] == 1
+        assert stats["cache"]["admitted"] == 1
+
+
+class TestTenantLimiter:
+    def test_caps_one_tenant_without_affecting_others(self):
+        async def scenario():
+            limiter = TenantLimiter(max_active=2)
+            release = asyncio.Event()
+
+            async def job(tenant):
+                async with limiter.slot(tenant):
+                    await release.wait()
+
+            busy = [asyncio.ensure_future(job("team-a")) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(Overloaded) as exc:
+                async with limiter.slot("team-a"):
+                    pass
+            async with limiter.slot("team-b"):
+                pass
+            release.set()
+            await asyncio.gather(*busy)
+            return limiter, exc.value
+
+        limiter, error = _run(scenario())
+        assert error.status_code == 429
+        assert limiter.stats() == {"max_active": 2, "active": {}, "shed_429": 1}
+
+    def test_zero_disables(self):
+        async def scenario():
+            limiter = TenantLimiter(max_active=0)
+            async with limiter.slot("a"), limiter.slot("a"):
+                return limiter.stats()["active"]
+
+        assert _run(scenario()) == {}
@@ -1,4 +1,6 @@
-"""Unit tests for AIService._parse_json_result (JSON parsing logic only, no API calls)."""
+"""Unit tests for AIService response parsing (no API calls: DashScope is stubbed)."""
+import json
+
 import pytest
 from services.ai_service import AIService
 
@@ -63,3 +65,30 @@ class TestParseJsonResult:
         text = '   \n  {"score": 75}  \n  '
         result = AIService._parse_json_result(text)
         assert result["score"] == 75
+
+
+class TestScoreResumeMany:
+    """Batched scoring: one call, results mapped back by job number."""
+
+    def test_results_follow_job_numbers(self, monkeypatch):
+        from types import SimpleNamespace
+        from dashscope import Generation
+        sent = []
+
+        def fake_call(model, messages, result_format):
+            sent.append(messages[1]["content"])
+            content = json.dumps({"results": [
+                {"job": 2, "score": 80, "skills_match_rate": "80%", "experience_relevance": "ok", "comment": "second"},
+                {"job": 1, "score": "65", "skills_match_rate": "60%", "experience_relevance": "ok", "comment": "first"},
+                {"job": 9, "score": 99},
+            ]})
+            return SimpleNamespace(status_code=200, output=SimpleNamespace(choices=[{"message": {"content": content}}]))
+
+        monkeypatch.setattr(Generation, "call", staticmethod(fake_call))
+        results = AIService.score_resume_many(
+            {"job_intention": "Engineer"}, [{"skills": ["java"]}, {"skills": ["python"]}, {"skills": ["go"]}], "key"
+        )
+        assert len(sent) == 1
+        assert sent[0].count("Engineer") == 1
+        assert [r.comment if r else None for r in results] == ["first", "second", None]
+        assert results[0].score == 65
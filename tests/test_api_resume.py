@@ -1,6 +1,7 @@
 """API integration tests for /api/resume/analyze and /api/resume/match endpoints."""
 import pytest
 import io
+import time
 
 
 class TestAnalyzeEndpoint:
@@ -56,6 +57,45 @@ class TestAnalyzeEndpoint:
         # Same resume_id (same file hash)
         assert data2["resume_id"] == response1.json()["resume_id"]
 
+    def test_analyze_cache_hit_has_etag_and_304(self, client, test_pdf_bytes):
+        """Cache hits carry a stable ETag; a matching If-None-Match gets 304 with no body."""
+        upload = lambda: {"file": ("resume.pdf", io.BytesIO(test_pdf_bytes), "application/pdf")}
+        client.post("/api/resume/analyze", files=upload())
+        hit1 = client.post("/api/resume/analyze", files=upload())
+        hit2 = client.post("/api/resume/analyze", files=upload())
+        assert hit1.status_code == 200
+        assert hit1.headers["content-type"] == "application/json"
+        etag = hit1.headers["etag"]
+        assert etag and etag == hit2.headers["etag"]
+        assert hit1.content == hit2.content
+
+        not_modified = client.post("/api/resume/analyze", files=upload(), headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+
+        stale = client.post("/api/resume/analyze", files=upload(), headers={"If-None-Match": '"other"'})
+        assert stale.status_code == 200
+
+    def test_analyze_reexported_pdf_reuses_result(self, client, test_pdf_bytes):
+        """A different file with the same text content reuses the cached extraction."""
+        response1 = client.post(
+            "/api/resume/analyze",
+            files={"file": ("resume.pdf", io.BytesIO(test_pdf_bytes), "application/pdf")}
+        )
+        assert response1.status_code == 200
+
+        reexported = test_pdf_bytes + b"\n%re-exported\n"
+        response2 = client.post(
+            "/api/resume/analyze",
+            files={"file": ("resume.pdf", io.BytesIO(reexported), "application/pdf")}
+        )
+        assert response2.status_code == 200
+        data2 = response2.json()
+        assert data2["resume_id"] != response1.json()["resume_id"]
+        assert "Duplicate Content" in data2["message"]
+        assert data2["data"] == response1.json()["data"]
+
     def test_analyze_empty_pdf(self, client, empty_pdf_bytes):
         """Upload an empty PDF (no text) goes through image-based/mock path."""
         response = client.post(
@@ -151,3 +191,395 @@ class TestMatchEndpoint:
         assert response2.status_code == 200
         data2 = response2.json()
         assert "Cache Hit" in data2["message"]
+        assert data2["match_result"] == response1.json()["match_result"]
+        # Both carry the JD's leaderboard key
+        assert data2["job_hash"] == response1.json()["job_hash"]
+        board = client.get(f"/api/resume/leaderboard/{data2['job_hash']}", params={"page_size": 100}).json()
+        assert resume_id in [row["resume_id"] for row in board["results"]]
+
+        # Conditional request against the cached match
+        response3 = client.post(
+            "/api/resume/match",
+            json={"resume_id": resume_id, "job_description": job_desc},
+            headers={"If-None-Match": response2.headers["etag"]}
+        )
+        assert response3.status_code == 304
+
+    def test_match_normalized_job_description_hits_cache(self, client, test_pdf_bytes):
+        """Whitespace and case differences in the JD should not miss the cache."""
+        resume_id = self._ensure_resume_uploaded(client, test_pdf_bytes)
+        response1 = client.post(
+            "/api/resume/match",
+            json={"resume_id": resume_id, "job_description": "Golang developer, Kubernetes and gRPC."}
+        )
+        assert response1.status_code == 200
+
+        response2 = client.post(
+            "/api/resume/match",
+            json={"resume_id": resume_id, "job_description": "  GOLANG developer,\n  kubernetes and gRPC. "}
+        )
+        assert response2.status_code == 200
+        assert "Cache Hit" in response2.json()["message"]
+
+
+    def test_stale_hot_match_is_refreshed_in_background(self, client, monkeypatch, redis_service):
+        """A stale entry is still served; one request re-scores it behind the scenes."""
+        fakeredis = pytest.importorskip("fakeredis")
+        import api.resume
+        from services.cache_refresh import RefreshPolicy
+        from services.jd_service import JobDescriptionService
+        service = redis_service(fakeredis.FakeRedis(), refresh_policy=RefreshPolicy(grace_seconds=3600, min_hits=2))
+        monkeypatch.setattr(api.resume, "redis_service", service)
+
+        job_desc = "Python developer"
+        job_hash = JobDescriptionService.job_hash(job_desc)
+        service.cache_resume_data("stale", {"basic_info": {"name": "Stale"}, "skills": ["Python"]})
+        stale = {"score": 1, "skills_match_rate": "0%", "experience_relevance": "old", "comment": "old"}
+        service.cache_match_result("stale", job_hash, stale)
+        service.client.hset("matches:stale", f"{job_hash}:exp", int(time.time()) - 60)
+
+        for _ in range(2):  # the 2nd read makes the entry hot
+            response = client.post("/api/resume/match", json={"resume_id": "stale", "job_description": job_desc})
+            assert response.status_code == 200
+            assert response.json()["match_result"] == stale
+        # The refresh ran after the 2nd response was sent
+        assert int(service.client.hget("matches:stale", f"{job_hash}:exp")) > time.time() + 3600
+        refreshed = client.post("/api/resume/match", json={"resume_id": "stale", "job_description": job_desc})
+        assert refreshed.json()["match_result"] != stale
+        assert service.refresh_policy.counters["refreshes"] == 1
+
+
+class TestMatchJobsEndpoint:
+    """Tests for POST /api/resume/{resume_id}/match-jobs"""
+
+    JOBS = [
+        "Java developer with Spring and Oracle",
+        "Python developer, FastAPI and Redis",
+        "python developer,  fastapi and REDIS",  # same JD after normalization
+        "Product manager",
+    ]
+
+    def _upload(self, client, test_pdf_bytes):
+        response = client.post(
+            "/api/resume/analyze",
+            files={"file": ("resume.pdf", io.BytesIO(test_pdf_bytes), "application/pdf")}
+        )
+        return response.json()["resume_id"]
+
+    def test_results_sorted_and_cached(self, client, test_pdf_bytes):
+        resume_id = self._upload(client, test_pdf_bytes)
+        response = client.post(f"/api/resume/{resume_id}/match-jobs", json={"job_descriptions": self.JOBS})
+        assert response.status_code == 200
+        matches = response.json()["matches"]
+        assert sorted(m["index"] for m in matches) == [0, 1, 2, 3]
+        scores = [m["match_result"]["score"] for m in matches]
+        assert scores == sorted(scores, reverse=True)
+        by_index = {m["index"]: m for m in matches}
+        assert by_index[1]["job_hash"] == by_index[2]["job_hash"]
+        assert by_index[1]["match_result"] == by_index[2]["match_result"]
+
+        again = client.post(f"/api/resume/{resume_id}/match-jobs", json={"job_descriptions": self.JOBS})
+        assert again.json()["message"] == "Success (Cache Hit)"
+        assert all(m["cached"] for m in again.json()["matches"])
+        # Shared with /match
+        single = client.post("/api/resume/match", json={"resume_id": resume_id, "job_description": self.JOBS[3]})
+        assert single.json()["match_result"] == by_index[3]["match_result"]
+
+    def test_misses_are_scored_in_batches(self, client, test_pdf_bytes, monkeypatch):
+        import api.resume
+        from models.resume import MatchResult
+        from services.ai_service import AIService
+        from services.jd_service import JobDescriptionService
+        resume_id = self._upload(client, test_pdf_bytes)
+        calls = []
+
+        def score_many(resume_data, profiles, api_key, prescores=None):
+            calls.append(len(profiles))
+            # The model leaves the last job of each batch out of its answer
+            return [MatchResult(score=50 + i, skills_match_rate="-", experience_relevance="-", comment="batch")
+                    for i in range(len(profiles) - 1)] + [None]
+
+        def score_one(resume_data, profile, api_key, prescore=None):
+            calls.append(1)
+            return MatchResult(score=10, skills_match_rate="-", experience_relevance="-", comment="single")
+
+        monkeypatch.setattr(AIService, "score_resume_many", staticmethod(score_many))
+        monkeypatch.setattr(AIService, "score_resume", staticmethod(score_one))
+        monkeypatch.setattr(api.resume.settings, "DASHSCOPE_API_KEY", "test-key")
+        monkeypatch.setattr(api.resume.settings, "MATCH_JOBS_BATCH_SIZE", 2)
+        monkeypatch.setattr(JobDescriptionService, "get_profile",
+                            staticmethod(lambda desc, job_hash, redis, api_key="", **kwargs: {"skills": ["python"]}))
+
+        jobs = [f"Batch role {i} in a team of {i * 7}" for i in range(5)]
+        response = client.post(f"/api/resume/{resume_id}/match-jobs", json={"job_descriptions": jobs})
+        assert response.status_code == 200
+        assert calls == [2, 1, 2, 1, 1]
+        comments = [m["match_result"]["comment"] for m in response.json()["matches"]]
+        assert comments == ["batch", "batch", "single", "single", "single"]
+
+    def test_scores_feed_job_leaderboards(self, client, test_pdf_bytes):
+        resume_id = self._upload(client, test_pdf_bytes)
+        response = client.post(f"/api/resume/{resume_id}/match-jobs", json={"job_descriptions": self.JOBS[:2]})
+        for match in response.json()["matches"]:
+            board = client.get(f"/api/resume/leaderboard/{match['job_hash']}", params={"page_size": 100}).json()
+            entry = next(row for row in board["results"] if row["resume_id"] == resume_id)
+            assert entry["score"] == match["match_result"]["score"]
+            assert board["total"] >= entry["rank"]
+        assert client.get("/api/resume/leaderboard/nope").json()["total"] == 0
+        assert client.get("/api/resume/leaderboard/nope", params={"page_size": 0}).status_code == 422
+
+    def test_cache_hits_fill_boards_of_a_new_prompt_version(self, client, test_pdf_bytes, monkeypatch):
+        import api.resume
+        resume_id = self._upload(client, test_pdf_bytes)
+        jobs = ["Leaderboard refill: Rust engineer", "Leaderboard refill: SRE"]
+        client.post(f"/api/resume/{resume_id}/match-jobs", json={"job_descriptions": jobs})
+        client.post("/api/resume/match", json={"resume_id": resume_id, "job_description": "Leaderboard refill: QA"})
+
+        monkeypatch.setattr(api.resume.leaderboard_service, "prompt_version", "next-version")
+        response = client.post(f"/api/resume/{resume_id}/match-jobs", json={"job_descriptions": jobs})
+        assert all(match["cached"] for match in response.json()["matches"])
+        hit = client.post("/api/resume/match", json={"resume_id": resume_id, "job_description": "Leaderboard refill: QA"})
+        assert "Cache Hit" in hit.json()["message"]
+        for job_hash in [match["job_hash"] for match in response.json()["matches"]] + [hit.json()["job_hash"]]:
+            board = client.get(f"/api/resume/leaderboard/{job_hash}").json()
+            assert [row["resume_id"] for row in board["results"]] == [resume_id]
+
+    def test_unknown_resume_returns_404(self, client):
+        response = client.post("/api/resume/nonexistent/match-jobs", json={"job_descriptions": ["Python"]})
+        assert response.status_code == 404
+
+    def test_empty_job_description_returns_400(self, client):
+        response = client.post("/api/resume/any/match-jobs", json={"job_descriptions": ["Python", "  "]})
+        assert response.status_code == 400
+        response = client.post("/api/resume/any/match-jobs", json={"job_descriptions": []})
+        assert response.status_code == 400
+
+
+class TestTenantBudgets:
+    """Per-tenant token accounting (X-Tenant-ID) and budget downgrades."""
+
+    def _upload(self, client, test_pdf_bytes):
+        response = client.post(
+            "/api/resume/analyze",
+            files={"file": ("resume.pdf", io.BytesIO(test_pdf_bytes), "application/pdf")}
+        )
+        return response.json()["resume_id"]
+
+    def test_model_tokens_are_billed_to_the_tenant(self, client, test_pdf_bytes, monkeypatch):
+        from types import SimpleNamespace
+        import api.resume
+        from models.resume import MatchResult
+        from services.ai_service import AIService
+        from services.usage_service import record_model_usage
+        resume_id = self._upload(client, test_pdf_bytes)
+
+        def score(resume_data, profile, api_key, prescore=None):
+            record_model_usage("qwen-turbo", SimpleNamespace(usage={"input_tokens": 800, "output_tokens": 60}))
+            return MatchResult(score=70, skills_match_rate="-", experience_relevance="-", comment="model")
+
+        monkeypatch.setattr(AIService, "score_resume", staticmethod(score))
+        monkeypatch.setattr(api.resume.settings, "DASHSCOPE_API_KEY", "test-key")
+        monkeypatch.setattr(api.resume.JobDescriptionService, "get_profile",
+                            staticmethod(lambda *args, **kwargs: {"skills": ["python"]}))
+        response = client.post("/api/resume/match", headers={"X-Tenant-ID": "billing-test"},
+                               json={"resume_id": resume_id, "job_description": "Billing test role"})
+        assert response.status_code == 200
+        import api.admin
+        from core.profiling import Profiler
+        monkeypatch.setattr(api.admin, "profiler", Profiler(admin_token="usage-token"))
+        assert client.get("/api/admin/usage").status_code == 403
+        admin = {"X-Profile": "usage-token"}
+        usage = client.get("/api/admin/usage", headers=admin, params={"tenant": "billing-test"}).json()
+        assert usage["tenants"]["billing-test"]["total_tokens"] == 860
+        assert "billing-test" in client.get("/api/admin/usage", headers=admin).json()["tenants"]
+
+    def test_over_budget_downgrades_to_local_scoring(self, client, test_pdf_bytes, monkeypatch):
+        import api.resume
+        resume_id = self._upload(client, test_pdf_bytes)
+        monkeypatch.setattr(api.resume.usage_service, "budgets", {"broke": 10})
+        api.resume.usage_service.record("broke", "qwen-turbo", {"input_tokens": 10, "output_tokens": 1})
+
+        body = {"resume_id": resume_id, "job_description": "Budget test: Python engineer"}
+        for _ in range(2):
+            response = client.post("/api/resume/match", headers={"X-Tenant-ID": "broke"}, json=body)
+            assert response.status_code == 200
+            assert "budget exceeded" in response.json()["message"]  # never cached
+        # Other tenants are unaffected
+        response = client.post("/api/resume/match", headers={"X-Tenant-ID": "solvent"}, json=body)
+        assert "budget" not in response.json()["message"]
+
+    def test_downgraded_extraction_stays_with_its_tenant(self, client, test_pdf_bytes, monkeypatch):
+        import api.resume
+        monkeypatch.setattr(api.resume.usage_service, "budgets", {"broke-upload": 10})
+        api.resume.usage_service.record("broke-upload", "qwen-turbo", {"input_tokens": 10, "output_tokens": 1})
+        pdf = io.BytesIO(test_pdf_bytes + b"\n%downgraded")
+        response = client.post("/api/resume/analyze", headers={"X-Tenant-ID": "broke-upload"},
+                               files={"file": ("resume.pdf", pdf, "application/pdf")})
+        assert response.status_code == 200
+        resume_id = response.json()["resume_id"]
+        job_intention = response.json()["data"]["job_intention"]
+
+        # Not in the shared keyspace, nor searchable
+        assert api.resume.redis_service.get_resume_data(resume_id) is None
+        import api.admin
+        from core.profiling import Profiler
+        monkeypatch.setattr(api.admin, "profiler", Profiler(admin_token="search-token"))
+        results = client.get("/api/admin/search", headers={"X-Profile": "search-token"},
+                             params={"q": job_intention}).json()["results"]
+        assert resume_id not in [doc["resume_id"] for doc in results]
+        # Its own tenant can still match against it, by rules and uncached
+        body = {"resume_id": resume_id, "job_description": "Downgraded upload: Python engineer"}
+        response = client.post("/api/resume/match", headers={"X-Tenant-ID": "broke-upload"}, json=body)
+        assert response.status_code == 200
+        assert "budget exceeded" in response.json()["message"]
+        job_hash = api.resume.JobDescriptionService.job_hash(body["job_description"])
+        assert api.resume.redis_service.get_match_result(resume_id, job_hash) is None
+        # Another tenant is not served the rule-based result
+        response = client.post("/api/resume/match", headers={"X-Tenant-ID": "solvent"}, json=body)
+        assert response.status_code == 404
+        pdf.seek(0)
+        response = client.post("/api/resume/analyze", headers={"X-Tenant-ID": "solvent"},
+                               files={"file": ("resume.pdf", pdf, "application/pdf")})
+        assert "Cache Hit" not in response.json()["message"]
+
+    def test_reject_action_returns_429(self, client, test_pdf_bytes, monkeypatch):
+        import api.resume
+        resume_id = self._upload(client, test_pdf_bytes)
+        monkeypatch.setattr(api.resume.usage_service, "budgets", {"rejected": 10})
+        monkeypatch.setattr(api.resume.settings, "TENANT_BUDGET_ACTION", "reject")
+        api.resume.usage_service.record("rejected", "qwen-turbo", {"input_tokens": 10, "output_tokens": 1})
+        response = client.post("/api/resume/match", headers={"X-Tenant-ID": "rejected"},
+                               json={"resume_id": resume_id, "job_description": "Budget test: Go engineer"})
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) > 0
+
+
+class TestSearchEndpoint:
+    """Tests for GET /api/admin/search"""
+
+    @pytest.fixture(autouse=True)
+    def admin_token(self, monkeypatch):
+        import api.admin
+        from core.profiling import Profiler
+        monkeypatch.setattr(api.admin, "profiler", Profiler(admin_token="search-token"))
+        return {"X-Profile": "search-token"}
+
+    def test_search_needs_the_admin_token(self, client):
+        assert client.get("/api/admin/search", params={"q": "python"}).status_code == 403
+        assert client.get("/api/resume/search", params={"q": "python"}).status_code in (404, 405)
+
+    def test_search_finds_analyzed_resume(self, client, test_pdf_bytes, admin_token):
+        response = client.post(
+            "/api/resume/analyze",
+            files={"file": ("resume.pdf", io.BytesIO(test_pdf_bytes), "application/pdf")}
+        )
+        resume_id = response.json()["resume_id"]
+        job_intention = response.json()["data"]["job_intention"]
+
+        response = client.get("/api/admin/search", headers=admin_token, params={"q": job_intention})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] >= 1
+        assert resume_id in [doc["resume_id"] for doc in data["results"]]
+
+    def test_search_pagination_validation(self, client, admin_token):
+        response = client.get("/api/admin/search", headers=admin_token, params={"q": "python", "page": 0})
+        assert response.status_code == 422
+
+
+class TestAdmission:
+    """Load shedding in front of parsing and model calls."""
+
+    def test_saturated_text_lane_sheds_new_work_but_serves_cache_hits(self, client, test_pdf_bytes, monkeypatch):
+        import os
+        import tempfile
+        from api.resume import admission
+        from core.admission import Lane
+        from tests.generate_test_pdf import generate_multipage_resume_pdf
+
+        cached = client.post(
+            "/api/resume/analyze",
+            files={"file": ("resume.pdf", io.BytesIO(test_pdf_bytes), "application/pdf")}
+        )
+        assert cached.status_code == 200
+
+        busy = Lane("text", concurrency=1, queue_size=0, service_time=5.0)
+        busy.active = 1  # every slot taken, no queue
+        monkeypatch.setitem(admission.lanes, "text", busy)
+
+        pdf_path = os.path.join(tempfile.gettempdir(), "test_admission_fixture.pdf")
+        generate_multipage_resume_pdf(pdf_path, pages=3)
+        with open(pdf_path, "rb") as f:
+            new_pdf = f.read()
+        response = client.post(
+            "/api/resume/analyze",
+            files={"file": ("new.pdf", io.BytesIO(new_pdf), "application/pdf")}
+        )
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+        hit = client.post(
+            "/api/resume/analyze",
+            files={"file": ("resume.pdf", io.BytesIO(test_pdf_bytes), "application/pdf")}
+        )
+        assert hit.status_code == 200
+        assert "Cache Hit" in hit.json()["message"]
+
+
+class TestParseIsolation:
+    """PDF parsing runs in worker processes; a killed document is a clean 422."""
+
+    def test_killed_parse_returns_422(self, client, monkeypatch):
+        import api.resume
+        from core.parse_pool import ParseFailed
+
+        class KillingPool:
+            size = 1
+            def run(self, func, *args, **kwargs):
+                raise ParseFailed("timed out after 30s")
+
+        monkeypatch.setattr(api.resume, "parse_pool", KillingPool())
+        response = client.post(
+            "/api/resume/analyze",
+            files={"file": ("bomb.pdf", io.BytesIO(b"%PDF-1.7 pathological"), "application/pdf")}
+        )
+        assert response.status_code == 422
+        assert "timed out" in response.json()["detail"]
+
+    def test_parse_runs_in_worker_process(self, client, test_pdf_bytes):
+        from api.resume import parse_pool
+        jobs = parse_pool.stats()["jobs"]
+        response = client.post(
+            "/api/resume/analyze",
+            files={"file": ("isolated.pdf", io.BytesIO(test_pdf_bytes + b"\n%isolated"), "application/pdf")}
+        )
+        assert response.status_code == 200
+        assert parse_pool.stats()["jobs"] == jobs + 1
+
+
+class TestHealthz:
+    """Tests for GET /healthz (liveness probe and warm-up hook)"""
+
+    def test_healthz_ok(self, client):
+        response = client.get("/healthz")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ok"
+
+    def test_healthz_warm_preloads_parsers(self, client):
+        import sys
+        response = client.get("/healthz", params={"warm": "true"})
+        assert response.status_code == 200
+        assert response.json()["warmed_up"] is True
+        assert "fitz" in sys.modules
+        assert "pdfplumber" in sys.modules
+
+    def test_import_does_not_load_heavy_modules(self):
+        """Importing the app must not pull in the PDF parsers or the DashScope SDK."""
+        import os
+        import subprocess
+        import sys
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = "import sys, main; print(sorted(m for m in ('fitz', 'pdfplumber', 'dashscope') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,130 @@
+"""Tests for the offline bulk-analysis CLI (bulk_analyze.py)."""
+import json
+import os
+import shutil
+import zipfile
+
+import pytest
+
+import bulk_analyze
+from bulk_analyze import BulkAnalyzer, iter_sources, load_checkpoint
+from core.parse_pool import ParsePool
+from models.resume import BasicInfo, ResumeData
+from services.ai_service import AIService
+
+
+@pytest.fixture
+def resume_dir(tmp_path, test_pdf_bytes):
+    from tests.generate_test_pdf import generate_multipage_resume_pdf
+    folder = tmp_path / "resumes"
+    (folder / "nested").mkdir(parents=True)
+    (folder / "a.pdf").write_bytes(test_pdf_bytes)
+    (folder / "nested" / "copy_of_a.pdf").write_bytes(test_pdf_bytes)
+    generate_multipage_resume_pdf(str(folder / "b.pdf"), pages=2)
+    (folder / "notes.txt").write_text("not a resume")
+    return folder
+
+
+@pytest.fixture
+def model_calls(monkeypatch):
+    calls = []
+
+    def fake_extract(text, api_key, model="qwen-turbo"):
+        calls.append(text)
+        return ResumeData(
+            basic_info=BasicInfo(name=f"Candidate {len(calls)}", phone="13812345678", email="c@example.com"),
+            job_intention="Engineer", work_years="5年", education_background="本科",
+            raw_text_summary="Python, FastAPI, Redis"
+        )
+
+    monkeypatch.setattr(AIService, "extract_resume_info", staticmethod(fake_extract))
+    monkeypatch.setattr(bulk_analyze.settings, "DASHSCOPE_API_KEY", "test-key")
+    return calls
+
+
+@pytest.fixture
+def pool():
+    pool = ParsePool(workers=1, timeout_seconds=30)
+    yield pool
+    pool.close()
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestSources:
+    def test_directory(self, resume_dir):
+        assert [name for name, _ in iter_sources(str(resume_dir))] == \
+            ["a.pdf", "b.pdf", os.path.join("nested", "copy_of_a.pdf")]
+
+    def test_zip_archive(self, resume_dir, tmp_path):
+        archive = tmp_path / "resumes.zip"
+        with zipfile.ZipFile(archive, "w") as z:
+            z.write(resume_dir / "a.pdf", "x/a.pdf")
+            z.write(resume_dir / "notes.txt", "x/notes.txt")
+        assert [name for name, _ in iter_sources(str(archive))] == ["x/a.pdf"]
+
+    def test_tar_archive(self, resume_dir, tmp_path):
+        archive = shutil.make_archive(str(tmp_path / "resumes"), "gztar", resume_dir)
+        assert len(list(iter_sources(archive))) == 3
+
+
+class TestBulkAnalyzer:
+    def test_writes_one_record_per_file_and_dedupes_content(self, resume_dir, tmp_path, pool, model_calls):
+        output = tmp_path / "out.jsonl"
+        summary = BulkAnalyzer(pool, model_concurrency=2).run(str(resume_dir), str(output))
+        records = _records(output)
+        assert sorted(r["source"] for r in records) == sorted(name for name, _ in iter_sources(str(resume_dir)))
+        assert len(model_calls) == 2  # the copy of a.pdf reuses its result
+        assert summary["duplicates"] == 1 and summary["errors"] == 0
+        by_source = {r["source"]: r for r in records}
+        assert by_source["a.pdf"]["data"] == by_source[os.path.join("nested", "copy_of_a.pdf")]["data"]
+        assert by_source["a.pdf"]["route"] == "text"
+
+    def test_resumes_from_checkpoint(self, resume_dir, tmp_path, pool, model_calls):
+        output = tmp_path / "out.jsonl"
+        BulkAnalyzer(pool, model_concurrency=1).run(str(resume_dir), str(output), limit=1)
+        assert len(_records(output)) == 1
+        with open(output, "a", encoding="utf-8") as f:
+            f.write('{"source": "b.pdf", "resu')  # crashed mid-write
+
+        summary = BulkAnalyzer(pool, model_concurrency=1).run(str(resume_dir), str(output))
+        assert summary["skipped"] == 1
+        sources = [r["source"] for r in _records(output)]
+        assert len(sources) == len(set(sources)) == 3
+        assert len(model_calls) == 2
+
+    def test_model_errors_are_retried_then_recorded(self, resume_dir, tmp_path, pool, monkeypatch):
+        monkeypatch.setattr(bulk_analyze.settings, "DASHSCOPE_API_KEY", "test-key")
+        monkeypatch.setattr(bulk_analyze.time, "sleep", lambda seconds: None)
+        attempts = []
+
+        def throttled(text, api_key, model="qwen-turbo"):
+            attempts.append(model)
+            raise Exception("Throttling.RateQuota")
+
+        monkeypatch.setattr(AIService, "extract_resume_info", staticmethod(throttled))
+        output = tmp_path / "out.jsonl"
+        BulkAnalyzer(pool, model_concurrency=1, retries=2).run(str(resume_dir), str(output), limit=1)
+        # Each attempt goes through the whole cascade
+        tiers = BulkAnalyzer(pool, model_concurrency=1).router.text_tiers
+        assert attempts == tiers * 3
+        record = _records(output)[0]
+        assert "Throttling" in record["error"]
+
+        done, _ = load_checkpoint(str(output), retry_errors=True)
+        assert done == set()
+
+    def test_populates_redis_in_batches(self, resume_dir, tmp_path, pool, model_calls, redis_service):
+        fakeredis = pytest.importorskip("fakeredis")
+        from services.search_service import SearchService
+        service = redis_service(fakeredis.FakeRedis())
+
+        output = tmp_path / "out.jsonl"
+        BulkAnalyzer(pool, model_concurrency=2, redis_service=service,
+                     search_service=SearchService(service), redis_batch=2).run(str(resume_dir), str(output))
+        for record in _records(output):
+            assert service.get_resume_data(record["resume_id"]) == record["data"]
+            assert service.client.ttl(f"resume_data:{record['resume_id']}") > 0
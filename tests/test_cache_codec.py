@@ -0,0 +1,85 @@
+"""Unit tests for CacheCodec (binary cache value format)."""
+import json
+
+import pytest
+from services.cache_codec import CacheCodec, MAGIC, RAW, ZLIB, ZSTD, dumps_compact
+
+RESUME = {
+    "basic_info": {"name": "张伟", "phone": "13812345678", "email": "zhang@example.com", "address": "北京"},
+    "job_intention": "后端工程师",
+    "work_years": "5年",
+    "education_background": "本科",
+    "raw_text_summary": "Python, FastAPI, Redis, Docker, Kubernetes. " * 5,
+}
+
+
+class TestCacheCodec:
+    """Test encoding, decoding and legacy compatibility."""
+
+    @pytest.mark.parametrize("compression", ["auto", "zlib", "none"])
+    def test_round_trip(self, compression):
+        codec = CacheCodec(compression=compression)
+        assert codec.decode(codec.encode(RESUME)) == RESUME
+
+    def test_decode_json_matches_compact_serialization(self):
+        codec = CacheCodec()
+        assert codec.decode_json(codec.encode(RESUME)) == dumps_compact(RESUME)
+        assert dumps_compact(RESUME) == json.dumps(RESUME, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def test_small_values_are_not_compressed(self):
+        encoded = CacheCodec(min_size=64).encode({"score": 1})
+        assert encoded[0] == MAGIC and encoded[1] == RAW
+
+    def test_zlib_fallback(self):
+        encoded = CacheCodec(compression="zlib").encode(RESUME)
+        assert encoded[1] == ZLIB
+        assert len(encoded) < len(dumps_compact(RESUME))
+
+    def test_reads_legacy_plain_json(self):
+        """Entries written as pretty or ASCII-escaped JSON strings decode to the compact form."""
+        legacy = json.dumps(RESUME)
+        codec = CacheCodec()
+        assert codec.decode(legacy) == RESUME
+        assert codec.decode(legacy.encode("utf-8")) == RESUME
+        assert codec.decode_json(legacy) == dumps_compact(RESUME)
+
+    def test_empty_values_decode_to_none(self):
+        codec = CacheCodec()
+        assert codec.decode(None) is None
+        assert codec.decode(b"") is None
+
+    def test_unknown_method_raises(self):
+        with pytest.raises(ValueError):
+            CacheCodec().decode(bytes((MAGIC, 7)) + b"{}")
+
+    def test_stats_track_bytes_per_entry(self):
+        codec = CacheCodec()
+        codec.encode(RESUME, "resume_data")
+        codec.encode(RESUME, "resume_data")
+        summary = codec.stats_summary()["keyspaces"]["resume_data"]
+        assert summary["entries_written"] == 2
+        assert summary["avg_json_bytes"] == len(dumps_compact(RESUME))
+        assert summary["compression_ratio"] > 1
+
+
+class TestCacheCodecZstd:
+    """Test zstd compression and shared dictionaries (skipped without zstandard)."""
+
+    def test_zstd_round_trip(self):
+        pytest.importorskip("zstandard")
+        codec = CacheCodec(compression="zstd")
+        encoded = codec.encode(RESUME)
+        assert encoded[1] == ZSTD
+        assert codec.decode(encoded) == RESUME
+
+    def test_dictionary_improves_small_entries(self):
+        pytest.importorskip("zstandard")
+        samples = [
+            dumps_compact(dict(RESUME, basic_info=dict(RESUME["basic_info"], name=f"候选人{i}", phone=f"138{i:08d}")))
+            for i in range(300)
+        ]
+        dictionary = CacheCodec.train_dictionary(samples, size=4096)
+        plain, trained = CacheCodec(compression="zstd"), CacheCodec(compression="zstd", zstd_dict=dictionary)
+        value = dict(RESUME, basic_info=dict(RESUME["basic_info"], name="李娜"))
+        assert len(trained.encode(value)) < len(plain.encode(value))
+        assert trained.decode(trained.encode(value)) == value
@@ -0,0 +1,121 @@
+"""Tests for cache snapshot export / import / preload (fakeredis)."""
+import gzip
+import os
+
+import pytest
+
+from services import cache_snapshot
+from services.cache_snapshot import LEGACY_MATCH, MATCHES, RESUME_DATA, parse_key, read_snapshot
+from services.local_cache import SharedDiskCache
+
+
+@pytest.fixture
+def source(redis_service):
+    fakeredis = pytest.importorskip("fakeredis")
+    service = redis_service(fakeredis.FakeRedis())
+    service.cache_resume_data("r1", {"job_intention": "工程师"}, expire_seconds=3600)
+    service.cache_resume_data("r2", {"job_intention": "设计师"}, expire_seconds=7200)
+    service.cache_match_results_many("r1", {"jd_a": {"score": 80}, "jd_b": {"score": 60}}, expire_seconds=1800)
+    # An entry written before the per-resume match hash existed
+    service.client.setex("match:r2:jd_c", 600, service.codec.encode({"score": 40}, "match"))
+    return service
+
+
+@pytest.fixture
+def target(redis_service):
+    fakeredis = pytest.importorskip("fakeredis")
+    return redis_service(fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+
+
+class TestParseKey:
+    def test_plain_and_tagged_keys(self):
+        assert parse_key(b"resume_data:abc") == (RESUME_DATA, "abc", "")
+        assert parse_key(b"matches:{abc}") == (MATCHES, "abc", "")
+        assert parse_key(b"match:{abc}:jd1") == (LEGACY_MATCH, "abc", "jd1")
+        with pytest.raises(ValueError):
+            parse_key(b"search:doc:abc")
+
+
+class TestSnapshot:
+    def test_export_import_preserves_entries_and_ttls(self, source, target, tmp_path):
+        path = str(tmp_path / "cache.snap.gz")
+        summary = source.export_snapshot(path, batch_size=2)
+        assert summary == {"resume_data": 2, "matches": 1, "match": 1, "records": 4}
+
+        assert target.import_snapshot(path) == {"imported": 4, "expired": 0, "existing": 0}
+        assert target.get_resume_data("r1")["job_intention"] == "工程师"
+        assert target.get_match_result("r1", "jd_b")["score"] == 60
+        assert target.get_match_result("r2", "jd_c")["score"] == 40
+        assert 3500 < target.client.ttl("resume_data:r1") <= 3600
+        assert 7100 < target.client.ttl("resume_data:r2") <= 7200
+        assert 1700 < target.client.ttl("matches:r1") <= 1800
+
+    def test_import_keeps_existing_entries_unless_overwrite(self, source, target, tmp_path):
+        path = str(tmp_path / "cache.snap.gz")
+        source.export_snapshot(path)
+        target.cache_resume_data("r1", {"job_intention": "newer"})
+        counts = target.import_snapshot(path)
+        assert counts["existing"] == 1 and counts["imported"] == 3
+        assert target.get_resume_data("r1")["job_intention"] == "newer"
+        target.import_snapshot(path, overwrite=True)
+        assert target.get_resume_data("r1")["job_intention"] == "工程师"
+
+    def test_time_since_export_counts_against_ttls(self, source, target, tmp_path, monkeypatch):
+        path = str(tmp_path / "cache.snap.gz")
+        source.export_snapshot(path)
+        real_time = cache_snapshot.time.time
+        monkeypatch.setattr(cache_snapshot.time, "time", lambda: real_time() + 2000)
+        counts = target.import_snapshot(path)
+        # The legacy match (600 s) and the match hash (1800 s) have expired since
+        assert counts == {"imported": 2, "expired": 2, "existing": 0}
+        assert 1500 < target.client.ttl("resume_data:r1") <= 1600
+        assert target.get_match_result("r1", "jd_a") is None
+
+    def test_import_into_sharded_setup_tags_keys(self, source, target, tmp_path):
+        path = str(tmp_path / "cache.snap.gz")
+        source.export_snapshot(path)
+        target.sharded = True
+        target.import_snapshot(path)
+        assert target.client.exists("resume_data:{r1}", "matches:{r1}", "match:{r2}:jd_c") == 3
+        assert target.get_match_result("r1", "jd_a")["score"] == 80
+
+    def test_preload_seeds_local_tier(self, source, tmp_path, redis_service):
+        path = str(tmp_path / "cache.snap.gz")
+        source.export_snapshot(path)
+        fresh = redis_service(memory_cache=SharedDiskCache(str(tmp_path / "local.db")))
+        assert fresh.preload_snapshot(path) == {"entries": 5, "expired": 0}
+        assert fresh.get_resume_data("r2")["job_intention"] == "设计师"
+        assert fresh.get_match_result("r1", "jd_a")["score"] == 80
+        assert fresh.get_match_result("r2", "jd_c")["score"] == 40
+
+    def test_preload_runs_once_per_instance(self, source, tmp_path, redis_service):
+        path = str(tmp_path / "cache.snap.gz")
+        source.export_snapshot(path)
+        workers = [redis_service(memory_cache=SharedDiskCache(str(tmp_path / "local.db"))) for _ in range(2)]
+        assert workers[0].preload_snapshot(path)["entries"] == 5
+        assert workers[1].preload_snapshot(path)["skipped"] == "already preloaded on this instance"
+        assert workers[1].get_resume_data("r2")["job_intention"] == "设计师"
+        # A new snapshot is loaded again
+        os.utime(path, ns=(0, 0))
+        assert workers[1].preload_snapshot(path)["entries"] == 5
+
+    def test_preload_skips_per_process_dict_tier(self, source, tmp_path, redis_service):
+        path = str(tmp_path / "cache.snap.gz")
+        source.export_snapshot(path)
+        fresh = redis_service()
+        assert fresh.preload_snapshot(path)["entries"] == 0
+        assert fresh.memory_cache == {}
+
+    def test_preload_keeps_ttls_in_disk_tier_and_caps_entries(self, source, tmp_path, redis_service):
+        path = str(tmp_path / "cache.snap.gz")
+        source.export_snapshot(path)
+        fresh = redis_service(memory_cache=SharedDiskCache(str(tmp_path / "local.db")))
+        assert fresh.preload_snapshot(path, max_entries=2)["entries"] == 2
+        assert len(fresh.memory_cache) == 2
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "not-a-snapshot.gz"
+        with gzip.open(path, "wb") as f:
+            f.write(b"hello")
+        with pytest.raises(ValueError):
+            list(read_snapshot(str(path)))
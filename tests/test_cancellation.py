@@ -0,0 +1,148 @@
+"""Unit tests for deadline/disconnect cancellation (core/cancellation.py, api/resume.py)."""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from core.cancellation import CancelToken, Cancelled
+
+
+class _FakeRequest:
+    def __init__(self, disconnect_after: float = None):
+        self._disconnect_at = time.monotonic() + disconnect_after if disconnect_after is not None else None
+
+    async def is_disconnected(self):
+        return self._disconnect_at is not None and time.monotonic() >= self._disconnect_at
+
+
+class TestCancelToken:
+    """Test the token used by threadpool work."""
+
+    def test_cancel_before_commit_stops_work(self):
+        token = CancelToken(60)
+        assert token.cancel("client disconnected") is False
+        with pytest.raises(Cancelled):
+            token.check()
+        with pytest.raises(Cancelled):
+            token.commit()  # a model call that hasn't been sent is skipped
+
+    def test_committed_work_finishes_in_background(self):
+        token = CancelToken(60, finish_committed=True)
+        token.commit()
+        assert token.cancel("client disconnected") is True
+        token.check()  # does not raise
+        assert token.abandoned
+
+    def test_no_new_model_call_after_abandon(self):
+        token = CancelToken(60, finish_committed=True)
+        token.commit()
+        assert token.cancel("client disconnected") is True
+        with pytest.raises(Cancelled) as exc_info:
+            token.commit()  # e.g. the next batch: only the call in flight finishes
+        assert exc_info.value.reason == "client disconnected"
+        assert token.is_cancelled()
+
+    def test_no_new_model_call_after_deadline(self):
+        token = CancelToken(0.05, finish_committed=True)
+        token.commit()
+        time.sleep(0.1)
+        assert token.is_cancelled()
+        with pytest.raises(Cancelled):
+            token.commit()
+
+    def test_committed_work_is_cancelled_when_policy_disallows(self):
+        token = CancelToken(60, finish_committed=False)
+        token.commit()
+        assert token.cancel("client disconnected") is False
+        with pytest.raises(Cancelled):
+            token.check()
+
+    def test_deadline_cancels_uncommitted_work(self):
+        token = CancelToken(0)
+        assert token.is_cancelled()
+        with pytest.raises(Cancelled) as exc_info:
+            token.check()
+        assert exc_info.value.reason == "deadline exceeded"
+
+
+class TestRunCancellable:
+    """Test the handler-side watcher around threadpool jobs."""
+
+    def test_disconnect_cancels_uncommitted_job(self, monkeypatch):
+        from api import resume
+        monkeypatch.setattr(resume, "_DISCONNECT_POLL_SECONDS", 0.02)
+        token = CancelToken(60)
+        stopped = threading.Event()
+
+        def job(token):
+            # e.g. rasterizing page after page
+            while not token.is_cancelled():
+                time.sleep(0.005)
+            stopped.set()
+            token.check()
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(resume._run_cancellable(_FakeRequest(disconnect_after=0.05), token, job, token))
+        assert exc_info.value.status_code == 499
+        assert stopped.wait(1)
+
+    def test_disconnect_after_commit_lets_job_finish(self, monkeypatch):
+        from api import resume
+        monkeypatch.setattr(resume, "_DISCONNECT_POLL_SECONDS", 0.02)
+        token = CancelToken(60, finish_committed=True)
+
+        def job(token):
+            token.commit()
+            time.sleep(0.15)  # the model call
+            token.check()
+            return "cached"
+
+        result = asyncio.run(resume._run_cancellable(_FakeRequest(disconnect_after=0.05), token, job, token))
+        assert result == "cached"
+        assert token.abandoned
+
+    def test_deadline_returns_504(self, monkeypatch):
+        from api import resume
+        monkeypatch.setattr(resume, "_DISCONNECT_POLL_SECONDS", 0.02)
+        token = CancelToken(0.05)
+
+        def job(token):
+            while not token.is_cancelled():
+                time.sleep(0.005)
+            token.check()
+
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(resume._run_cancellable(_FakeRequest(), token, job, token))
+        assert exc_info.value.status_code == 504
+
+    def test_deadline_keeps_slots_while_committed_work_runs(self, monkeypatch):
+        from api import resume
+        from core.admission import Lane, TenantLimiter
+        monkeypatch.setattr(resume, "_DISCONNECT_POLL_SECONDS", 0.02)
+        lane = Lane("text", concurrency=1, queue_size=1, service_time=0.01)
+        limiter = TenantLimiter(max_active=1)
+        token = CancelToken(0.05, finish_committed=True)
+        finished = threading.Event()
+
+        def job(token):
+            token.commit()
+            time.sleep(0.2)  # the model call outlives the deadline
+            finished.set()
+
+        async def scenario():
+            with pytest.raises(HTTPException) as exc_info:
+                async with limiter.slot("team-a"):
+                    async with lane.slot(time.monotonic() + 10):
+                        await resume._run_cancellable(_FakeRequest(), token, job, token)
+            held = (lane.active, dict(limiter.active))
+            while not finished.is_set():
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            return exc_info.value.status_code, held, (lane.active, dict(limiter.active))
+
+        status, held, after = asyncio.run(scenario())
+        assert status == 504
+        assert held == (1, {"team-a": 1})
+        assert after == (0, {})
+
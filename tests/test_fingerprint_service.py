@@ -0,0 +1,117 @@
+"""Unit tests for FingerprintService (near-duplicate detection)."""
+import pytest
+from services.fingerprint_service import FingerprintService
+
+RESUME_TEXT = """Name: Zhang Wei
+Phone: 13812345678
+Email: zhangwei@example.com
+=== Job Intention ===
+Senior Python Backend Engineer
+=== Work Experience: 5 years ===
+2019-2024: ABC Tech Co. - Backend Developer
+Developed RESTful API with FastAPI
+Managed PostgreSQL and Redis clusters
+Built CI/CD pipelines with GitHub Actions
+2017-2019: XYZ Internet Co. - Junior Developer
+Web development with Django
+Database optimization
+=== Education ===
+Bachelor of Computer Science
+Peking University, 2013-2017
+=== Skills ===
+Python, FastAPI, Django, PostgreSQL, Redis, Docker, Kubernetes, AWS, Git, Linux"""
+
+EDITED_TEXT = RESUME_TEXT.replace(
+    "Python, FastAPI, Django, PostgreSQL, Redis, Docker, Kubernetes, AWS, Git, Linux",
+    "Python, FastAPI, Django, PostgreSQL, Redis, Docker, Kubernetes, AWS, Git, Linux, Go"
+)
+
+OTHER_TEXT = """姓名：李娜
+求职意向：产品经理
+工作经历
+2018-2024 某互联网公司 高级产品经理 负责用户增长与商业化产品规划
+教育背景
+复旦大学 工商管理硕士"""
+
+
+@pytest.fixture
+def memory_only_redis(redis_service):
+    return redis_service()
+
+
+class TestFingerprint:
+    """Tests for fingerprint computation and similarity."""
+
+    def test_whitespace_and_case_do_not_change_text_hash(self):
+        reformatted = "  " + RESUME_TEXT.upper().replace("\n", "\n\n  ")
+        assert FingerprintService.fingerprint(reformatted)["text_hash"] == \
+            FingerprintService.fingerprint(RESUME_TEXT)["text_hash"]
+
+    def test_signature_is_deterministic(self):
+        assert FingerprintService.fingerprint(RESUME_TEXT)["signature"] == \
+            FingerprintService.fingerprint(RESUME_TEXT)["signature"]
+
+    def test_near_duplicate_is_similar(self):
+        a = FingerprintService.fingerprint(RESUME_TEXT)["signature"]
+        b = FingerprintService.fingerprint(EDITED_TEXT)["signature"]
+        assert FingerprintService.similarity(a, b) >= 0.8
+
+    def test_different_resumes_are_dissimilar(self):
+        a = FingerprintService.fingerprint(RESUME_TEXT)["signature"]
+        b = FingerprintService.fingerprint(OTHER_TEXT)["signature"]
+        assert FingerprintService.similarity(a, b) < 0.2
+
+    def test_split_sections_on_headers(self):
+        sections = FingerprintService.split_sections(RESUME_TEXT)
+        assert len(sections) == 5
+        assert sections[-1].startswith("=== Skills ===")
+        assert len(FingerprintService.split_sections(OTHER_TEXT)) == 4
+
+    def test_changed_sections_only_reports_edits(self):
+        previous = FingerprintService.fingerprint(RESUME_TEXT)
+        changed = FingerprintService.changed_sections(EDITED_TEXT, previous)
+        assert len(changed) == 1
+        assert "Go" in changed[0]
+
+    def test_short_text(self):
+        fp = FingerprintService.fingerprint("Python")
+        assert len(fp["signature"]) == 64
+
+
+class TestFindDuplicate:
+    """Tests for the LSH lookup against RedisService."""
+
+    def test_exact_content_duplicate(self, memory_only_redis):
+        fp = FingerprintService.fingerprint(RESUME_TEXT)
+        memory_only_redis.cache_resume_data("original", {"basic_info": {"name": "Zhang Wei"}})
+        FingerprintService.index("original", fp, memory_only_redis)
+
+        found = FingerprintService.find_duplicate(
+            FingerprintService.fingerprint(RESUME_TEXT + "\n"), memory_only_redis, 0.8
+        )
+        assert found == ("original", 1.0)
+
+    def test_near_duplicate_found_via_lsh(self, memory_only_redis):
+        memory_only_redis.cache_resume_data("original", {"basic_info": {"name": "Zhang Wei"}})
+        FingerprintService.index("original", FingerprintService.fingerprint(RESUME_TEXT), memory_only_redis)
+
+        found = FingerprintService.find_duplicate(
+            FingerprintService.fingerprint(EDITED_TEXT), memory_only_redis, 0.8
+        )
+        assert found is not None
+        assert found[0] == "original"
+        assert found[1] >= 0.8
+
+    def test_unrelated_resume_not_matched(self, memory_only_redis):
+        memory_only_redis.cache_resume_data("original", {"basic_info": {"name": "Zhang Wei"}})
+        FingerprintService.index("original", FingerprintService.fingerprint(RESUME_TEXT), memory_only_redis)
+        assert FingerprintService.find_duplicate(
+            FingerprintService.fingerprint(OTHER_TEXT), memory_only_redis, 0.8
+        ) is None
+
+    def test_expired_resume_data_is_ignored(self, memory_only_redis):
+        """A fingerprint whose ResumeData is gone can't be reused."""
+        FingerprintService.index("gone", FingerprintService.fingerprint(RESUME_TEXT), memory_only_redis)
+        assert FingerprintService.find_duplicate(
+            FingerprintService.fingerprint(RESUME_TEXT), memory_only_redis, 0.8
+        ) is None
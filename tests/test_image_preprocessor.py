@@ -0,0 +1,87 @@
+"""Unit tests for PageImagePreprocessor (vision payload reduction)."""
+import os
+import tempfile
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from services.image_preprocessor import PageImagePreprocessor, estimate_vision_tokens, VISION_DEFAULT_MAX_PIXELS
+
+
+def _page_with_text(doc, color=(0, 0, 0), lines=5):
+    page = doc.new_page(width=595, height=842)
+    for i in range(lines):
+        page.insert_text((200, 300 + i * 16), f"Python FastAPI Redis line {i}", fontsize=11, color=color)
+    return page
+
+
+@pytest.fixture
+def scanned_page():
+    from tests.generate_test_pdf import generate_scanned_resume_pdf
+    path = os.path.join(tempfile.gettempdir(), "test_preprocess_scan.pdf")
+    generate_scanned_resume_pdf(path, pages=1, dpi=150)
+    doc = fitz.open(path)
+    yield doc[0]
+    doc.close()
+
+
+class TestPageImagePreprocessor:
+    """Test cropping, color reduction, scaling, blank skipping and tiling."""
+
+    def test_blank_page_is_skipped(self):
+        doc = fitz.open()
+        page = doc.new_page()
+        assert PageImagePreprocessor().render(page) == []
+        assert len(PageImagePreprocessor(skip_blank=False).render(page)) == 1
+
+    def test_crops_to_content(self):
+        doc = fitz.open()
+        page = _page_with_text(doc)
+        pix = fitz.Pixmap(PageImagePreprocessor().render(page, dpi=100)[0])
+        full_width = 595 * 100 / 72
+        assert pix.width < full_width / 2
+        assert pix.height < 200
+
+    def test_monochrome_page_is_grayscale(self, scanned_page):
+        pix = fitz.Pixmap(PageImagePreprocessor().render(scanned_page)[0])
+        assert pix.n == 1
+
+    def test_color_page_stays_rgb(self):
+        doc = fitz.open()
+        page = _page_with_text(doc, color=(0.9, 0.1, 0.1), lines=20)
+        pix = fitz.Pixmap(PageImagePreprocessor().render(page)[0])
+        assert pix.n == 3
+
+    def test_payload_shrinks_and_respects_pixel_budget(self, scanned_page):
+        raw = scanned_page.get_pixmap(matrix=fitz.Matrix(200 / 72, 200 / 72)).tobytes("png")
+        processed = PageImagePreprocessor().render(scanned_page, dpi=200)[0]
+        pix = fitz.Pixmap(processed)
+        assert len(processed) < len(raw) / 5
+        assert pix.width * pix.height <= VISION_DEFAULT_MAX_PIXELS
+        assert max(pix.width, pix.height) <= 1600
+
+    def test_dense_page_tiles_at_full_dpi(self, scanned_page):
+        preprocessor = PageImagePreprocessor(tile_dense=True, dense_ink_ratio=0.0)
+        tiles = [fitz.Pixmap(img) for img in preprocessor.render(scanned_page, dpi=200)]
+        single = fitz.Pixmap(PageImagePreprocessor().render(scanned_page, dpi=200)[0])
+        assert len(tiles) == 2
+        assert tiles[0].width > single.width
+
+    def test_estimate_vision_tokens(self):
+        assert estimate_vision_tokens(28, 28) == 4  # minimum
+        assert estimate_vision_tokens(280, 280) == 100
+        assert estimate_vision_tokens(4000, 4000) <= 1280  # downscaled to max_pixels
+
+
+class TestPdfPagesWithPreprocessor:
+    def test_max_images_stops_rendering(self):
+        from services.pdf_service import PDFService
+        doc = fitz.open()
+        for _ in range(6):
+            _page_with_text(doc)
+        pdf_bytes = doc.tobytes()
+        images = PDFService.pdf_pages_to_base64_images(
+            pdf_bytes, dpi=72, preprocessor=PageImagePreprocessor(), max_images=2
+        )
+        assert len(images) == 2
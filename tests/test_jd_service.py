@@ -0,0 +1,72 @@
+"""Unit tests for JobDescriptionService (JD normalization, profiles, pre-scoring)."""
+import pytest
+from services.jd_service import JobDescriptionService
+
+JD_CN = "高级Python后端工程师\n要求：3年以上 Python / FastAPI / Redis 经验，熟悉 MySQL、Docker。本科及以上学历，硕士优先。"
+JD_EN = "Senior Python engineer, FastAPI and Redis. 5+ years experience, bachelor's degree or above."
+
+
+@pytest.fixture
+def memory_only_redis(redis_service):
+    return redis_service()
+
+
+class TestJobHash:
+    """Test JD normalization before hashing."""
+
+    def test_whitespace_and_case_variants_share_a_hash(self):
+        assert JobDescriptionService.job_hash("Python  Engineer\n") == JobDescriptionService.job_hash(" python engineer")
+
+    def test_full_width_characters_are_normalized(self):
+        assert JobDescriptionService.job_hash("ＰＹＴＨＯＮ，５年") == JobDescriptionService.job_hash("python,5年")
+
+    def test_different_jds_differ(self):
+        assert JobDescriptionService.job_hash("Python engineer") != JobDescriptionService.job_hash("Java engineer")
+
+
+class TestParseProfile:
+    """Test the rule-based requirement profile."""
+
+    def test_chinese_jd(self):
+        profile = JobDescriptionService.parse_profile(JD_CN)
+        assert {"python", "fastapi", "redis", "mysql", "docker"} <= set(profile.skills)
+        assert profile.min_years == 3
+        assert profile.degree == "本科"  # the minimum, not the preferred 硕士
+        assert profile.title == "高级Python后端工程师"
+
+    def test_english_jd(self):
+        profile = JobDescriptionService.parse_profile(JD_EN)
+        assert profile.skills == ["python", "fastapi", "redis"]
+        assert profile.min_years == 5
+        assert profile.degree == "本科"
+
+    def test_profile_is_cached_by_job_hash(self, memory_only_redis):
+        job_hash = JobDescriptionService.job_hash(JD_CN)
+        first = JobDescriptionService.get_profile(JD_CN, job_hash, memory_only_redis)
+        assert memory_only_redis.get_job_profile(job_hash) == first
+        memory_only_redis.cache_job_profile(job_hash, dict(first, skills=["cached"]))
+        assert JobDescriptionService.get_profile(JD_CN, job_hash, memory_only_redis)["skills"] == ["cached"]
+
+
+class TestPrescore:
+    """Test the local resume-vs-profile comparison."""
+
+    def test_full_match(self):
+        profile = JobDescriptionService.parse_profile(JD_EN).dict()
+        resume = {"work_years": "6年", "education_background": "硕士", "raw_text_summary": "Python, FastAPI, Redis"}
+        result = JobDescriptionService.prescore(profile, resume)
+        assert result["score"] == 100
+        assert result["missing_skills"] == []
+
+    def test_partial_match(self):
+        profile = JobDescriptionService.parse_profile(JD_EN).dict()
+        resume = {"work_years": "2年", "education_background": "大专", "raw_text_summary": "Python, Django"}
+        result = JobDescriptionService.prescore(profile, resume)
+        assert result["matched_skills"] == ["python"]
+        assert not result["years_ok"] and not result["degree_ok"]
+        assert result["score"] < 50
+
+    def test_skills_match_whole_words(self):
+        """"go" must not match inside "google"."""
+        result = JobDescriptionService.prescore({"skills": ["go"]}, {"raw_text_summary": "Worked at Google"})
+        assert result["matched_skills"] == []
@@ -0,0 +1,105 @@
+"""Unit tests for LeaderboardService (per-JD candidate rankings)."""
+import pytest
+from services.leaderboard_service import LeaderboardService
+
+
+def _fakeredis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis(decode_responses=False)
+    client.flushall()
+    return client
+
+
+def _with_resumes(service, *resume_ids):
+    """Candidates stay on a board only while their resume data is cached."""
+    for resume_id in resume_ids or ("r0", "r1", "r2", "r3", "r4", "a", "b", "c"):
+        service.cache_resume_data(resume_id, {"job_intention": "Engineer"})
+    return service
+
+
+@pytest.fixture(params=["memory", "fakeredis"])
+def leaderboard(request, redis_service):
+    client = _fakeredis_client() if request.param == "fakeredis" else None
+    return LeaderboardService(_with_resumes(redis_service(client)), "1")
+
+
+class TestLeaderboard:
+    def test_best_first_with_pagination(self, leaderboard):
+        for i, score in enumerate([40, 90, 75, 60, 85]):
+            leaderboard.record("jd1", f"r{i}", score)
+        first = leaderboard.top("jd1", page=1, page_size=2)
+        assert first["total"] == 5
+        assert first["results"] == [
+            {"rank": 1, "resume_id": "r1", "score": 90},
+            {"rank": 2, "resume_id": "r4", "score": 85},
+        ]
+        last = leaderboard.top("jd1", page=3, page_size=2)
+        assert last["results"] == [{"rank": 5, "resume_id": "r0", "score": 40}]
+        assert leaderboard.top("jd1", page=4, page_size=2)["results"] == []
+
+    def test_rescore_replaces_entry(self, leaderboard):
+        leaderboard.record("jd1", "a", 50)
+        leaderboard.record("jd1", "b", 70)
+        leaderboard.record("jd1", "a", 95)
+        result = leaderboard.top("jd1")
+        assert result["total"] == 2
+        assert [(row["resume_id"], row["score"]) for row in result["results"]] == [("a", 95), ("b", 70)]
+
+    def test_ties_order_like_redis(self, leaderboard):
+        for resume_id in ("a", "c", "b"):
+            leaderboard.record("jd1", resume_id, 80)
+        assert [row["resume_id"] for row in leaderboard.top("jd1")["results"]] == ["c", "b", "a"]
+
+    def test_record_many_updates_each_board(self, leaderboard):
+        leaderboard.record_many("r1", {"jd1": 60, "jd2": 30})
+        leaderboard.record_many("r2", {"jd1": 20, "jd2": 80})
+        assert leaderboard.top("jd1")["results"][0]["resume_id"] == "r1"
+        assert leaderboard.top("jd2")["results"][0]["resume_id"] == "r2"
+        assert leaderboard.top("unknown") == {"total": 0, "results": []}
+
+    def test_candidates_whose_resume_expired_are_trimmed(self, redis_service):
+        service = _with_resumes(redis_service(_fakeredis_client()))
+        leaderboard = LeaderboardService(service, "1")
+        for i, score in enumerate([40, 90, 75, 60, 85]):
+            leaderboard.record("jd1", f"r{i}", score)
+        leaderboard.record("jd1", "gone", 99)  # its resume data is no longer cached
+        service.client.delete("resume_data:r4")
+        # One check per page: expired candidates are dropped, the page is not refilled
+        first = leaderboard.top("jd1", page=1, page_size=2)
+        assert first == {"total": 5, "results": [{"rank": 1, "resume_id": "r1", "score": 90}]}
+        assert [row["resume_id"] for row in leaderboard.top("jd1", page=1, page_size=2)["results"]] == ["r1"]
+        assert [row["resume_id"] for row in leaderboard.top("jd1", page=1, page_size=2)["results"]] == ["r1", "r2"]
+        assert service.client.zcard("leaderboard:1:jd1") == 4
+
+    def test_nobody_is_trimmed_while_a_shard_is_down(self, redis_service):
+        fakeredis = pytest.importorskip("fakeredis")
+        from services.redis_shards import ShardedRedis
+        servers = {node: fakeredis.FakeServer() for node in ("a:6379", "b:6379", "c:6379")}
+        sharded = ShardedRedis({node: fakeredis.FakeRedis(server=server) for node, server in servers.items()})
+        service = redis_service(sharded, sharded=True)
+        leaderboard = LeaderboardService(service, "1")
+        resume_ids = [f"r{i}" for i in range(40)]
+        _with_resumes(service, *resume_ids)
+        for i, resume_id in enumerate(resume_ids):
+            leaderboard.record("jd1", resume_id, i)
+        board_node = sharded.node_for("leaderboard:1:jd1")
+        lost = next(node for node in servers if node != board_node)
+        servers[lost].connected = False
+        assert leaderboard.top("jd1", page_size=40)["total"] == 40
+        servers[lost].connected = True
+        assert sharded.zcard("leaderboard:1:jd1") == 40
+
+    def test_prompt_version_change_starts_new_boards(self, redis_service):
+        service = _with_resumes(redis_service(_fakeredis_client()))
+        LeaderboardService(service, "1").record("jd1", "r1", 90)
+        assert LeaderboardService(service, "2").top("jd1")["total"] == 0
+        assert LeaderboardService(service, "1").top("jd1")["total"] == 1
+        assert 0 < service.client.ttl("leaderboard:1:jd1") <= 30 * 86400
+
+    def test_falls_back_to_memory_when_redis_is_down(self, redis_service):
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.FakeRedis(decode_responses=False)
+        client.connected = False
+        leaderboard = LeaderboardService(_with_resumes(redis_service(client)), "1")
+        leaderboard.record("jd1", "r1", 55)
+        assert leaderboard.top("jd1")["results"] == [{"rank": 1, "resume_id": "r1", "score": 55}]
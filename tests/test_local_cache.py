@@ -0,0 +1,98 @@
+"""Unit tests for SharedDiskCache and the worker process helpers."""
+import os
+import sqlite3
+import time
+import pytest
+from services.local_cache import SharedDiskCache
+from core.process import MemoryWatchdog, available_cpu_count, current_rss_bytes
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+class TestSharedDiskCache:
+    """Tests for the SQLite-backed cache shared between worker processes."""
+
+    def test_set_and_get(self, cache_path):
+        cache = SharedDiskCache(cache_path)
+        cache["resume_data:a"] = '{"name": "A"}'
+        assert cache.get("resume_data:a") == '{"name": "A"}'
+        assert "resume_data:a" in cache
+        assert len(cache) == 1
+
+    def test_missing_key(self, cache_path):
+        cache = SharedDiskCache(cache_path)
+        assert cache.get("missing") is None
+        with pytest.raises(KeyError):
+            cache["missing"]
+
+    def test_entries_visible_across_instances(self, cache_path):
+        """Two instances on the same file behave like two workers sharing one tier."""
+        worker_a = SharedDiskCache(cache_path)
+        worker_b = SharedDiskCache(cache_path)
+        worker_a["match:r:j"] = '{"score": 90}'
+        assert worker_b.get("match:r:j") == '{"score": 90}'
+
+    def test_entries_visible_across_processes(self, cache_path):
+        cache = SharedDiskCache(cache_path)
+        pid = os.fork()
+        if pid == 0:
+            SharedDiskCache(cache_path)["from_child"] = "yes"
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert cache.get("from_child") == "yes"
+
+    def test_expired_entries_are_misses(self, cache_path):
+        cache = SharedDiskCache(cache_path)
+        cache.set("short", "value", ttl=-1)
+        assert cache.get("short") is None
+        assert len(cache) == 0
+
+    def test_pop(self, cache_path):
+        cache = SharedDiskCache(cache_path)
+        cache["k"] = "v"
+        assert cache.pop("k") == "v"
+        assert cache.get("k") is None
+
+    def test_redis_service_uses_shared_tier(self, cache_path, redis_service):
+        """Without Redis, two RedisService instances share hits through the file."""
+        first = redis_service(memory_cache=SharedDiskCache(cache_path))
+        second = redis_service(memory_cache=SharedDiskCache(cache_path))
+
+        first.cache_resume_data("shared", {"basic_info": {"name": "Shared"}})
+        assert second.get_resume_data("shared")["basic_info"]["name"] == "Shared"
+
+    def test_redis_service_keeps_entry_ttls(self, cache_path, redis_service):
+        """Entries written to the shared tier expire after their own TTL, not the default."""
+        service = redis_service(memory_cache=SharedDiskCache(cache_path))
+        service.cache_resume_data("r1", {"job_intention": "x"}, expire_seconds=60)
+        service.cache_match_result("r1", "jd", {"score": 70}, expire_seconds=120)
+        rows = dict(sqlite3.connect(cache_path).execute("SELECT key, expires_at FROM cache"))
+        assert 50 < rows["resume_data:r1"] - time.time() <= 60
+        assert 110 < rows["match:r1:jd"] - time.time() <= 120
+
+
+class TestProcessHelpers:
+    """Tests for CPU sizing and the memory watchdog."""
+
+    def test_available_cpu_count_positive(self):
+        assert available_cpu_count() >= 1
+
+    def test_current_rss_positive(self):
+        assert current_rss_bytes() > 0
+
+    def test_watchdog_below_ceiling(self):
+        watchdog = MemoryWatchdog(max_rss_bytes=current_rss_bytes() * 100)
+        assert watchdog.check() is False
+        assert watchdog.triggered is False
+
+    def test_watchdog_over_ceiling_requests_shutdown(self, monkeypatch):
+        signals = []
+        monkeypatch.setattr("core.process.os.kill", lambda pid, sig: signals.append((pid, sig)))
+        watchdog = MemoryWatchdog(max_rss_bytes=1)
+        assert watchdog.check() is True
+        assert watchdog.check() is True  # only signals once
+        assert len(signals) == 1
+        assert signals[0][0] == os.getpid()
@@ -0,0 +1,39 @@
+"""Tests for the rule-based resume extractor (the router's cheapest tier)."""
+from services.local_extractor import LocalExtractor
+
+
+class TestLocalExtractor:
+    def test_labelled_english_resume(self, test_pdf_bytes):
+        from services.pdf_service import PDFService
+        text = "\n".join(PDFService.extract_page_texts(test_pdf_bytes))
+        data = LocalExtractor.extract(text)
+        assert data.basic_info.name == "Zhang Wei"
+        assert data.basic_info.phone == "13812345678"
+        assert data.basic_info.email == "zhangwei@example.com"
+        assert data.job_intention == "Senior Python Backend Engineer"
+        assert data.work_years == "5年"
+        assert data.education_background == "Bachelor of Computer Science"
+        assert data.raw_text_summary.startswith("Python, FastAPI")
+
+    def test_chinese_sections(self):
+        text = "\n".join([
+            "姓名：李娜", "电话：+86 139-8765-4321", "邮箱：lina@example.cn", "现居地：上海",
+            "【求职意向】", "数据分析师",
+            "【工作经历】", "2019-2024 某电商公司 数据分析，5年工作经验",
+            "【教育背景】", "复旦大学 统计学 本科", "复旦大学 统计学 硕士",
+            "【专业技能】", "SQL、Python、Tableau",
+        ])
+        data = LocalExtractor.extract(text)
+        assert data.basic_info.name == "李娜"
+        assert data.basic_info.phone == "13987654321"
+        assert data.basic_info.address == "上海"
+        assert data.job_intention == "数据分析师"
+        assert data.work_years == "5年"
+        assert "硕士" in data.education_background
+        assert data.raw_text_summary == "SQL、Python、Tableau"
+
+    def test_unstructured_text_leaves_fields_empty(self):
+        data = LocalExtractor.extract("A free-form paragraph about my career so far, without any labels.")
+        assert data.basic_info.name is None
+        assert data.job_intention is None
+        assert data.raw_text_summary is None
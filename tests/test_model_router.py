@@ -0,0 +1,113 @@
+"""Tests for the extraction model cascade (DashScope is stubbed)."""
+import pytest
+
+from models.resume import BasicInfo, ResumeData
+from services.ai_service import AIService
+from services.model_router import ExtractionQuality, ModelRouter
+
+COMPLETE = ResumeData(
+    basic_info=BasicInfo(name="Zhang Wei", phone="13812345678", email="zw@example.com"),
+    job_intention="Backend Engineer", work_years="5年", education_background="本科",
+    raw_text_summary="Python, FastAPI, Redis, Kubernetes"
+)
+SPARSE = ResumeData(basic_info=BasicInfo(name="Zhang Wei"), job_intention="null")
+
+
+@pytest.fixture
+def models(monkeypatch):
+    """Stub models: answers per tier name, calls recorded in order."""
+    answers = {}
+    calls = []
+
+    def extract(text, api_key, model="qwen-turbo"):
+        calls.append(model)
+        answer = answers[model]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(AIService, "extract_resume_info", staticmethod(extract))
+    return answers, calls
+
+
+def _router(*tiers):
+    return ModelRouter(list(tiers), ["qwen-vl-max"], min_quality=0.7, tier_costs={"small": 1, "large": 10})
+
+
+class TestExtractionQuality:
+    def test_complete_result_scores_one(self):
+        assert ExtractionQuality.score(COMPLETE) == 1.0
+
+    def test_placeholders_and_invalid_values_do_not_count(self):
+        bad = COMPLETE.copy(update={"basic_info": BasicInfo(name="Zhang Wei", phone="N/A", email="not-an-email"),
+                                    "work_years": "无"})
+        assert ExtractionQuality.score(bad) == pytest.approx(0.7)
+        assert ExtractionQuality.score(SPARSE) == pytest.approx(0.15)
+
+
+class TestModelRouter:
+    def test_good_cheap_result_is_accepted(self, models):
+        answers, calls = models
+        answers.update(small=COMPLETE, large=COMPLETE)
+        router = _router("small", "large")
+        assert router.extract_text("text", "key") == COMPLETE
+        assert calls == ["small"]
+        assert router.stats()["text"]["small"]["accepted"] == 1
+
+    def test_poor_result_escalates(self, models):
+        answers, calls = models
+        answers.update(small=SPARSE, large=COMPLETE)
+        router = _router("small", "large")
+        assert router.extract_text("text", "key") == COMPLETE
+        assert calls == ["small", "large"]
+        stats = router.stats()["text"]
+        assert stats["small"]["escalation_rate"] == 1.0
+        assert stats["large"]["estimated_cost"] == 10
+
+    def test_failed_call_escalates_and_best_result_wins(self, models):
+        answers, calls = models
+        answers.update(small=SPARSE, medium=RuntimeError("throttled"), large=SPARSE.copy(update={"job_intention": None}))
+        router = _router("small", "medium", "large")
+        assert router.extract_text("text", "key") == SPARSE
+        assert router.stats()["text"]["medium"]["errors"] == 1
+
+    def test_last_tier_error_is_raised_without_a_result(self, models):
+        answers, _ = models
+        answers.update(small=RuntimeError("down"))
+        with pytest.raises(RuntimeError, match="down"):
+            _router("small").extract_text("text", "key")
+
+    def test_abandoned_request_does_not_escalate(self, models, monkeypatch):
+        from core.cancellation import CancelToken, Cancelled
+        answers, calls = models
+        answers.update(small=SPARSE, large=COMPLETE)
+        token = CancelToken(60, finish_committed=True)
+
+        def extract(text, api_key, model="qwen-turbo"):
+            calls.append(model)
+            token.cancel("client disconnected")  # while the first call is in flight
+            return answers[model]
+
+        monkeypatch.setattr(AIService, "extract_resume_info", staticmethod(extract))
+        assert _router("small", "large").extract_text("text", "key", before_call=token.commit) == SPARSE
+        assert calls == ["small"]
+        with pytest.raises(Cancelled):
+            _router("small", "large").extract_text("text", "key", before_call=token.commit)
+
+    def test_local_tier_needs_no_model_call(self, models, test_pdf_bytes):
+        from services.pdf_service import PDFService
+        answers, calls = models
+        commits = []
+        text = "\n".join(PDFService.extract_page_texts(test_pdf_bytes))
+        data = _router("local", "large").extract_text(text, "key", before_call=lambda: commits.append(1))
+        assert data.basic_info.name == "Zhang Wei"
+        assert calls == [] and commits == []
+
+    def test_from_settings(self):
+        from core.config import Settings
+        router = ModelRouter.from_settings(Settings(
+            MODEL_TEXT_TIERS="local, qwen-turbo", MODEL_VISION_TIERS="local,qwen-vl-max", MODEL_TIER_COSTS="qwen-turbo=2,bad"
+        ))
+        assert router.text_tiers == ["local", "qwen-turbo"]
+        assert router.vision_tiers == ["qwen-vl-max"]
+        assert router.tier_costs == {"qwen-turbo": 2.0}
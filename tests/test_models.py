@@ -92,6 +92,7 @@ class TestResumeMatchResponse:
     def test_valid_response(self):
         resp = ResumeMatchResponse(
             resume_id="hash123",
+            job_hash="jd123",
             match_result=MatchResult(score=90, skills_match_rate="90%", experience_relevance="Very High", comment="Excellent"),
             message="Success"
         )
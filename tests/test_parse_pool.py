@@ -0,0 +1,119 @@
+"""Tests for the isolated PDF parsing worker pool."""
+import os
+import time
+
+import pytest
+
+from core.parse_pool import ParseFailed, ParsePool
+
+
+# Jobs must be importable by the spawned workers, hence module level
+def _pid(_=None):
+    return os.getpid()
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return "done"
+
+
+def _allocate(megabytes):
+    blocks = [bytearray(1024 * 1024) for _ in range(megabytes)]
+    time.sleep(5)
+    return len(blocks)
+
+
+def _fail():
+    raise ValueError("bad xref table")
+
+
+def _square(x):
+    if x < 0:
+        raise ValueError("negative")
+    return x * x
+
+
+def _crash():
+    os._exit(3)
+
+
+@pytest.fixture
+def pool():
+    pool = ParsePool(workers=1, timeout_seconds=5, max_jobs=3)
+    yield pool
+    pool.close()
+
+
+class TestParsePool:
+    def test_runs_in_another_process(self, pool):
+        assert pool.run(_pid) != os.getpid()
+        assert pool.stats()["jobs"] == 1
+
+    def test_worker_is_reused(self, pool):
+        assert pool.run(_pid) == pool.run(_pid)
+
+    def test_timeout_kills_worker_and_pool_recovers(self, pool):
+        before = pool.run(_pid)
+        with pytest.raises(ParseFailed) as exc:
+            pool.run(_sleep, 30, timeout=0.5)
+        assert "timed out" in exc.value.reason
+        assert pool.run(_pid) != before
+        assert pool.stats()["timeouts"] == 1
+
+    def test_memory_ceiling(self):
+        pool = ParsePool(workers=1, timeout_seconds=10, max_rss_bytes=200 * 1024 * 1024)
+        try:
+            with pytest.raises(ParseFailed) as exc:
+                pool.run(_allocate, 400)
+            assert "memory" in exc.value.reason
+            assert pool.run(_sleep, 0) == "done"
+        finally:
+            pool.close()
+
+    def test_exception_in_job_keeps_worker(self, pool):
+        before = pool.run(_pid)
+        with pytest.raises(RuntimeError, match="bad xref table"):
+            pool.run(_fail)
+        assert pool.run(_pid) == before
+
+    def test_crash_is_reported(self, pool):
+        with pytest.raises(ParseFailed) as exc:
+            pool.run(_crash)
+        assert "crashed" in exc.value.reason
+        assert pool.stats()["crashes"] == 1
+        assert pool.run(_sleep, 0) == "done"
+
+    def test_recycled_after_max_jobs(self, pool):
+        pids = [pool.run(_pid) for _ in range(4)]
+        assert len(set(pids[:3])) == 1
+        assert pids[3] != pids[0]
+        assert pool.stats()["recycled"] == 1
+
+    def test_should_stop_kills_running_job(self, pool):
+        started = time.monotonic()
+        with pytest.raises(ParseFailed) as exc:
+            pool.run(_sleep, 30, should_stop=lambda: time.monotonic() - started > 0.3)
+        assert exc.value.reason == "cancelled"
+        assert time.monotonic() - started < 5
+
+    def test_zero_workers_runs_inline(self):
+        pool = ParsePool(workers=0, timeout_seconds=1)
+        assert pool.run(_pid) == os.getpid()
+
+
+class TestParsePoolMap:
+    def test_results_in_call_order(self):
+        pool = ParsePool(workers=2, timeout_seconds=5)
+        try:
+            assert pool.map(_square, [(3,), (1,), (2,)]) == [9, 1, 4]
+        finally:
+            pool.close()
+
+    def test_failure_is_raised(self):
+        pool = ParsePool(workers=2, timeout_seconds=5)
+        try:
+            with pytest.raises(RuntimeError, match="negative"):
+                pool.map(_square, [(1,), (-1,), (2,)])
+            assert pool.map(_square, [(4,)]) == [16]
+        finally:
+            pool.close()
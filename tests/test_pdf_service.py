@@ -68,3 +68,122 @@ class TestPDFServiceImageDetection:
         """Should return empty list for invalid bytes."""
         result = PDFService.pdf_pages_to_base64_images(b"not a pdf")
         assert result == []
+
+    def test_rasterization_stops_between_pages(self):
+        """should_stop is checked before each page."""
+        import os
+        import tempfile
+        from tests.generate_test_pdf import generate_multipage_resume_pdf
+        pdf_path = os.path.join(tempfile.gettempdir(), "test_interrupt_fixture.pdf")
+        generate_multipage_resume_pdf(pdf_path, pages=5)
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+
+        calls = []
+        def stop_after_two():
+            calls.append(1)
+            return len(calls) > 2
+
+        images = PDFService.pdf_pages_to_base64_images(pdf_bytes, dpi=50, should_stop=stop_after_two)
+        assert len(images) == 2
+
+    def test_rasterization_limited_to_pages(self):
+        """Only the requested page indices are rendered."""
+        import os
+        import tempfile
+        from tests.generate_test_pdf import generate_multipage_resume_pdf
+        pdf_path = os.path.join(tempfile.gettempdir(), "test_pages_fixture.pdf")
+        generate_multipage_resume_pdf(pdf_path, pages=4)
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+
+        images = PDFService.pdf_pages_to_base64_images(pdf_bytes, dpi=50, pages=[1, 3])
+        assert len(images) == 2
+
+
+class TestPDFServicePageTexts:
+    """Tests for PDFService.extract_page_texts"""
+
+    def test_one_entry_per_page(self, test_pdf_bytes):
+        pages = PDFService.extract_page_texts(test_pdf_bytes)
+        assert len(pages) >= 1
+        assert "\n".join(pages) == PDFService.extract_text(test_pdf_bytes)
+
+    def test_engines_agree_on_page_count(self, test_pdf_bytes):
+        assert len(PDFService.extract_page_texts(test_pdf_bytes, engine="pymupdf")) == \
+            len(PDFService.extract_page_texts(test_pdf_bytes))
+
+    def test_empty_pdf_has_blank_page(self, empty_pdf_bytes):
+        assert PDFService.extract_page_texts(empty_pdf_bytes) == [""]
+
+    def test_invalid_bytes(self):
+        assert PDFService.extract_page_texts(b"not a pdf") == []
+
+
+class TestPDFServiceRoutePages:
+    """Per-page routing of garbled / image-only pages to vision extraction."""
+
+    CLEAN = "张三 Python后端开发工程师，5年经验，熟悉Django与Redis。"
+
+    def _pages(self, monkeypatch, pages, graphics=()):
+        monkeypatch.setattr(PDFService, "extract_page_texts",
+                            staticmethod(lambda b, engine="pdfplumber", start=0, stop=None: list(pages[start:stop])))
+        monkeypatch.setattr(PDFService, "pages_with_graphics",
+                            staticmethod(lambda b, indices: [i for i in indices if i in graphics]))
+
+    def test_clean_pdf_stays_on_text_path(self, monkeypatch):
+        self._pages(monkeypatch, [self.CLEAN, self.CLEAN])
+        raw_text, vision_pages = PDFService.route_pages(b"%PDF", 0.5)
+        assert vision_pages == []
+        assert raw_text == self.CLEAN + "\n" + self.CLEAN
+
+    def test_garbled_page_goes_to_vision(self, monkeypatch):
+        self._pages(monkeypatch, [self.CLEAN, "(cid:12)(cid:45)(cid:88)(cid:3)"])
+        raw_text, vision_pages = PDFService.route_pages(b"%PDF", 0.5)
+        assert vision_pages == [1]
+        assert raw_text == self.CLEAN
+
+    def test_blank_page_only_needs_vision_with_graphics(self, monkeypatch):
+        self._pages(monkeypatch, [self.CLEAN, "", ""], graphics={2})
+        assert PDFService.route_pages(b"%PDF", 0.5)[1] == [2]
+
+    def test_unreadable_pdf_goes_to_vision_whole(self, monkeypatch):
+        self._pages(monkeypatch, ["���", ""])
+        assert PDFService.route_pages(b"%PDF", 0.5) == ("", [0, 1])
+
+    def test_unopenable_pdf(self, monkeypatch):
+        self._pages(monkeypatch, [])
+        assert PDFService.route_pages(b"%PDF", 0.5) == ("", [])
+
+
+class TestPDFServiceParallelRouting:
+    """Page-range sharding of long documents across parse workers."""
+
+    def test_sharded_result_matches_single_pass(self):
+        import tempfile
+        from core.parse_pool import ParsePool
+        from tests.generate_test_pdf import generate_mixed_resume_pdf
+        pdf_path = os.path.join(tempfile.gettempdir(), "test_shard_fixture.pdf")
+        generate_mixed_resume_pdf(pdf_path, 6)
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+
+        pool = ParsePool(workers=2, timeout_seconds=30)
+        try:
+            sharded = PDFService.route_pages_parallel(pdf_bytes, 0.5, pool, min_pages=4, shards=3)
+            assert pool.stats()["jobs"] == 4  # page count + 3 shards
+        finally:
+            pool.close()
+        assert sharded == PDFService.route_pages(pdf_bytes, 0.5)
+        assert sharded[1]  # the scanned pages of the mixed document
+
+    def test_short_document_stays_in_one_job(self, test_pdf_bytes):
+        from core.parse_pool import ParsePool
+        pool = ParsePool(workers=0, timeout_seconds=30)
+        assert PDFService.route_pages_parallel(test_pdf_bytes, 0.5, pool, min_pages=20, shards=4) == \
+            PDFService.route_pages(test_pdf_bytes, 0.5)
+
+    def test_page_range(self, test_pdf_bytes):
+        assert PDFService.extract_page_texts(test_pdf_bytes, start=0, stop=1) == \
+            PDFService.extract_page_texts(test_pdf_bytes)[:1]
+        assert PDFService.extract_page_texts(test_pdf_bytes, engine="pymupdf", start=5, stop=9) == []
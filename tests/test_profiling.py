@@ -0,0 +1,170 @@
+"""Tests for on-demand request profiling (core/profiling.py, /api/admin/profiles)."""
+import io
+import marshal
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+from core import profiling
+from core.profiling import Profiler, ProfileSession, ProfilingMiddleware, profiled, trace_allocations, traced_call
+
+TOKEN = "s3cret"
+
+
+def _session(mode="cprofile", trace=True):
+    return ProfileSession(mode, "POST", "/api/resume/analyze", "default", trace, 0.001)
+
+
+def _busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+class TestProfilerSelection:
+    def test_admin_header_selects_request(self):
+        profiler = Profiler(admin_token=TOKEN, mode="sample")
+        assert profiler.start({"headers": []}) is None
+        assert profiler.start({"headers": [(b"x-profile", b"wrong")]}) is None
+        session = profiler.start({"headers": [(b"x-profile", TOKEN.encode()), (b"x-profile-mode", b"cprofile")],
+                                  "method": "POST", "path": "/x"})
+        assert session.mode == "cprofile" and session.path == "/x"
+        session.finish(200)
+
+    def test_sample_rate(self, monkeypatch):
+        profiler = Profiler(sample_rate=0.1, mode="cprofile")
+        monkeypatch.setattr(profiling.random, "random", lambda: 0.5)
+        assert profiler.start({"headers": []}) is None
+        monkeypatch.setattr(profiling.random, "random", lambda: 0.05)
+        assert profiler.start({"headers": []}).mode == "cprofile"
+
+    def test_disabled_without_token_or_rate(self):
+        profiler = Profiler()
+        assert not profiler.enabled
+        assert not profiler.is_admin("")
+        assert profiler.start({"headers": [(b"x-profile", b"")]}) is None
+
+    def test_profiled_is_identity_outside_a_profiled_request(self):
+        def func():
+            return 1
+        assert profiled(func) is func
+        assert trace_allocations(func) == 1
+
+    def test_ring_buffer_is_bounded(self):
+        profiler = Profiler(admin_token=TOKEN, buffer_size=2)
+        sessions = [_session() for _ in range(3)]
+        for session in sessions:
+            session.finish(200)
+            profiler.store(session)
+        assert [entry["id"] for entry in profiler.list()] == [sessions[2].id, sessions[1].id]
+        assert profiler.get(sessions[0].id) is None
+
+
+class TestSessions:
+    def test_cprofile_attributes_time_to_services(self, redis_service):
+        session = _session("cprofile")
+        service = redis_service()
+
+        def work():
+            service.cache_resume_data("r1", {"job_intention": "x"})
+            return service.get_resume_data("r1")
+
+        assert session.run(work)["job_intention"] == "x"
+        session.finish(200)
+        summary = session.summary()
+        assert summary["calls"][0]["name"].endswith("work")
+        assert "RedisService" in summary["components_ms"]
+        stats = marshal.loads(session.raw())
+        assert any(key[2] == "get_resume_data" for key in stats)
+        assert "cumulative" in session.text()
+
+    def test_sampler_collects_stacks(self):
+        session = _session("sample")
+        session.run(_busy, 0.05)
+        session.finish(200)
+        assert session.samples > 0
+        assert "_busy" in session.raw().decode()
+        assert session.summary()["samples"] == session.samples
+
+    def test_traced_call_reports_allocations(self):
+        def allocate():
+            return [bytearray(1024) for _ in range(200)]
+
+        result, report = traced_call(allocate)
+        assert len(result) == 200
+        assert report["peak_kb"] >= 200
+        assert report["top"] and "test_profiling.py" in report["top"][0]["where"]
+
+    def test_trace_allocations_through_a_runner(self):
+        session = _session("sample")
+        reset = profiling._current.set(session)
+        calls = []
+
+        def runner(func, *args, **kwargs):
+            calls.append(func)
+            return func(*args, **kwargs)
+
+        try:
+            assert trace_allocations(bytes, 10, run=runner) == bytes(10)
+        finally:
+            profiling._current.reset(reset)
+            session.finish(200)
+        assert calls == [traced_call]
+        assert session.summary()["allocations"][0]["function"] == "bytes"
+
+
+@pytest.fixture
+def profiled_app(monkeypatch, redis_service):
+    from api import admin
+    from api.resume import router as resume_router
+
+    profiler = Profiler(admin_token=TOKEN, mode="cprofile")
+    monkeypatch.setattr(admin, "profiler", profiler)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+    app.include_router(resume_router, prefix="/api/resume")
+    app.include_router(admin.router, prefix="/api/admin")
+
+    @app.get("/work")
+    async def work():
+        return {"value": await run_in_threadpool(profiled(redis_service().get_resume_data), "none")}
+
+    return TestClient(app), profiler
+
+
+class TestEndpoints:
+    def test_profiled_request_is_downloadable(self, profiled_app):
+        client, profiler = profiled_app
+        response = client.get("/work", headers={"X-Profile": TOKEN})
+        assert response.status_code == 200
+        profile_id = response.headers["x-profile-id"]
+        assert "x-profile-id" not in client.get("/work").headers
+
+        listing = client.get("/api/admin/profiles", headers={"X-Profile": TOKEN}).json()["profiles"]
+        assert [entry["id"] for entry in listing] == [profile_id]
+        summary = client.get(f"/api/admin/profiles/{profile_id}", headers={"X-Profile": TOKEN}).json()
+        assert summary["status"] == 200 and summary["path"] == "/work"
+        assert summary["calls"][0]["name"] == "RedisService.get_resume_data"
+        raw = client.get(f"/api/admin/profiles/{profile_id}?format=raw", headers={"X-Profile": TOKEN})
+        assert raw.headers["content-disposition"].endswith('.prof"')
+        assert marshal.loads(raw.content)
+
+    def test_admin_endpoints_need_the_token(self, profiled_app):
+        client, _ = profiled_app
+        assert client.get("/api/admin/profiles").status_code == 403
+        assert client.get("/api/admin/profiles/nope", headers={"X-Profile": TOKEN}).status_code == 404
+
+    def test_analyze_profile_covers_pdf_parsing(self, profiled_app, test_pdf_bytes):
+        client, profiler = profiled_app
+        response = client.post(
+            "/api/resume/analyze", headers={"X-Profile": TOKEN},
+            files={"file": ("profiled.pdf", io.BytesIO(test_pdf_bytes + b"%profiled"), "application/pdf")}
+        )
+        assert response.status_code == 200
+        summary = profiler.get(response.headers["x-profile-id"]).summary()
+        names = [call["name"] for call in summary["calls"]]
+        assert "_parse_pdf" in names and "_analyze_job" in names
+        assert "PDFService" in summary["components_ms"]
@@ -1,15 +1,15 @@
 """Unit tests for RedisService (in-memory fallback mode)."""
+import json
+import time
+
 import pytest
 from services.redis_service import RedisService
 
 
 @pytest.fixture
-def memory_only_redis():
+def memory_only_redis(redis_service):
     """Create a RedisService instance that only uses in-memory cache (no actual Redis)."""
-    service = RedisService.__new__(RedisService)
-    service.memory_cache = {}
-    service.client = None  # Force in-memory mode without connection attempt
-    return service
+    return redis_service()
 
 
 @pytest.fixture
@@ -86,6 +86,181 @@ class TestRedisServiceMemoryFallback:
         assert result["version"] == 2
 
 
+class TestRedisServiceBackgroundConnect:
+    """Test the non-blocking startup mode."""
+
+    def test_background_connect_does_not_block(self):
+        """Constructor returns immediately and serves from memory until Redis answers."""
+        import time
+        start = time.perf_counter()
+        service = RedisService(host="10.255.255.1", port=6379, db=0, connect_in_background=True)
+        assert time.perf_counter() - start < 0.5
+        assert service.client is None
+        service.cache_resume_data("bg", {"basic_info": {"name": "BG"}})
+        assert service.get_resume_data("bg")["basic_info"]["name"] == "BG"
+
+
+@pytest.fixture
+def fake_redis(redis_service):
+    """RedisService on fakeredis, with its own codec so stats start at zero."""
+    fakeredis = pytest.importorskip("fakeredis")
+    return redis_service(fakeredis.FakeRedis())
+
+
+class TestRedisServiceEncoding:
+    """Test the compact encoding and per-resume match hash (fakeredis)."""
+
+    def test_matches_share_one_hash_per_resume(self, fake_redis):
+        fake_redis.cache_match_result("r1", "jd_a", {"score": 80})
+        fake_redis.cache_match_result("r1", "jd_b", {"score": 60})
+        assert sorted(fake_redis.client.hkeys("matches:r1")) == [b"jd_a", b"jd_a:exp", b"jd_b", b"jd_b:exp"]
+        assert fake_redis.client.ttl("matches:r1") > 0
+        assert fake_redis.get_match_result("r1", "jd_a")["score"] == 80
+        assert fake_redis.get_match_result("r1", "jd_b")["score"] == 60
+
+    def test_reads_legacy_json_entries(self, fake_redis):
+        """Plain JSON written before the codec existed stays readable."""
+        fake_redis.client.set("resume_data:old", json.dumps({"job_intention": "工程师"}))
+        fake_redis.client.set("match:old:jd", json.dumps({"score": 70}))
+        assert fake_redis.get_resume_data("old")["job_intention"] == "工程师"
+        assert fake_redis.get_match_result("old", "jd")["score"] == 70
+        assert fake_redis.get_resume_data_json("old") == '{"job_intention":"工程师"}'.encode("utf-8")
+
+    def test_entries_are_compressed(self, fake_redis):
+        data = {"raw_text_summary": "Python, Redis, FastAPI. " * 40}
+        fake_redis.cache_resume_data("big", data)
+        stored = fake_redis.client.get("resume_data:big")
+        assert len(stored) < len(json.dumps(data)) / 4
+        assert fake_redis.get_resume_data("big") == data
+
+    def test_cache_stats_report_bytes_per_entry(self, fake_redis):
+        fake_redis.cache_resume_data("s1", {"raw_text_summary": "Python " * 50})
+        stats = fake_redis.get_cache_stats()
+        entry = stats["keyspaces"]["resume_data"]
+        assert stats["backend"] == "redis"
+        assert entry["entries_written"] == 1
+        assert entry["avg_stored_bytes"] < entry["avg_json_bytes"]
+
+    def test_undecodable_entry_is_a_miss(self, fake_redis):
+        fake_redis.client.set("resume_data:bad", bytes((0xC1, 9)) + b"junk")
+        assert fake_redis.get_resume_data("bad") is None
+
+
+def _make_stale(service, resume_id, job_hash, seconds=100):
+    """Move a match's soft expiry `seconds` into the past."""
+    service.client.hset(f"matches:{resume_id}", f"{job_hash}:exp", int(time.time()) - seconds)
+
+
+@pytest.fixture
+def refreshing_redis(fake_redis):
+    """fake_redis with a 1 h grace window; keys are hot from the 2nd read."""
+    from services.cache_refresh import RefreshPolicy
+    fake_redis.refresh_policy = RefreshPolicy(grace_seconds=3600, min_hits=2)
+    return fake_redis
+
+
+class TestRedisServiceRefresh:
+    """Soft/hard TTLs, stale serving and single background refreshes (fakeredis)."""
+
+    def test_hard_ttl_includes_grace(self, refreshing_redis):
+        refreshing_redis.cache_resume_data("r1", {"job_intention": "Engineer"}, expire_seconds=600)
+        refreshing_redis.cache_match_result("r1", "jd", {"score": 80}, expire_seconds=600)
+        assert 4190 < refreshing_redis.client.ttl("resume_data:r1") <= 4200
+        assert 4190 < refreshing_redis.client.ttl("matches:r1") <= 4200
+
+    def test_hot_stale_resume_data_is_renewed(self, refreshing_redis):
+        refreshing_redis.cache_resume_data("hot", {"job_intention": "Engineer"})
+        refreshing_redis.client.expire("resume_data:hot", 100)  # soft TTL passed
+        assert refreshing_redis.get_resume_data("hot")["job_intention"] == "Engineer"
+        assert refreshing_redis.client.ttl("resume_data:hot") == 100  # first read: cold
+        refreshing_redis.get_resume_data("hot")
+        assert refreshing_redis.client.ttl("resume_data:hot") > 86400
+
+    def test_renewal_keeps_the_ttl_an_entry_was_written_with(self, refreshing_redis):
+        refreshing_redis.cache_resume_data("short", {"job_intention": "Engineer"}, expire_seconds=600)
+        refreshing_redis.client.expire("resume_data:short", 100)
+        refreshing_redis.get_resume_data("short")
+        refreshing_redis.get_resume_data("short")
+        assert 4190 < refreshing_redis.client.ttl("resume_data:short") <= 4200
+        # Rewritten with the default TTL, the entry drops its recorded one
+        refreshing_redis.cache_resume_data("short", {"job_intention": "Engineer"})
+        assert not refreshing_redis.client.exists("resume_data_ttl:short")
+
+    def test_downgraded_data_is_tenant_scoped_and_not_extended(self, refreshing_redis):
+        refreshing_redis.cache_downgraded_resume_data("d1", "team-a", {"job_intention": "Engineer"}, 600)
+        assert refreshing_redis.get_resume_data("d1") is None
+        assert refreshing_redis.get_downgraded_resume_data("d1", "team-b") is None
+        assert refreshing_redis.get_downgraded_resume_data("d1", "team-a")["job_intention"] == "Engineer"
+        assert 590 < refreshing_redis.client.ttl("downgraded:d1:team-a") <= 600
+
+    def test_cold_stale_entry_is_served_and_left_to_expire(self, refreshing_redis):
+        refreshing_redis.cache_match_result("cold", "jd", {"score": 70})
+        _make_stale(refreshing_redis, "cold", "jd")
+        assert refreshing_redis.get_match_entry("cold", "jd") == (b'{"score":70}', False)
+        assert refreshing_redis.refresh_policy.counters["cold_skipped"] == 1
+
+    def test_one_reader_refreshes_a_hot_stale_match(self, refreshing_redis):
+        refreshing_redis.cache_match_result("r2", "jd", {"score": 90})
+        _make_stale(refreshing_redis, "r2", "jd")
+        results = [refreshing_redis.get_match_entry("r2", "jd") for _ in range(5)]
+        assert all(json_bytes == b'{"score":90}' for json_bytes, _ in results)
+        assert [refresh for _, refresh in results] == [False, True, False, False, False]
+
+    def test_fresh_entries_are_refreshed_early_only_close_to_expiry(self, refreshing_redis):
+        policy = refreshing_redis.refresh_policy
+        policy.min_hits = 0
+        # A day from soft expiry with 5 s recomputes: practically never
+        assert not any(policy.should_refresh("k", 3600 + 86400, 5.0) for _ in range(1000))
+        # A second from soft expiry: almost always
+        assert sum(policy.should_refresh("k", 3600 + 1, 5.0) for _ in range(1000)) > 700
+
+    def test_matches_of_one_resume_expire_independently(self, refreshing_redis):
+        """Scoring another JD for the resume neither freshens nor revives its stale matches."""
+        refreshing_redis.refresh_policy.min_hits = 0
+        refreshing_redis.cache_match_result("r4", "jd_old", {"score": 50})
+        _make_stale(refreshing_redis, "r4", "jd_old")
+        assert refreshing_redis.get_match_entry("r4", "jd_old") == (b'{"score":50}', True)
+        refreshing_redis.client.delete("refresh_lock:match:r4:jd_old")
+
+        refreshing_redis.cache_match_result("r4", "jd_new", {"score": 80})
+        assert refreshing_redis.client.ttl("matches:r4") > 86400
+        assert refreshing_redis.get_match_entry("r4", "jd_old") == (b'{"score":50}', True)
+        assert refreshing_redis.get_match_entry("r4", "jd_new")[1] is False
+
+        # Past soft expiry + grace it is a miss, however recently its sibling was written
+        _make_stale(refreshing_redis, "r4", "jd_old", 3600 + 1)
+        refreshing_redis.cache_match_result("r4", "jd_new", {"score": 85})
+        assert refreshing_redis.get_match_entry("r4", "jd_old") == (None, False)
+        assert refreshing_redis.get_match_results_json_many("r4", ["jd_old", "jd_new"]) == {"jd_new": b'{"score":85}'}
+
+    def test_expired_matches_are_pruned_as_new_ones_are_added(self, refreshing_redis):
+        """A hot resume scored against ever new JDs keeps a bounded hash."""
+        refreshing_redis.match_prune_fields = 8
+        for i in range(30):
+            refreshing_redis.cache_match_result("r5", f"jd{i}", {"score": i})
+            if i >= 2:
+                _make_stale(refreshing_redis, "r5", f"jd{i - 2}", 3600 + 1)  # past soft expiry + grace
+            assert refreshing_redis.client.hlen("matches:r5") <= 8 + 2
+        # Stale matches still inside the grace window are kept (they are served while refreshed)
+        _make_stale(refreshing_redis, "r5", "jd29")
+        refreshing_redis.cache_match_results_many("r5", {f"new{i}": {"score": i} for i in range(4)})
+        assert refreshing_redis.get_match_entry("r5", "jd29")[0] == b'{"score":29}'
+        assert refreshing_redis.client.hexists("matches:r5", "jd29:exp")
+        assert not refreshing_redis.client.hexists("matches:r5", "jd27:exp")
+
+    def test_access_counts_decay(self):
+        from services.cache_refresh import RefreshPolicy
+        policy = RefreshPolicy(grace_seconds=60, window_seconds=0)
+        for _ in range(8):
+            hits = policy.record_access("k")
+        assert hits < 3
+
+    def test_no_policy_keeps_hard_ttl(self, fake_redis):
+        fake_redis.cache_resume_data("r3", {"job_intention": "Engineer"}, expire_seconds=600)
+        assert fake_redis.client.ttl("resume_data:r3") <= 600
+        assert fake_redis.get_match_entry("r3", "jd") == (None, False)
+
+
 class TestRedisServiceLive:
     """Test RedisService with actual Redis (skipped if Redis not available)."""
 
@@ -0,0 +1,140 @@
+"""Tests for the client-side Redis hash ring (several fakeredis servers as nodes)."""
+import time
+
+import pytest
+import redis
+
+from services.redis_shards import HashRing, ShardedRedis, shard_key
+from services.search_service import SearchService
+
+NODES = ["10.0.0.1:6379", "10.0.0.2:6379", "10.0.0.3:6379"]
+
+
+@pytest.fixture
+def servers():
+    fakeredis = pytest.importorskip("fakeredis")
+    return {node: fakeredis.FakeServer() for node in NODES}
+
+
+@pytest.fixture
+def sharded(servers):
+    fakeredis = pytest.importorskip("fakeredis")
+    clients = {node: fakeredis.FakeRedis(server=server) for node, server in servers.items()}
+    return ShardedRedis(clients, retry_seconds=30)
+
+
+@pytest.fixture
+def service(sharded, redis_service):
+    return redis_service(sharded, sharded=True)
+
+
+def _keys_on(servers, node):
+    import fakeredis
+    return {key.decode("utf-8") for key in fakeredis.FakeRedis(server=servers[node]).keys("*")}
+
+
+class TestHashRing:
+    def test_shard_key_uses_hash_tag(self):
+        assert shard_key("matches:{abc}") == b"abc"
+        assert shard_key("match:{abc}:jd1") == b"abc"
+        assert shard_key("plain:key") == b"plain:key"
+        # Empty or unclosed braces: the whole key is hashed
+        assert shard_key("a:{}:b") == b"a:{}:b"
+        assert shard_key("a:{b") == b"a:{b"
+
+    def test_keys_spread_over_all_nodes(self):
+        ring = HashRing(NODES)
+        counts = {node: 0 for node in NODES}
+        for i in range(3000):
+            counts[ring.node_for(f"resume_data:{i}")] += 1
+        assert all(600 < count < 1400 for count in counts.values())
+
+    def test_adding_a_node_moves_few_keys(self):
+        before = HashRing(NODES)
+        after = HashRing(NODES + ["10.0.0.4:6379"])
+        keys = [f"resume_data:{i}" for i in range(3000)]
+        moved = sum(before.node_for(key) != after.node_for(key) for key in keys)
+        assert moved < 0.4 * len(keys)
+        # Keys only move to the new node
+        assert all(after.node_for(key) == "10.0.0.4:6379"
+                   for key in keys if before.node_for(key) != after.node_for(key))
+
+
+class TestShardedRedis:
+    def test_pipeline_replies_in_queued_order(self, sharded):
+        pipe = sharded.pipeline()
+        for i in range(20):
+            pipe.set(f"k{i}", str(i))
+        pipe.execute()
+        pipe = sharded.pipeline()
+        for i in range(20):
+            pipe.get(f"k{i}")
+        assert pipe.execute() == [str(i).encode() for i in range(20)]
+        assert sharded.mget([f"k{i}" for i in range(20)]) == [str(i).encode() for i in range(20)]
+
+    def test_resume_entries_share_a_node(self, service, servers):
+        service.cache_resume_data("r1", {"job_intention": "工程师"})
+        service.cache_match_results_many("r1", {"jd_a": {"score": 80}, "jd_b": {"score": 60}})
+        service.cache_fingerprint("r1", {"simhash": 1})
+        node = service.client.node_for("{r1}")
+        assert _keys_on(servers, node) == {"resume_data:{r1}", "matches:{r1}", "fingerprint:{r1}"}
+        results = service.get_match_results_json_many("r1", ["jd_a", "jd_b", "jd_c"])
+        assert set(results) == {"jd_a", "jd_b"}
+
+    def test_lost_node_falls_back_to_local_tier(self, service, servers):
+        ids = [f"r{i}" for i in range(30)]
+        for resume_id in ids:
+            service.cache_resume_data(resume_id, {"job_intention": resume_id})
+        lost = service.client.node_for("{r0}")
+        servers[lost].connected = False
+
+        for resume_id in ids:
+            service.cache_resume_data(resume_id, {"job_intention": resume_id + "-v2"})
+        # The service keeps its client: only the lost node's keys went local
+        assert service.client is not None
+        assert service.client.node_status()[lost] == "down"
+        local = {key for key in service.memory_cache if key.startswith("resume_data:")}
+        assert local == {f"resume_data:{{{resume_id}}}" for resume_id in ids
+                         if service.client.node_for(f"{{{resume_id}}}") == lost}
+        assert 0 < len(local) < len(ids)
+        for resume_id in ids:
+            assert service.get_resume_data(resume_id)["job_intention"] == resume_id + "-v2"
+
+    def test_down_node_is_retried_after_interval(self, sharded, servers):
+        node = sharded.node_for("key")
+        servers[node].connected = False
+        with pytest.raises(redis.ConnectionError):
+            sharded.set("key", b"1")
+        servers[node].connected = True
+        # Still marked down: no connection attempt
+        with pytest.raises(redis.ConnectionError):
+            sharded.get("key")
+        sharded._down_until[node] = time.monotonic() - 1
+        sharded.set("key", b"2")
+        assert sharded.get("key") == b"2"
+        assert sharded.node_status()[node] == "up"
+
+    def test_pipeline_still_writes_to_live_nodes(self, sharded, servers):
+        lost = sharded.node_for("a")
+        other = next(key for key in ("b", "c", "d", "e", "f", "g") if sharded.node_for(key) != lost)
+        servers[lost].connected = False
+        pipe = sharded.pipeline()
+        pipe.set("a", b"1")
+        pipe.set(other, b"1")
+        with pytest.raises(redis.ConnectionError):
+            pipe.execute()
+        assert sharded.get(other) == b"1"
+
+    def test_search_index_stays_on_one_node(self, service, servers):
+        search = SearchService(service)
+        search.index_resume("r1", {"job_intention": "Python 工程师", "work_years": "5年"})
+        search.index_resume("r2", {"job_intention": "Java 工程师", "work_years": "3年"})
+        node = service.client.node_for("{search}")
+        assert all(key.startswith("{search}:") for key in _keys_on(servers, node))
+        result = search.search("python")
+        assert [doc["resume_id"] for doc in result["results"]] == ["r1"]
+        assert search.search("工程师 4年")["total"] == 1
+
+    def test_stats_report_shards(self, service):
+        stats = service.get_cache_stats()
+        assert stats["shards"] == {node: "up" for node in NODES}
@@ -0,0 +1,94 @@
+"""Unit tests for SearchService (candidate inverted index)."""
+import pytest
+from services.search_service import SearchService, parse_work_years
+
+CANDIDATES = {
+    "r1": {"basic_info": {"name": "Zhang Wei", "address": "Beijing, Haidian District"},
+           "job_intention": "Senior Python Backend Engineer", "work_years": "5 years",
+           "education_background": "Bachelor of Computer Science",
+           "raw_text_summary": "Python, FastAPI, Redis, PostgreSQL"},
+    "r2": {"basic_info": {"name": "Li Na", "address": "上海市浦东新区"},
+           "job_intention": "Java开发工程师", "work_years": "8年",
+           "education_background": "硕士", "raw_text_summary": "Java, Spring, MySQL, Python"},
+    "r3": {"basic_info": {"name": "Wang Fang", "address": "北京市朝阳区"},
+           "job_intention": "Python数据工程师", "work_years": "2年",
+           "education_background": "本科", "raw_text_summary": "Python, Spark, Hive"},
+}
+
+
+@pytest.fixture(params=["memory", "fakeredis"])
+def search_service(request, redis_service):
+    client = None
+    if request.param == "fakeredis":
+        fakeredis = pytest.importorskip("fakeredis")
+        client = fakeredis.FakeRedis(decode_responses=False)
+        client.flushall()
+    service = SearchService(redis_service(client))
+    for resume_id, data in CANDIDATES.items():
+        service.index_resume(resume_id, data)
+    return service
+
+
+class TestParsing:
+    def test_parse_work_years(self):
+        assert parse_work_years("5年") == 5.0
+        assert parse_work_years("5 years") == 5.0
+        assert parse_work_years("3.5 yrs") == 3.5
+        assert parse_work_years("about 7") == 7.0
+        assert parse_work_years(None) == 0.0
+        assert parse_work_years("unknown") == 0.0
+
+    def test_parse_query_extracts_years(self):
+        terms, min_years = SearchService.parse_query("Python, 5 years, Beijing")
+        assert terms == {"python", "beijing"}
+        assert min_years == 5.0
+
+
+class TestSearch:
+    def test_recruiter_query(self, search_service):
+        result = search_service.search("Python, 5 years, Beijing")
+        assert result["total"] == 1
+        assert result["results"][0]["resume_id"] == "r1"
+        assert "terms" not in result["results"][0]
+
+    def test_single_term_ordered_by_experience(self, search_service):
+        result = search_service.search("python")
+        assert [doc["resume_id"] for doc in result["results"]] == ["r2", "r1", "r3"]
+
+    def test_cjk_substring_match(self, search_service):
+        result = search_service.search("北京 Python")
+        assert result["total"] == 1
+        assert result["results"][0]["resume_id"] == "r3"
+
+    def test_min_years_parameter(self, search_service):
+        result = search_service.search("python", min_years=3)
+        assert result["total"] == 2
+        assert {doc["resume_id"] for doc in result["results"]} == {"r1", "r2"}
+
+    def test_pagination(self, search_service):
+        page1 = search_service.search("python", page=1, page_size=2)
+        page2 = search_service.search("python", page=2, page_size=2)
+        assert page1["total"] == page2["total"] == 3
+        assert len(page1["results"]) == 2
+        assert len(page2["results"]) == 1
+
+    def test_no_match(self, search_service):
+        assert search_service.search("golang")["total"] == 0
+
+    def test_reindex_replaces_terms(self, search_service):
+        updated = dict(CANDIDATES["r1"], raw_text_summary="Golang, Kubernetes")
+        updated["job_intention"] = "Go Engineer"
+        search_service.index_resume("r1", updated)
+        assert search_service.search("golang")["results"][0]["resume_id"] == "r1"
+        assert "r1" not in {doc["resume_id"] for doc in search_service.search("fastapi")["results"]}
+
+    def test_memory_index_keeps_the_newest_documents(self, redis_service):
+        service = SearchService(redis_service(), max_memory_documents=2)
+        for resume_id, data in CANDIDATES.items():
+            service.index_resume(resume_id, data)
+        service.index_resume("r1", CANDIDATES["r1"])  # re-indexed: newest again
+        assert len(service._docs) == 2
+        assert service.search()["total"] == 2
+        dropped = (set(CANDIDATES) - {"r1"}) - {doc["resume_id"] for doc in service.search()["results"]}
+        assert len(dropped) == 1
+        assert all(dropped.isdisjoint(postings) for postings in service._postings.values())
@@ -0,0 +1,111 @@
+"""Tests for in-memory, precompressed static asset delivery."""
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from core import static_assets as static_module
+from core.static_assets import StaticAssets
+
+HTML = ("<html><body>" + "<p>AI Resume Analyzer</p>" * 200 + "</body></html>").encode("utf-8")
+
+
+@pytest.fixture
+def assets_dir(tmp_path):
+    (tmp_path / "index.html").write_bytes(HTML)
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "app.js").write_bytes(b"console.log('hi');" * 100)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG" + os.urandom(2048))
+    return tmp_path
+
+
+@pytest.fixture
+def client(assets_dir):
+    assets = StaticAssets(str(assets_dir), max_age=600, index_max_age=30)
+    app = FastAPI()
+
+    @app.get("/")
+    def root(request: Request):
+        return assets.response(request, "index.html", index=True)
+
+    @app.get("/static/{path:path}")
+    def static(path: str, request: Request):
+        response = assets.response(request, path)
+        if response is None:
+            raise HTTPException(status_code=404)
+        return response
+
+    return TestClient(app), assets
+
+
+class TestStaticAssets:
+    def test_index_is_served_from_memory(self, client, assets_dir):
+        test_client, _ = client
+        os.remove(assets_dir / "index.html")
+        response = test_client.get("/", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert response.content == HTML
+        assert response.headers["content-type"].startswith("text/html")
+        assert response.headers["cache-control"] == "public, max-age=30"
+
+    def test_gzip_is_negotiated(self, client):
+        test_client, assets = client
+        if static_module.brotli is not None:
+            pytest.skip("brotli installed: br is preferred")
+        response = test_client.get("/static/js/app.js", headers={"Accept-Encoding": "gzip, deflate"})
+        # httpx decodes the body; the header tells which representation was sent
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.content == b"console.log('hi');" * 100
+        stored = assets.assets["js/app.js"]
+        assert gzip.decompress(stored.bodies["gzip"]) == stored.bodies["identity"]
+        assert response.headers["etag"] == f'"{stored.hash}-gzip"'
+
+    def test_brotli_is_preferred_when_available(self, client):
+        if static_module.brotli is None:
+            pytest.skip("brotli not installed")
+        _, assets = client
+        assert assets.assets["index.html"].coding_for("gzip, br") == "br"
+
+    def test_encoding_rules(self, client):
+        _, assets = client
+        index = assets.assets["index.html"]
+        assert index.coding_for("") == "identity"
+        assert index.coding_for("gzip;q=0") == "identity"
+        assert index.coding_for("*") in ("br", "gzip")
+        # Already-compressed types are stored as is
+        assert set(assets.assets["logo.png"].bodies) == {"identity"}
+
+    def test_etag_revalidation_returns_304(self, client):
+        test_client, assets = client
+        first = test_client.get("/static/js/app.js", headers={"Accept-Encoding": "gzip"})
+        second = test_client.get("/static/js/app.js", headers={
+            "Accept-Encoding": "identity", "If-None-Match": first.headers["etag"]
+        })
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["cache-control"] == "public, max-age=600"
+        changed = test_client.get("/static/js/app.js", headers={"If-None-Match": '"0000000000000000"'})
+        assert changed.status_code == 200
+
+    def test_versioned_urls_are_immutable(self, client):
+        test_client, assets = client
+        url = assets.url("js/app.js")
+        assert url == f"/static/js/app.js?v={assets.assets['js/app.js'].hash}"
+        assert "immutable" in test_client.get(url).headers["cache-control"]
+        assert "immutable" not in test_client.get("/static/js/app.js?v=stale").headers["cache-control"]
+
+    def test_unknown_and_traversal_paths_are_404(self, client):
+        test_client, _ = client
+        assert test_client.get("/static/missing.js").status_code == 404
+        assert test_client.get("/static/../main.py").status_code == 404
+
+    def test_large_files_stay_on_disk(self, assets_dir):
+        assets = StaticAssets(str(assets_dir), max_file_bytes=1024)
+        assert "logo.png" in assets.large_files and "logo.png" not in assets.assets
+        assert "index.html" not in assets.assets  # above 1 KB too
+
+    def test_missing_directory(self, tmp_path):
+        assert StaticAssets(str(tmp_path / "nope")).assets == {}
@@ -0,0 +1,69 @@
+"""Tests for TextQualityService (garbled text layer detection)."""
+import random
+
+from services.text_quality_service import TextQualityService
+
+
+CLEAN_ZH = "张三，男，5年Python后端开发经验。熟悉Django、FastAPI、Redis、MySQL。2018年毕业于北京大学计算机科学与技术专业，本科学历。"
+CLEAN_ZH_HANT = ("● 陳大文，男，5年Python後端開發經驗。\n● 熟悉Django、FastAPI、Redis、MySQL。\n"
+                 "● 2018年畢業於國立臺灣大學資訊工程學系，學士學歷。\n"
+                 "● 負責「訂單系統」架構設計與效能優化，帶領團隊導入Kubernetes。\n"
+                 "● 聯絡電話：0912-345-678；電郵：chen@example.com")
+CLEAN_EN = ("Senior software engineer with 6 years of experience building distributed systems "
+            "in Go and Python. Led migration of payment services to Kubernetes.")
+
+
+class TestTextQualityScore:
+    def test_clean_text_scores_high(self):
+        assert TextQualityService.score(CLEAN_ZH) == 1.0
+        assert TextQualityService.score(CLEAN_EN) == 1.0
+
+    def test_traditional_chinese_is_not_rare(self):
+        assert TextQualityService.analyze(CLEAN_ZH_HANT)["rare_cjk"] == 0
+        assert TextQualityService.score(CLEAN_ZH_HANT) > 0.9
+
+    def test_empty_text_scores_zero(self):
+        assert TextQualityService.score("") == 0.0
+        assert TextQualityService.score(" \n ") == 0.0
+
+    def test_cid_markers(self):
+        assert TextQualityService.score("(cid:12)(cid:45)(cid:88) (cid:3)(cid:77)(cid:90)") == 0.0
+
+    def test_replacement_characters(self):
+        assert TextQualityService.is_garbled("简历���工作��经验", 0.5)
+
+    def test_unassigned_code_points(self):
+        assert TextQualityService.is_garbled("\u0378\u0379\u0380 \u0381\u0382 张三", 0.5)
+
+    def test_private_use_glyphs(self):
+        assert TextQualityService.is_garbled("\ue001\ue002\ue003 \ue004\ue005 张三", 0.5)
+
+    def test_utf8_read_as_latin1(self):
+        assert TextQualityService.is_garbled("å¼ ä¸‰ çµé¢ å·¥ä½œ Ã©tÃ© â€œquotedâ€", 0.5)
+
+    def test_rare_cjk_characters(self):
+        rng = random.Random(0)
+        rare = [chr(c) for c in range(0x4E00, 0x9FA5) if not _encodable(chr(c), "gb2312", "big5")]
+        assert TextQualityService.is_garbled("".join(rng.choice(rare) for _ in range(60)), 0.5)
+
+    def test_unpronounceable_latin_words(self):
+        rng = random.Random(0)
+        words = ["".join(rng.choice("qwrtzpsdfghjklxcvbnm") for _ in range(6)) for _ in range(20)]
+        assert TextQualityService.is_garbled(" ".join(words), 0.5)
+
+    def test_symbol_soup(self):
+        assert TextQualityService.is_garbled("■□▲△●○◆◇★☆" * 5, 0.5)
+
+    def test_acronyms_and_a_few_bullets_are_fine(self):
+        text = "● AWS, GCP, SQL, CI/CD\n● 负责 API 设计与性能优化\n● Python / Go / TypeScript"
+        assert not TextQualityService.is_garbled(text, 0.5)
+
+
+def _encodable(ch, *encodings):
+    for encoding in encodings:
+        try:
+            ch.encode(encoding)
+            return True
+        except UnicodeEncodeError:
+            pass
+    return False
@@ -0,0 +1,77 @@
+"""Tests for per-tenant token accounting and budgets."""
+import contextvars
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from services.usage_service import UsageService, record_model_usage
+
+
+def _response(input_tokens, output_tokens, **extra):
+    return SimpleNamespace(usage=dict(input_tokens=input_tokens, output_tokens=output_tokens, **extra))
+
+
+@pytest.fixture
+def redis_backed():
+    fakeredis = pytest.importorskip("fakeredis")
+    return SimpleNamespace(client=fakeredis.FakeRedis())
+
+
+@pytest.fixture
+def memory_backed():
+    return SimpleNamespace(client=None)
+
+
+class TestUsageService:
+    def test_model_usage_is_billed_to_the_metered_tenant(self, redis_backed):
+        service = UsageService(redis_backed)
+        with service.metering("team-a"):
+            record_model_usage("qwen-turbo", _response(1000, 200))
+            # Threadpool work runs in a copy of the request's context (as run_in_threadpool does)
+            context = contextvars.copy_context()
+            worker = threading.Thread(target=context.run, args=(
+                record_model_usage, "qwen-vl-max", _response(3000, 100, image_tokens=2500)
+            ))
+            worker.start()
+            worker.join()
+        record_model_usage("qwen-turbo", _response(5, 5))  # not metered: ignored
+
+        usage = service.usage("team-a")
+        assert usage["input_tokens"] == 4000
+        assert usage["output_tokens"] == 300
+        assert usage["image_tokens"] == 2500
+        assert usage["calls"] == 2
+        assert usage["total_tokens"] == 4300
+        assert usage["by_model"] == {"qwen-turbo": 1200, "qwen-vl-max": 3100}
+        assert list(service.report()["tenants"]) == ["team-a"]
+        assert redis_backed.client.ttl(f"usage:{UsageService.day()}:team-a") > 0
+
+    def test_counters_are_shared_between_instances(self, redis_backed):
+        UsageService(redis_backed).record("team-a", "qwen-turbo", {"input_tokens": 10, "output_tokens": 5})
+        UsageService(redis_backed).record("team-a", "qwen-turbo", {"input_tokens": 10, "output_tokens": 5})
+        assert UsageService(redis_backed).usage("team-a")["total_tokens"] == 30
+
+    def test_memory_fallback(self, memory_backed):
+        service = UsageService(memory_backed)
+        service.record("team-b", "qwen-turbo", {"input_tokens": 7, "output_tokens": 3})
+        assert service.report()["tenants"]["team-b"]["total_tokens"] == 10
+
+    def test_budgets(self, memory_backed):
+        service = UsageService(memory_backed, default_budget=100, budgets={"big": 1000})
+        service.record("small", "qwen-turbo", {"input_tokens": 90, "output_tokens": 10})
+        service.record("big", "qwen-turbo", {"input_tokens": 90, "output_tokens": 10})
+        assert service.over_budget("small")
+        assert not service.over_budget("big")
+        assert service.usage("big")["remaining"] == 900
+        assert not UsageService(memory_backed).over_budget("small")  # 0 = unlimited
+
+    def test_from_settings_and_tenant_names(self, memory_backed):
+        from core.config import Settings
+        service = UsageService.from_settings(memory_backed, Settings(
+            TENANT_DAILY_TOKEN_BUDGET=50, TENANT_TOKEN_BUDGETS="team-a=2000, broken=x"
+        ))
+        assert service.budget("team-a") == 2000
+        assert service.budget("other") == 50
+        assert UsageService.tenant_name(None) == "default"
+        assert UsageService.tenant_name("team a/../b") == "teama..b"